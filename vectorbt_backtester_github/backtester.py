@@ -1,33 +1,94 @@
 # backtester.py
 
-import yfinance as yf
+import hashlib
+import inspect
+import json
+import os
+import traceback
+from collections import deque
 import vectorbt as vbt
+from vectorbt.portfolio.enums import StopEntryPrice, TradeStatus
 import numpy as np
 import pandas as pd
 import config
 import strategies
+import parallel
+import data_sources
+import metrics
+import profiling
+import result_store
+from market_data import MarketData, write_store
+from param_space import ParamSpace
 from tqdm import tqdm
 
-def load_data(ticker, start, end):
-    """
-    Télécharge toutes les données OHLCV depuis Yahoo Finance.
-    Renvoie le DataFrame complet (Close, Open, High, Low, Volume, etc.).
-    """
-    data = yf.download(ticker, start=start, end=end)
-    # Patch multi-index : aplatis si besoin
-    if isinstance(data.columns, pd.MultiIndex):
-        data.columns = data.columns.get_level_values(0)
-    # Patch : transforme les colonnes tuple en string
-    data.columns = [''.join(col) if isinstance(col, tuple) else col for col in data.columns]
-    needed_cols = ["Open", "High", "Low", "Close", "Volume"]
-    # Vérifie que tout est bien là
-    for col in needed_cols:
-        if col not in data.columns:
-            raise ValueError(f"Colonne {col} manquante dans les données téléchargées")
-    data = data.dropna()
-    # Index en DatetimeIndex
-    if not isinstance(data.index, pd.DatetimeIndex):
-        data.index = pd.to_datetime(data.index)
+def load_data(ticker, start, end, timeframe=None, source=None):
+    """
+    Charge toutes les données OHLCV via la source configurée (voir data_sources.py :
+    Yahoo Finance avec cache disque par défaut, ou fichiers locaux).
+    Renvoie le DataFrame complet (Close, Open, High, Low, Volume).
+    """
+    source = source or data_sources.get_source(config)
+    data = source.fetch(ticker, start, end, timeframe or config.TIMEFRAME)
+    if data.empty:
+        raise ValueError(f"Aucune donnée pour {ticker} entre {start} et {end}")
+    return data
+
+def read_tickers(tickers):
+    """
+    Renvoie une liste de tickers à partir :
+    - d'une liste (renvoyée telle quelle)
+    - d'un chemin de fichier : un ticker par ligne (ou première colonne d'un CSV), '#' = commentaire
+    """
+    if isinstance(tickers, (list, tuple)):
+        return list(tickers)
+    symbols = []
+    with open(tickers) as f:
+        for line in f:
+            symbol = line.split("#")[0].split(",")[0].strip()
+            if symbol and symbol.lower() not in ("ticker", "symbol"):
+                symbols.append(symbol)
+    return symbols
+
+def load_universe(tickers, start, end, timeframe=None, source=None):
+    """
+    Charge les données OHLCV de plusieurs actifs (un seul téléchargement groupé pour les tickers
+    absents du cache) et les aligne sur un index commun. Renvoie un panel : DataFrame à colonnes
+    MultiIndex (champ, ticker), ex : panel["Close"] = DataFrame barres x tickers.
+    Les tickers sans aucune donnée sont écartés (avec un message).
+    """
+    tickers = read_tickers(tickers)
+    source = source or data_sources.get_source(config)
+    frames = source.fetch_many(tickers, start, end, timeframe or config.TIMEFRAME)
+
+    missing = [t for t in tickers if frames.get(t) is None or frames[t].empty]
+    if missing:
+        print(f"Tickers sans données ignorés : {missing}")
+    kept = [t for t in tickers if t not in missing]
+    if not kept:
+        raise ValueError("Aucune donnée pour les tickers demandés")
+    data = pd.concat({t: frames[t] for t in kept}, axis=1).swaplevel(axis=1)
+    data = data.reindex(columns=pd.MultiIndex.from_product([data_sources.NEEDED_COLS, kept]))
+    data = data.dropna(how="all")
+    return data
+
+def load_market_data(tickers, start, end, timeframe=None, source=None, directory=None):
+    """
+    Comme load_universe, mais renvoie un MarketData mappé en mémoire (market_data.write_store) :
+    les données sont écrites ticker par ticker dans directory (défaut : config.MEMMAP_DIR), puis
+    relues sans copie ; seules les pages lues sont chargées (univers intraday de plusieurs années).
+    Le dossier est réutilisé tant que (tickers, période, timeframe) ne change pas.
+    """
+    tickers = read_tickers(tickers)
+    timeframe = timeframe or config.TIMEFRAME
+    key = hashlib.sha256(json.dumps([tickers, str(start), str(end), timeframe]).encode()).hexdigest()[:16]
+    path = os.path.join(directory or config.MEMMAP_DIR, key)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return MarketData.open(path)
+    source = source or data_sources.get_source(config)
+    data = write_store(path, tickers, lambda ticker: source.fetch(ticker, start, end, timeframe))
+    missing = [t for t in tickers if t not in data.tickers]
+    if missing:
+        print(f"Tickers sans données ignorés : {missing}")
     return data
 
 def safe_stat(val, fallback=0):
@@ -37,38 +98,674 @@ def safe_stat(val, fallback=0):
         return fallback
     return val
 
-def run_backtests(price_data, setups, trend_labels, config):
+def run_backtests(price_data, setups, trend_labels, config, batched=False, workers=1, sink=None,
+                  store=None):
     """
     Lance les backtests pour chaque setup de chaque stratégie.
+    setups : {stratégie: setups} (ex : strategies.generate_strategy_setups()), ou une liste /
+    un ParamSpace unique donné aux stratégies qui en acceptent les paramètres (voir setups_by_strategy).
     Renvoie un DataFrame avec toutes les stats.
+    Si batched=True (ou workers > 1), utilise le moteur vectorisé (voir run_backtests_batched).
+    Si un sink (result_sink.ResultSink) est fourni, les résultats y sont écrits et le sink est renvoyé.
+    Si un store (result_store.ResultStore) est fourni, le moteur vectorisé est utilisé et les
+    setups déjà calculés sont relus au lieu d'être relancés (sweep reprenable).
+    Si config.CONTEXT_MODE est activé et trend_labels fourni, le moteur vectorisé est utilisé et
+    chaque setup est évalué par contexte (colonne 'context', voir run_backtests_batched).
     """
+    context_mode = config.CONTEXT_MODE and trend_labels is not None
+    if batched or workers > 1 or store is not None or context_mode:
+        return run_backtests_batched(price_data, setups, trend_labels, config, workers=workers,
+                                     sink=sink, store=store)
+
     results = []
+    errors = []
+    close, inputs = market_inputs(price_data)
 
-    # Pour chaque stratégie du dico
-    for strat_name, strat_func in strategies.STRATEGY_FUNCS.items():
-        for setup in tqdm(setups, desc=f"{strat_name} setups"):
+    # Pour chaque stratégie, ses setups (voir setups_by_strategy)
+    for strat_name, strat_setups in runnable_setups(setups, price_data).items():
+        strat_func = strategies.STRATEGY_FUNCS[strat_name]
+        strat_inputs = strategy_inputs(strat_name, inputs)
+        for setup in tqdm(strat_setups, desc=f"{strat_name} setups"):
             try:
                 # Appelle la fonction stratégie avec le setup (gère les params via **setup)
-                entries, exits = strat_func(price_data, **setup)
+                with profiling.stage("signals", strat_name):
+                    entries, exits = strat_func(close, **setup, **strat_inputs)
                 # Option : entries = entries & (trend_labels == 1)  # filtrage contexte
-                pf = vbt.Portfolio.from_signals(
-                    price_data,
-                    entries,
-                    exits,
-                    sl_stop=setup.get("sl_pct", None),
-                    tp_stop=setup.get("tp_pct", None),
-                    freq="1D"
-                )
-                stats = pf.stats()
+                with profiling.stage("simulation", strat_name):
+                    pf = vbt.Portfolio.from_signals(
+                        close,
+                        entries,
+                        exits,
+                        sl_stop=setup.get("sl_pct", None),
+                        tp_stop=setup.get("tp_pct", None),
+                        freq=metrics.timeframe_freq(config.TIMEFRAME)
+                    )
+                # Métriques via le noyau de metrics.py (moyenne si plusieurs colonnes, comme pf.stats()),
+                # NaN partout (ex : aucun trade) = valeur de remplacement de safe_stat
+                with profiling.stage("metrics", strat_name):
+                    stats = metrics.compute_metrics(pf, config.METRICS, fill=False)
                 results.append({
                     "strategy": strat_name,
                     **setup,
-                    "trades": safe_stat(stats.get("Total Trades", np.nan)),
-                    "cagr": safe_stat(stats.get("CAGR", np.nan)),
-                    "sharpe": safe_stat(stats.get("Sharpe Ratio", np.nan)),
-                    "max_dd": safe_stat(stats.get("Max Drawdown", np.nan), fallback=-1),
-                    "pf": safe_stat(stats.get("Profit Factor", np.nan))
+                    **{
+                        name: safe_stat(
+                            np.nan if np.isnan(values).all() else float(np.nanmean(values)),
+                            fallback=metrics.FALLBACKS.get(name, 0)
+                        )
+                        for name, values in stats.items()
+                    }
                 })
             except Exception as e:
+                errors.append((strat_name, setup, e))
+                profiling.count("exceptions", strategy=strat_name)
                 continue
+    if errors:
+        strat_name, setup, e = errors[0]
+        print(f"{len(errors)} setups en erreur ignorés (ex : {strat_name} {setup} -> {e!r})")
+    if sink is not None:
+        sink.write(pd.DataFrame(results))
+        sink.close()
+        return sink
     return pd.DataFrame(results)
+
+
+# === MOTEUR VECTORISÉ ===
+# Au lieu d'un Portfolio par setup, on empile les signaux de N setups dans des matrices
+# 2-D (une colonne par setup) et on simule tout en un seul appel à from_signals.
+# Les paramètres sont séparés en deux groupes :
+#   - paramètres de signal (changent entries/exits) : signaux générés une fois par combinaison unique
+#   - paramètres d'exécution (SL/TP) : n'interviennent que dans la simulation
+# Les paramètres ignorés par la stratégie (absorbés par **kwargs, ex : paramètre d'une autre
+# stratégie dans une liste de setups commune) ne changent ni les signaux ni la simulation :
+# les setups identiques ne sont simulés qu'une fois.
+# Les entrées OHLCV autres que la clôture (strategies.STRATEGY_INPUTS) sont passées en arguments
+# nommés, seulement aux stratégies qui les demandent.
+
+EXECUTION_PARAMS = ("sl_pct", "tp_pct")
+
+# Version du moteur, incluse dans les clés de result_store : à incrémenter quand la simulation
+# ou le calcul des métriques change, pour invalider les résultats déjà stockés
+ENGINE_VERSION = 2
+
+# Stratégies dont une erreur de signaux a déjà été affichée (une fois par stratégie et par processus)
+SIGNAL_ERRORS_REPORTED = set()
+
+def signal_param_names(strat_func):
+    """Noms des paramètres explicitement acceptés par la stratégie (hors prix, entrées et **kwargs)."""
+    params = list(inspect.signature(strat_func).parameters.values())[1:]
+    return {
+        p.name for p in params
+        if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+        and p.name not in EXECUTION_PARAMS and p.name not in strategies.INPUT_COLUMNS
+    }
+
+def setups_by_strategy(setups):
+    """
+    Renvoie {stratégie: setups}. Un dict est renvoyé tel quel ; une liste de setups (ou un
+    ParamSpace) unique n'est donnée qu'aux stratégies dont tous les paramètres obligatoires
+    y figurent (les autres lèveraient une erreur à chaque setup).
+    """
+    if isinstance(setups, dict):
+        return setups
+    if isinstance(setups, ParamSpace):
+        names = set(setups.names)
+    else:
+        names = set(setups[0]) if len(setups) else set()
+    return {
+        strat_name: setups for strat_name in strategies.STRATEGY_FUNCS
+        if strategies.required_params(strat_name) <= names
+    }
+
+def available_inputs(price_data):
+    """Entrées (noms de strategies.INPUT_COLUMNS) présentes dans les données."""
+    if isinstance(price_data, MarketData):
+        fields = price_data.fields
+    elif isinstance(price_data, pd.DataFrame):
+        fields = price_data.columns.get_level_values(0)
+    else:
+        return set()
+    return {name for name, column in strategies.INPUT_COLUMNS.items() if column in fields}
+
+def runnable_setups(setups, price_data):
+    """
+    setups_by_strategy, sans les stratégies dont une entrée requise manque dans les données
+    (ex : volume pour vwma_crossover quand price_data est une série de clôtures).
+    """
+    by_strategy = setups_by_strategy(setups)
+    available = available_inputs(price_data)
+    skipped = [s for s in by_strategy if not set(strategies.required_inputs(s)) <= available]
+    if skipped:
+        print(f"Stratégies ignorées (entrées manquantes dans les données) : {skipped}")
+    return {s: strat_setups for s, strat_setups in by_strategy.items() if s not in skipped}
+
+def market_data(price_data, strat_names=None):
+    """
+    MarketData (buffer OHLCV contigu, voir market_data.py) de la clôture et des entrées utiles aux
+    stratégies 'strat_names' (toutes les entrées si None) : c'est ce qui est mis en mémoire
+    partagée et pris en compte dans l'empreinte du store. Un MarketData est réutilisé sans copie.
+    """
+    if strat_names is None:
+        return MarketData.from_frame(price_data)
+    needed = {name for s in strat_names for name in strategies.required_inputs(s)}
+    fields = ["Close"] + [c for name, c in strategies.INPUT_COLUMNS.items() if name in needed]
+    return MarketData.from_frame(price_data, fields)
+
+def market_inputs(data):
+    """
+    Sépare les données en (clôture, {entrée: données}) : entrées de strategies.INPUT_COLUMNS
+    présentes (aucune pour une série de clôtures). Avec un MarketData, ce sont des vues de son
+    buffer, les mêmes objets à chaque appel (le cache d'indicateurs reste valable).
+    """
+    data = market_data(data)
+    return data.close, {
+        name: data.series(column) for name, column in strategies.INPUT_COLUMNS.items() if column in data
+    }
+
+def strategy_inputs(strat_name, inputs):
+    """Entrées à passer à la stratégie : celles de strategies.STRATEGY_INPUTS présentes dans 'inputs'."""
+    inputs = inputs or {}
+    return {name: inputs[name] for name in strategies.required_inputs(strat_name) if name in inputs}
+
+def split_setup(setup, signal_names):
+    """
+    Sépare un setup en (clé de signal, clé d'exécution), deux tuples hashables.
+    Deux setups avec la même clé de signal partagent exactement les mêmes entries/exits.
+    """
+    signal = tuple(sorted(
+        ((k, v) for k, v in setup.items() if k in signal_names),
+        key=lambda kv: kv[0]
+    ))
+    execution = tuple(setup.get(k) for k in EXECUTION_PARAMS)
+    return signal, execution
+
+def plan_simulations(setups, signal_names):
+    """
+    Déduplique les setups d'une stratégie.
+    Renvoie (sim_keys, setup_sim) :
+    - sim_keys : liste des couples (signal, exécution) uniques, regroupés par clé de signal
+    - setup_sim : pour chaque setup, l'indice de sa simulation dans sim_keys
+    """
+    sim_index = {}
+    signal_order = {}
+    first_pass = np.empty(len(setups), dtype=np.int64)
+    for i, setup in enumerate(setups):
+        key = split_setup(setup, signal_names)
+        signal_order.setdefault(key[0], len(signal_order))
+        first_pass[i] = sim_index.setdefault(key, len(sim_index))
+
+    # Regroupe les simulations par signal pour ne générer chaque signal qu'une fois
+    keys = list(sim_index)
+    order = sorted(range(len(keys)), key=lambda i: signal_order[keys[i][0]])
+    sim_keys = [keys[i] for i in order]
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys))
+    return sim_keys, rank[first_pass]
+
+def generate_signals(strat_func, price, signal, inputs=None):
+    """
+    Génère (entries, exits) en tableaux numpy booléens pour une clé de signal.
+    inputs : entrées OHLCV requises par la stratégie ({nom: données}, voir market_inputs).
+    Renvoie None si la stratégie rejette les paramètres (TypeError / ValueError, ex : paramètre
+    manquant ou mal nommé, fenêtre invalide) ou ne renvoie pas des signaux alignés sur price
+    (1-D pour une Series, barres x tickers pour un panel DataFrame). La première erreur de chaque
+    stratégie est affichée ; les autres exceptions remontent (paquet en erreur, voir _backtest_chunk).
+    """
+    try:
+        entries, exits = strat_func(price, **dict(signal), **(inputs or {}))
+    except (TypeError, ValueError) as e:
+        strat_name = strat_func.__name__
+        profiling.count("signal_errors", strategy=strat_name)
+        if strat_name not in SIGNAL_ERRORS_REPORTED:
+            SIGNAL_ERRORS_REPORTED.add(strat_name)
+            print(f"Signaux {strat_name} en erreur, setups ignorés (ex : {dict(signal)} -> {e!r})")
+        return None
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    if entries.shape != price.shape or exits.shape != price.shape:
+        return None
+    return entries, exits
+
+def extract_metrics(pf, labels=None, contexts=metrics.CONTEXTS):
+    """
+    Extrait les métriques de config.METRICS colonne par colonne sous forme de tableaux numpy
+    (noyau vectorisé de metrics.py, sans pf.stats()). Les NaN sont remplacés comme dans safe_stat.
+    Avec labels (contexte de chaque barre), renvoie des tableaux (n_colonnes, n_contextes) :
+    une valeur par contexte de 'contexts' (metrics.CONTEXTS par défaut), tirée de la même simulation.
+    """
+    if labels is not None:
+        return metrics.compute_context_metrics(pf, labels, config.METRICS, contexts)
+    return metrics.compute_metrics(pf, config.METRICS)
+
+def simulate_batch(close, entries, exits, sl_stop, tp_stop, freq=None, **kwargs):
+    """
+    Simule tous les setups d'un batch en un seul appel à from_signals.
+    sl_stop / tp_stop : tableaux (n_colonnes,), NaN = pas de stop. Chaque colonne a ses propres stops.
+    Si close est un panel (barres x tickers), il est répété pour chaque setup du batch.
+    freq : fréquence des barres (défaut : celle de config.TIMEFRAME) ; kwargs : autres options
+    de from_signals (ex : init_cash, price, voir ChunkedSimulation).
+    """
+    columns = pd.RangeIndex(entries.shape[1])
+    if isinstance(close, pd.DataFrame):
+        close = pd.DataFrame(
+            np.tile(close.to_numpy(), (1, entries.shape[1] // close.shape[1])),
+            index=close.index, columns=columns
+        )
+    return vbt.Portfolio.from_signals(
+        close,
+        pd.DataFrame(entries, index=close.index, columns=columns),
+        pd.DataFrame(exits, index=close.index, columns=columns),
+        sl_stop=np.asarray(sl_stop, dtype=float)[None, :],
+        tp_stop=np.asarray(tp_stop, dtype=float)[None, :],
+        freq=freq or metrics.timeframe_freq(config.TIMEFRAME),
+        **kwargs
+    )
+
+def run_strategy_batched(strat_func, close, setups, batch_size, desc=None, labels=None, inputs=None,
+                         contexts=metrics.CONTEXTS):
+    """
+    Backteste tous les setups d'une stratégie avec le moteur vectorisé.
+    close : Series (un actif) ou DataFrame barres x tickers (panel multi-actifs, voir load_universe) :
+    dans ce cas chaque setup occupe une colonne par ticker et batch_size compte les colonnes.
+    labels : contexte de chaque barre (1 / 0 / -1, voir context.py) ou None ; si fourni,
+    les métriques sont découpées par contexte ('contexts', metrics.CONTEXTS par défaut) sans
+    simulation supplémentaire (ex : périodes in-sample / out-of-sample, voir validator.py).
+    inputs : entrées OHLCV disponibles ({nom: données}, voir market_inputs) ; seules celles de
+    strategies.STRATEGY_INPUTS sont passées à la stratégie.
+    Renvoie (setup_metrics, valid) alignés sur 'setups' :
+    - setup_metrics : dict {nom: tableau (n_setups,) ou (n_setups, n_tickers) pour un panel ;
+      avec labels, (n_setups, n_tickers * n_contextes), contexte le plus rapide}
+    - valid : masque des setups dont les signaux ont pu être générés
+    """
+    strat_name = strat_func.__name__
+    inputs = strategy_inputs(strat_name, inputs)
+    sim_keys, setup_sim = plan_simulations(setups, signal_param_names(strat_func))
+    n_sims = len(sim_keys)
+    profiling.count("setups", len(setups), strat_name)
+    profiling.count("simulations", n_sims, strat_name)
+    width = close.shape[1] if close.ndim == 2 else 1
+    n_ctx = len(contexts) if labels is not None else 1
+    sims_per_batch = max(batch_size // width, 1)
+    sim_metrics = {}
+    sim_valid = np.zeros(n_sims, dtype=bool)
+    signals = {}
+
+    for start in tqdm(range(0, n_sims, sims_per_batch), desc=desc, disable=desc is None):
+        positions, entries_cols, exits_cols, sl_stop, tp_stop = [], [], [], [], []
+        for pos in range(start, min(start + sims_per_batch, n_sims)):
+            signal, (sl, tp) = sim_keys[pos]
+            if signal not in signals:
+                with profiling.stage("signals", strat_name):
+                    signals[signal] = generate_signals(strat_func, close, signal, inputs)
+            if signals[signal] is None:
+                continue
+            positions.append(pos)
+            entries_cols.append(signals[signal][0])
+            exits_cols.append(signals[signal][1])
+            sl_stop.append(np.nan if sl is None else sl)
+            tp_stop.append(np.nan if tp is None else tp)
+        # Les simulations sont regroupées par signal : seul le dernier peut resservir au batch suivant
+        last = sim_keys[min(start + sims_per_batch, n_sims) - 1][0]
+        signals = {last: signals[last]} if last in signals else {}
+        if not positions:
+            continue
+
+        with profiling.stage("simulation", strat_name):
+            pf = simulate_batch(
+                close, np.column_stack(entries_cols), np.column_stack(exits_cols),
+                np.repeat(sl_stop, width), np.repeat(tp_stop, width)
+            )
+        with profiling.stage("metrics", strat_name):
+            batch_metrics = extract_metrics(pf, labels, contexts)
+        for name, values in batch_metrics.items():
+            sim_metrics.setdefault(name, np.full((n_sims, width * n_ctx), np.nan))[positions] = \
+                values.reshape(len(positions), width * n_ctx)
+        sim_valid[positions] = True
+
+    setup_metrics = {
+        name: values[setup_sim] if close.ndim == 2 or labels is not None else values[setup_sim, 0]
+        for name, values in sim_metrics.items()
+    }
+    return setup_metrics, sim_valid[setup_sim]
+
+# === HISTORIQUES LONGS : TRANCHES DE BARRES ===
+# Pour l'intraday (années de barres minute, univers mappé en mémoire), l'historique est traité par
+# tranches de config.CHUNK_BARS barres : seules les matrices (barres de la tranche x colonnes du
+# batch) sont en mémoire. L'état de chaque colonne est reporté d'une tranche à la suivante.
+
+class ChunkedSimulation:
+    """
+    Simulation d'un batch de colonnes tranche par tranche (voir run_strategy_chunked).
+    État reporté entre deux tranches, par colonne : liquidités, taille et prix d'entrée de la
+    position ouverte. Chaque tranche (sauf la première) commence par la dernière barre de la
+    précédente, où la position ouverte est reprise au même prix et à la même taille (le prix
+    d'entrée sert aussi de référence aux stops) ; cette barre est ensuite retirée des rendements.
+    Les métriques sont accumulées dans un metrics.StreamingInputs.
+    """
+
+    def __init__(self, sl_stop, tp_stop, years, ppy):
+        n_cols = len(sl_stop)
+        self.sl_stop = sl_stop
+        self.tp_stop = tp_stop
+        self.cash = None
+        self.size = np.zeros(n_cols)
+        self.entry_price = np.full(n_cols, np.nan)
+        self.inputs = metrics.StreamingInputs(n_cols, years, ppy)
+
+    def run(self, close, entries, exits, last):
+        """
+        Simule une tranche. close : barres de la tranche, précédées de la dernière barre de la
+        tranche précédente (sauf pour la première) ; entries / exits : (barres de la tranche,
+        n_colonnes). last : dernière tranche (les trades encore ouverts sont alors comptés).
+        """
+        kwargs = {}
+        if self.cash is not None:
+            carried = self.size > 0
+            entries = np.vstack([carried[None, :], entries])
+            exits = np.vstack([np.zeros((1, exits.shape[1]), dtype=bool), exits])
+            price = np.full(entries.shape, np.inf)
+            price[0, carried] = self.entry_price[carried]
+            kwargs = {
+                "init_cash": self.cash + self.size * np.nan_to_num(self.entry_price),
+                "price": price,
+                "stop_entry_price": StopEntryPrice.FillPrice,
+            }
+        pf = simulate_batch(close, entries, exits, self.sl_stop, self.tp_stop, **kwargs)
+        returns = np.asarray(pf.returns().values, dtype=float).reshape(len(close), -1)
+        records = pf.trades.values
+        if self.cash is not None:
+            returns = returns[1:]
+        if not last:
+            is_open = records["status"] == TradeStatus.Open
+            cols = records["col"][is_open]
+            self.size = np.zeros(len(self.size))
+            self.size[cols] = records["size"][is_open]
+            self.entry_price = np.full(len(self.size), np.nan)
+            self.entry_price[cols] = records["entry_price"][is_open]
+            last_close = np.asarray(pf.close, dtype=float).reshape(len(close), -1)[-1]
+            self.cash = np.asarray(pf.final_value(), dtype=float).reshape(-1) - self.size * last_close
+            records = records[~is_open]
+        self.inputs.update(returns, records["col"], records["pnl"])
+
+def run_strategy_chunked(strat_func, data, setups, batch_size, chunk_bars, warmup, desc=None):
+    """
+    Variante de run_strategy_batched pour les historiques longs : l'historique de 'data'
+    (MarketData, clôture et entrées utiles) est parcouru par tranches de 'chunk_bars' barres ;
+    pour chaque tranche, chaque batch de colonnes est simulé avec l'état reporté de la tranche
+    précédente (ChunkedSimulation).
+    Signaux : calculés sur la tranche précédée de 'warmup' barres, exacts pour les indicateurs à
+    fenêtre glissante <= warmup, convergés pour les indicateurs récursifs (EMA, Wilder).
+    Métriques : accumulées tranche par tranche, annualisées sur l'historique complet.
+    Pas de découpage par contexte. Renvoie (setup_metrics, valid) comme run_strategy_batched.
+    """
+    strat_name = strat_func.__name__
+    sim_keys, setup_sim = plan_simulations(setups, signal_param_names(strat_func))
+    n_sims = len(sim_keys)
+    profiling.count("setups", len(setups), strat_name)
+    profiling.count("simulations", n_sims, strat_name)
+    n_bars = len(data)
+    width = len(data.tickers) if data.tickers is not None else 1
+    sims_per_batch = max(batch_size // width, 1)
+    batches = [range(s, min(s + sims_per_batch, n_sims)) for s in range(0, n_sims, sims_per_batch)]
+    years, ppy = metrics.years_between(data.index), metrics.periods_per_year(data.index)
+    sims = []
+    for batch in batches:
+        sl_stop = [np.nan if sim_keys[pos][1][0] is None else sim_keys[pos][1][0] for pos in batch]
+        tp_stop = [np.nan if sim_keys[pos][1][1] is None else sim_keys[pos][1][1] for pos in batch]
+        sims.append(ChunkedSimulation(np.repeat(sl_stop, width), np.repeat(tp_stop, width), years, ppy))
+    sim_valid = np.ones(n_sims, dtype=bool)
+
+    for start in tqdm(range(0, n_bars, chunk_bars), desc=desc, disable=desc is None):
+        stop = min(start + chunk_bars, n_bars)
+        head = max(start - warmup, 0)
+        close, inputs = market_inputs(data.window(head, stop))
+        inputs = strategy_inputs(strat_name, inputs)
+        sim_close = data.window(max(start - 1, 0), stop).close
+        no_signal = np.zeros(close.shape, dtype=bool)[start - head:]
+        signals = {}
+        for batch, sim in zip(batches, sims):
+            entries_cols, exits_cols = [], []
+            for pos in batch:
+                signal = sim_keys[pos][0]
+                if signal not in signals:
+                    # Simulations regroupées par signal : seul le signal courant est gardé
+                    with profiling.stage("signals", strat_name):
+                        signals = {signal: generate_signals(strat_func, close, signal, inputs)}
+                if signals[signal] is None:
+                    sim_valid[pos] = False
+                    entries_cols.append(no_signal)
+                    exits_cols.append(no_signal)
+                    continue
+                entries_cols.append(signals[signal][0][start - head:])
+                exits_cols.append(signals[signal][1][start - head:])
+            with profiling.stage("simulation", strat_name):
+                sim.run(sim_close, np.column_stack(entries_cols), np.column_stack(exits_cols), stop == n_bars)
+
+    sim_metrics = {}
+    with profiling.stage("metrics", strat_name):
+        for batch, sim in zip(batches, sims):
+            for name, values in metrics.compute_metrics(sim.inputs, config.METRICS).items():
+                sim_metrics.setdefault(name, np.full((n_sims, width), np.nan))[batch.start:batch.stop] = \
+                    values.reshape(len(batch), width)
+    setup_metrics = {
+        name: values[setup_sim] if data.tickers is not None else values[setup_sim, 0]
+        for name, values in sim_metrics.items()
+    }
+    return setup_metrics, sim_valid[setup_sim]
+
+def use_chunks(data, labels=None):
+    """Vrai si l'historique doit être traité par tranches (config.CHUNK_BARS, hors mode contexte)."""
+    return bool(config.CHUNK_BARS) and labels is None and len(data) > config.CHUNK_BARS
+
+def _backtest_chunk(data, chunk):
+    """
+    Tâche (worker ou locale) : backteste un paquet de setups d'une stratégie.
+    data : MarketData des clôtures et entrées utiles (voir market_data).
+    Une erreur du paquet est renvoyée (traceback complet, aussi enregistré dans le store) au lieu
+    d'interrompre tout le sweep.
+    Les mesures de profiling.py du paquet sont renvoyées pour être fusionnées par l'appelant.
+    """
+    strat_name, setups, batch_size, desc, labels = chunk
+    strat_func = strategies.STRATEGY_FUNCS[strat_name]
+    error = None
+    with profiling.collect() as prof:
+        try:
+            if use_chunks(data, labels):
+                setup_metrics, valid = run_strategy_chunked(
+                    strat_func, data, setups, batch_size, config.CHUNK_BARS, config.CHUNK_WARMUP, desc=desc
+                )
+            else:
+                close, inputs = market_inputs(data)
+                setup_metrics, valid = run_strategy_batched(
+                    strat_func, close, setups, batch_size, desc=desc, labels=labels, inputs=inputs
+                )
+        except Exception:
+            # Toute erreur : le traceback remonte du worker pour être affiché par l'appelant
+            profiling.count("chunk_errors", strategy=strat_name)
+            setup_metrics, valid, error = {}, np.zeros(len(setups), dtype=bool), traceback.format_exc()
+    return strat_name, setups, setup_metrics, valid, error, prof
+
+def results_frame(strat_name, setups, setup_metrics, valid, tickers=None, contexts=None):
+    """
+    Construit le DataFrame de résultats d'une stratégie (une ligne par setup valide,
+    ou une ligne par setup x ticker si 'tickers' est fourni, x contexte si 'contexts' est fourni).
+    """
+    df = pd.DataFrame([setup for setup, ok in zip(setups, valid) if ok])
+    n_valid = int(valid.sum())
+    width = len(tickers) if tickers is not None else 1
+    n_ctx = len(contexts) if contexts is not None else 1
+    if width * n_ctx > 1:
+        df = df.loc[df.index.repeat(width * n_ctx)].reset_index(drop=True)
+    if contexts is not None:
+        df.insert(0, "context", np.tile(np.asarray(contexts), n_valid * width))
+    if tickers is not None:
+        df.insert(0, "ticker", np.tile(np.repeat(np.asarray(tickers, dtype=object), n_ctx), n_valid))
+    df.insert(0, "strategy", strat_name)
+    for name, values in setup_metrics.items():
+        df[name] = values[valid].ravel()
+    return df
+
+def store_entries(strat_name, keys, df, valid, error, width=1):
+    """
+    Prépare les entrées (key, strategy, status, payload) d'un paquet pour ResultStore.put_many :
+    'ok' avec ses lignes de résultat (width lignes par setup : tickers x contextes), 'invalid'
+    si les signaux n'ont pas pu être générés, 'error' (avec le message) si le paquet a échoué.
+    """
+    if error is not None:
+        return [(key, strat_name, "error", error) for key in keys]
+    records = df.to_dict("records") if df is not None else []
+    entries = []
+    row = 0
+    for key, ok in zip(keys, valid):
+        if ok:
+            entries.append((key, strat_name, "ok", records[row:row + width]))
+            row += width
+        else:
+            entries.append((key, strat_name, "invalid", None))
+    return entries
+
+def param_dtypes(setup_sets):
+    """
+    Colonnes de paramètres communes à plusieurs jeux de setups : {nom: dtype}, dans l'ordre
+    d'apparition, dtype commun à toutes les stratégies qui utilisent le paramètre.
+    """
+    values = {}
+    for setups in setup_sets:
+        if isinstance(setups, ParamSpace):
+            pairs = zip(setups.names, setups.values)
+        else:
+            names = dict.fromkeys(name for setup in setups for name in setup)
+            pairs = ((name, np.asarray([s[name] for s in setups if name in s])) for name in names)
+        for name, array in pairs:
+            values.setdefault(name, []).append(array.dtype)
+    return {name: np.result_type(*dtypes) for name, dtypes in values.items()}
+
+def align_params(df, columns):
+    """
+    Aligne un DataFrame de résultats sur les colonnes de paramètres de tout le run : paramètres
+    d'autres stratégies = NaN, valeurs non entières en flottants partout (schéma stable pour
+    l'export Parquet de result_sink).
+    """
+    lead = [c for c in ("strategy", "ticker", "context") if c in df.columns]
+    rest = [c for c in df.columns if c not in lead and c not in columns]
+    df = df.reindex(columns=lead + list(columns) + rest)
+    for name, dtype in columns.items():
+        if dtype.kind == "f":
+            df[name] = df[name].astype(dtype)
+    return df
+
+def iter_setup_chunks(setups, chunk_size):
+    """Paquets de setups (listes de dicts) d'une liste ou d'un ParamSpace (sans tout matérialiser)."""
+    if isinstance(setups, ParamSpace):
+        return setups.chunks(chunk_size)
+    return parallel.chunked(setups, chunk_size)
+
+def run_backtests_batched(price_data, setups, trend_labels, config, workers=1, sink=None, store=None):
+    """
+    Version vectorisée de run_backtests : signaux générés une fois par combinaison unique
+    de paramètres de signal, simulations par paquets de config.BATCH_SIZE colonnes.
+    setups : {stratégie: setups} ou setups communs (voir setups_by_strategy), chaque jeu en liste
+    de dicts ou en param_space.ParamSpace (paquets générés au fil de l'eau).
+    Les setups sont traités par paquets de config.PARALLEL_CHUNK_SIZE ; avec workers > 1,
+    sur un pool de processus (prix en mémoire partagée, résultats dans l'ordre).
+    Renvoie un DataFrame au même format que run_backtests, ou le sink s'il est fourni :
+    les résultats y sont alors écrits paquet par paquet, sans être accumulés en mémoire.
+    Si price_data est un panel multi-actifs (voir load_universe), tous les tickers sont
+    backtestés dans la même passe et le résultat a une colonne 'ticker'.
+    Avec un store (result_store.ResultStore), chaque setup est identifié par le hash de
+    (données, stratégie, paramètres, ENGINE_VERSION, métriques) : les setups déjà stockés
+    ('ok' ou 'invalid') sont relus, les autres sont calculés par paquets de
+    config.PARALLEL_CHUNK_SIZE et enregistrés à la fin de chaque paquet (point de reprise).
+    Si config.CONTEXT_MODE est activé et trend_labels fourni (un label par barre, voir
+    context.py), chaque setup est simulé une seule fois puis évalué par contexte : une ligne
+    par contexte (colonne 'context' : 1 / 0 / -1), métriques tirées des barres et des trades
+    (selon la barre d'entrée) de ce contexte.
+    """
+    by_strategy = runnable_setups(setups, price_data)
+    data = market_data(price_data, by_strategy)
+    close, inputs = market_inputs(data)
+    tickers = list(close.columns) if isinstance(close, pd.DataFrame) else None
+    columns = param_dtypes(by_strategy.values())
+    labels, contexts = None, None
+    if config.CONTEXT_MODE and trend_labels is not None:
+        if isinstance(trend_labels, pd.Series):
+            trend_labels = trend_labels.reindex(close.index).fillna(0)
+        labels = np.asarray(trend_labels, dtype=np.int8)
+        contexts = list(metrics.CONTEXTS)
+    width = (len(tickers) if tickers is not None else 1) * (len(contexts) if contexts else 1)
+
+    frames = []
+
+    def emit(df):
+        df = align_params(df, columns)
+        if sink is not None:
+            sink.write(df)
+        else:
+            frames.append(df)
+
+    if store is not None:
+        # Empreinte par stratégie : clôture (+ labels) et ses seules entrées, pour que ses résultats
+        # restent valables quelles que soient les autres stratégies du run
+        fingerprint = result_store.data_fingerprint(close)
+        if labels is not None:
+            fingerprint += result_store.data_fingerprint(pd.Series(labels, index=close.index))
+        input_prints = {name: result_store.data_fingerprint(values) for name, values in inputs.items()}
+        fingerprints = {
+            strat_name: fingerprint + "".join(input_prints[name] for name in strategies.required_inputs(strat_name))
+            for strat_name in by_strategy
+        }
+    counts = {"cached": 0, "computed": 0}
+    pending_keys = deque()
+
+    def pending_chunks():
+        """
+        Paquets à calculer, stratégie par stratégie (générés au fil de l'eau : les setups ne sont
+        jamais tous matérialisés). Avec un store, les setups déjà stockés sont relus au passage.
+        """
+        for strat_name, strat_setups in by_strategy.items():
+            for chunk in iter_setup_chunks(strat_setups, config.PARALLEL_CHUNK_SIZE):
+                keys = None
+                if store is not None:
+                    keys = [
+                        result_store.result_key(fingerprints[strat_name], strat_name, setup, ENGINE_VERSION,
+                                                config.METRICS)
+                        for setup in chunk
+                    ]
+                    with profiling.stage("store_read", strat_name):
+                        stored = store.get_many(keys)
+                    done = [stored[key] for key in keys if key in stored and stored[key][0] != "error"]
+                    missing = [i for i, key in enumerate(keys) if key not in stored or stored[key][0] == "error"]
+                    counts["cached"] += len(done)
+                    df = store.frame(done)
+                    if not df.empty:
+                        emit(df)
+                    chunk, keys = [chunk[i] for i in missing], [keys[i] for i in missing]
+                    if not chunk:
+                        continue
+                pending_keys.append(keys)
+                yield strat_name, chunk, config.BATCH_SIZE, None, labels
+
+    n_chunks = sum(-(-len(strat_setups) // config.PARALLEL_CHUNK_SIZE) for strat_setups in by_strategy.values())
+    results = parallel.imap_chunks(_backtest_chunk, pending_chunks(), data, workers=workers)
+    results = tqdm(results, total=n_chunks if store is None else None, desc="chunks")
+    for strat_name, setups_chunk, setup_metrics, valid, error, prof in results:
+        keys = pending_keys.popleft()
+        profiling.merge(prof)
+        if error is not None:
+            print(f"Paquet {strat_name} en erreur ({len(setups_chunk)} setups) :\n{error}")
+        df = results_frame(strat_name, setups_chunk, setup_metrics, valid, tickers, contexts) \
+            if valid.any() else None
+        if store is not None:
+            counts["computed"] += len(setups_chunk)
+            with profiling.stage("store_write", strat_name):
+                store.put_many(store_entries(strat_name, keys, df, valid, error, width))
+        if df is not None:
+            emit(df)
+    if store is not None:
+        print(f"Store : {counts['cached']} résultats relus, {counts['computed']} setups calculés")
+
+    if sink is not None:
+        sink.close()
+        return sink
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,280 @@
+"""
+benchmark.py
+
+Benchmarks des chemins critiques du backtest, sur données OHLCV synthétiques
+(mouvement brownien géométrique, sans réseau) :
+- signals    : génération des signaux, par stratégie de strategies.STRATEGY_FUNCS (cache d'indicateurs vidé)
+- simulation : from_signals vectorisé sur un batch de setups (backtester.simulate_batch)
+- metrics    : extraction des métriques du batch (noyau de metrics.py)
+- engine     : sweep complet d'une stratégie (backtester.run_strategy_batched)
+- walkforward: walkforward.walkforward_validate
+- validation : validator.validate_setups (in-sample / out-of-sample)
+Chaque étape rapporte le meilleur temps sur 'repeat' essais, le débit (setups/seconde)
+et le pic de mémoire (RSS) du processus. Résultats en JSON, comparables à une référence.
+
+Usage :
+    python benchmark.py run --bars 2500 --tickers 1 --out results/benchmark.json
+    python benchmark.py compare results/benchmark.json results/benchmark_baseline.json --threshold 0.15
+    # code de sortie 1 si une étape a perdu plus de 15 % de débit par rapport à la référence
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+import vectorbt as vbt
+import config
+import backtester
+import indicators
+import strategies
+import validator
+import walkforward
+
+# Paramètres de signal testés par stratégie (petites grilles représentatives)
+BENCH_PARAMS = {
+    "moving_average_crossover": {"ma_short": [10, 20, 50], "ma_long": [100, 200]},
+    "rsi_pullback": {"rsi_period": [7, 14, 21], "rsi_val": [30, 35]},
+    "breakout_high": {"window": [10, 20, 50]},
+    "breakout_low": {"window": [10, 20, 50]},
+    "mean_reversion": {"window": [10, 20, 50], "thresh": [0.02, 0.05]},
+    "momentum": {"window": [10, 20, 50], "thresh": [0.0, 0.02]},
+    "macd_cross": {"fast": [8, 12], "slow": [26], "signal": [9]},
+    "bollinger_band_break": {"window": [20, 50], "n_std": [2, 2.5]},
+    "bollinger_mean_revert": {"window": [20, 50], "n_std": [2, 2.5]},
+    "support_resistance_break": {"window": [20, 50]},
+    "range_bound": {"window": [20, 50]},
+    "stochastic_cross": {"k_period": [14], "d_period": [3, 5]},
+    "donchian_breakout": {"window": [20, 55]},
+    "atr_trailing_stop": {"atr_period": [14, 21], "multiplier": [2, 3]},
+    "rsi_overbought_oversold": {"rsi_period": [7, 14]},
+    "ema_crossover": {"ema_fast": [12, 20], "ema_slow": [50, 100]},
+    "parabolic_sar": {"af": [0.02], "max_af": [0.2]},
+    "triple_ma_crossover": {"ma1": [10], "ma2": [50], "ma3": [200]},
+    "vwma_crossover": {"short": [10, 20], "long": [50, 100]},
+    "price_channel_break": {"window": [20, 50]},
+    "supertrend_entry": {"atr_period": [10], "multiplier": [2, 3]},
+    "cci_entry": {"cci_period": [14, 20], "thresh": [100]},
+    "adx_trend": {"adx_period": [14], "thresh": [20, 25]},
+    "turtle_breakout": {"window": [20, 55]},
+    "heikin_ashi_trend": {},
+}
+
+def synthetic_ohlcv(n_bars=2500, n_tickers=1, seed=42, mu=0.08, sigma=0.25, start="2010-01-01"):
+    """
+    Données OHLCV synthétiques (mouvement brownien géométrique, barres journalières de bourse).
+    Renvoie un DataFrame Open/High/Low/Close/Volume (1 ticker) ou un panel à colonnes
+    (champ, ticker) comme backtester.load_universe.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+    log_ret = rng.normal((mu - sigma ** 2 / 2) * dt, sigma * np.sqrt(dt), (n_bars, n_tickers))
+    close = 100 * np.exp(np.cumsum(log_ret, axis=0))
+    open_ = np.vstack([close[:1], close[:-1]])
+    wick = np.abs(rng.normal(0, sigma * np.sqrt(dt) / 2, (2, n_bars, n_tickers)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(13, 0.5, (n_bars, n_tickers))
+    index = pd.bdate_range(start, periods=n_bars)
+    tickers = [f"SYN{i}" for i in range(n_tickers)]
+    fields = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}
+    if n_tickers == 1:
+        return pd.DataFrame({name: values[:, 0] for name, values in fields.items()}, index=index)
+    return pd.concat({name: pd.DataFrame(values, index=index, columns=tickers)
+                      for name, values in fields.items()}, axis=1)
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (Mo), None si indisponible (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko, macOS : octets
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def param_sets(grid):
+    """Produit cartésien d'une grille {nom: valeurs} en liste de dicts."""
+    sets = [{}]
+    for name, values in grid.items():
+        sets = [{**s, name: v} for s in sets for v in values]
+    return sets
+
+def bench_setups(n_setups):
+    """Setups de croisement de MA (signal x SL/TP), n_setups au plus."""
+    setups = [
+        {"ma_short": s, "ma_long": l, "sl_pct": sl, "tp_pct": tp}
+        for s in config.MA_SHORT_RANGE for l in config.MA_LONG_RANGE if s < l
+        for sl in config.SL_PCT for tp in config.TP_PCT
+    ]
+    return setups[:n_setups]
+
+def timed(func, repeat):
+    """Meilleur temps (secondes) sur 'repeat' appels, et résultat du dernier appel."""
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def record(results, stage, seconds, n_setups):
+    results[stage] = {
+        "seconds": seconds,
+        "setups": n_setups,
+        "setups_per_sec": n_setups / seconds if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(f"{stage:<40} {seconds:9.4f} s  {results[stage]['setups_per_sec'] or 0:12.1f} setups/s")
+
+def run_benchmarks(n_bars=2500, n_tickers=1, n_setups=500, repeat=3, seed=42):
+    """Lance toutes les étapes. Renvoie le dict JSON des résultats."""
+    data = synthetic_ohlcv(n_bars, n_tickers, seed)
+    close = data["Close"]
+    _, inputs = backtester.market_inputs(data)
+    single = close if n_tickers == 1 else close.iloc[:, 0]
+    results = {}
+
+    # Génération des signaux, par stratégie (cache d'indicateurs vidé à chaque essai)
+    for strat_name, func in strategies.STRATEGY_FUNCS.items():
+        sets = param_sets(BENCH_PARAMS.get(strat_name, {}))
+        extra = {name: inputs[name] for name in strategies.required_inputs(strat_name)}
+
+        def generate(sets=sets, func=func, extra=extra):
+            indicators.CACHE.clear()
+            for params in sets:
+                func(close, **params, **extra)
+        seconds, _ = timed(generate, repeat)
+        record(results, f"signals/{strat_name}", seconds, len(sets))
+
+    # Simulation et métriques d'un batch de setups
+    setups = bench_setups(n_setups)
+    signal_names = backtester.signal_param_names(strategies.moving_average_crossover)
+    entries, exits, sl_stop, tp_stop = [], [], [], []
+    for setup in setups:
+        signal, (sl, tp) = backtester.split_setup(setup, signal_names)
+        e, x = backtester.generate_signals(strategies.moving_average_crossover, close, signal)
+        entries.append(e)
+        exits.append(x)
+        sl_stop.append(sl)
+        tp_stop.append(tp)
+    entries, exits = np.column_stack(entries), np.column_stack(exits)
+    width = n_tickers
+    seconds, pf = timed(lambda: backtester.simulate_batch(
+        close, entries, exits, np.repeat(sl_stop, width), np.repeat(tp_stop, width)), repeat)
+    record(results, "simulation", seconds, len(setups))
+    seconds, _ = timed(lambda: backtester.extract_metrics(pf), repeat)
+    record(results, "metrics", seconds, len(setups))
+
+    # Sweep complet d'une stratégie (signaux dédupliqués + simulation + métriques)
+    def engine():
+        indicators.CACHE.clear()
+        return backtester.run_strategy_batched(strategies.moving_average_crossover, close, setups,
+                                               config.BATCH_SIZE)
+    seconds, _ = timed(engine, repeat)
+    record(results, "engine", seconds, len(setups))
+
+    # Walk-forward (un actif)
+    wf_setups = setups[:min(len(setups), 100)]
+    window_size, test_size = max(n_bars // 5, 50), max(n_bars // 20, 20)
+    seconds, _ = timed(lambda: walkforward.walkforward_validate(
+        single, {"moving_average_crossover": strategies.moving_average_crossover},
+        {"moving_average_crossover": wf_setups}, window_size, test_size, min_trades=1), repeat)
+    record(results, "walkforward", seconds, len(wf_setups))
+
+    # Validation in-sample / out-of-sample (un actif)
+    val_setups = pd.DataFrame(setups[:min(len(setups), 50)])
+    val_setups.insert(0, "strategy", "moving_average_crossover")
+    seconds, _ = timed(lambda: validator.validate_setups(val_setups, single, min_trades=0), repeat)
+    record(results, "validation", seconds, len(val_setups))
+
+    return {
+        "meta": {
+            "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "bars": n_bars,
+            "tickers": n_tickers,
+            "setups": n_setups,
+            "repeat": repeat,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "vectorbt": vbt.__version__,
+        },
+        "results": results,
+    }
+
+def compare(current, baseline, threshold=0.15):
+    """
+    Compare deux résultats JSON étape par étape (débit en setups/s).
+    Renvoie (DataFrame de comparaison, liste des étapes en régression) : une étape régresse
+    si son débit est inférieur de plus de 'threshold' (fraction) à celui de la référence.
+    """
+    rows = []
+    for stage, base in baseline["results"].items():
+        cur = current["results"].get(stage)
+        if cur is None or not base["setups_per_sec"] or not cur["setups_per_sec"]:
+            continue
+        ratio = cur["setups_per_sec"] / base["setups_per_sec"]
+        rows.append({
+            "stage": stage,
+            "baseline_setups_per_sec": base["setups_per_sec"],
+            "current_setups_per_sec": cur["setups_per_sec"],
+            "ratio": ratio,
+            "baseline_rss_mb": base.get("peak_rss_mb"),
+            "current_rss_mb": cur.get("peak_rss_mb"),
+            "regression": ratio < 1 - threshold,
+        })
+    df = pd.DataFrame(rows)
+    regressions = list(df.loc[df["regression"], "stage"]) if not df.empty else []
+    return df, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques du backtest")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="lance les benchmarks et écrit le JSON")
+    run.add_argument("--bars", type=int, default=2500)
+    run.add_argument("--tickers", type=int, default=1)
+    run.add_argument("--setups", type=int, default=500)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--out", default=f"{config.RESULTS_DIR}/benchmark.json")
+    cmp_ = sub.add_parser("compare", help="compare un résultat à une référence")
+    cmp_.add_argument("current")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("--threshold", type=float, default=0.15,
+                      help="perte de débit tolérée (fraction), au-delà = régression")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(args.bars, args.tickers, args.setups, args.repeat, args.seed)
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats écrits dans {args.out}")
+        return 0
+
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    sizes = ("bars", "tickers", "setups")
+    diffs = [f"{k}={current['meta'].get(k)}/{baseline['meta'].get(k)}" for k in sizes
+             if current["meta"].get(k) != baseline["meta"].get(k)]
+    if diffs:
+        print(f"Attention : tailles différentes de la référence (actuel/référence : {', '.join(diffs)})")
+    df, regressions = compare(current, baseline, args.threshold)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) (> {args.threshold:.0%}) : {regressions}")
+        return 1
+    print("\nAucune régression.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,18 @@
 TICKER = "RXL.PA"             # Ticker Yahoo Finance ou autre source
 START_DATE = "2016-01-01"     # Date de début du backtest
 END_DATE = "2025-07-20"       # Date de fin du backtest
-TIMEFRAME = "1d"              # '1d' = daily, '1h' = hourly, etc.
+TIMEFRAME = "1d"              # '1d' = daily, '1h' = hourly, '5m', '1m'... (fréquence vectorbt, voir metrics.timeframe_freq)
+
+# === SOURCE DE DONNÉES (voir data_sources.py) ===
+DATA_SOURCE = "yahoo"         # "yahoo" = Yahoo Finance, "local" = fichiers de DATA_DIR (sans réseau)
+DATA_DIR = "data"             # Fichiers locaux : {ticker}.csv / .parquet / .feather
+DATA_CACHE_DIR = "cache"      # Cache disque des téléchargements Yahoo (None = pas de cache)
+DATA_CACHE_FORMAT = "parquet" # "parquet", "feather" (pyarrow requis, sinon repli en csv) ou "csv"
+
+# === MODE UNIVERS (multi-actifs) ===
+# Si TICKERS ou TICKERS_FILE est renseigné, main.py backteste tous les actifs en une seule passe
+TICKERS = []                  # Ex : ["AIR.PA", "MC.PA", "OR.PA"]
+TICKERS_FILE = None           # Ex : "universe.txt" (un ticker par ligne)
 
 # === PARAMÈTRES STRATÉGIES ===
 # Plages élargies pour grid search ou pour générer >10 000 setups
@@ -14,10 +25,94 @@ RSI_RANGE      = list(range(20, 51, 5))     # 20, 25, ..., 50 (7 valeurs)
 SL_PCT         = [0.01, 0.015, 0.02, 0.025, 0.03]    # 5 valeurs
 TP_PCT         = [0.02, 0.03, 0.04, 0.05]            # 4 valeurs
 
-# (Pour les stratégies spéciales type triple MA ou VWMA, ajouter des plages dédiées ici au besoin)
+# Plages de paramètres de signal par stratégie (voir strategies.strategy_space) : SL_PCT / TP_PCT
+# s'ajoutent à chacune. Stratégie absente = paramètres par défaut de sa fonction.
+STRATEGY_PARAMS = {
+    "moving_average_crossover": {"ma_short": MA_SHORT_RANGE, "ma_long": MA_LONG_RANGE},
+    "rsi_pullback": {"rsi_period": [7, 14, 21], "rsi_val": RSI_RANGE},
+    "breakout_high": {"window": [10, 20, 50, 100]},
+    "breakout_low": {"window": [10, 20, 50, 100]},
+    "mean_reversion": {"window": [10, 20, 50], "thresh": [0.02, 0.03, 0.05]},
+    "momentum": {"window": [10, 20, 50, 100], "thresh": [0.0, 0.02, 0.05]},
+    "macd_cross": {"fast": [8, 12], "slow": [21, 26], "signal": [9]},
+    "bollinger_band_break": {"window": [20, 50], "n_std": [1.5, 2, 2.5]},
+    "bollinger_mean_revert": {"window": [20, 50], "n_std": [1.5, 2, 2.5]},
+    "support_resistance_break": {"window": [20, 50, 100]},
+    "range_bound": {"window": [20, 50, 100]},
+    "stochastic_cross": {"k_period": [9, 14], "d_period": [3, 5]},
+    "donchian_breakout": {"window": [20, 55, 100]},
+    "atr_trailing_stop": {"atr_period": [14, 21], "multiplier": [2, 2.5, 3]},
+    "rsi_overbought_oversold": {"rsi_period": [7, 14, 21]},
+    "ema_crossover": {"ema_fast": [12, 20, 50], "ema_slow": [50, 100, 200]},
+    "parabolic_sar": {"af": [0.01, 0.02], "max_af": [0.2]},
+    "triple_ma_crossover": {"ma1": [10, 20], "ma2": [50], "ma3": [100, 200]},
+    "vwma_crossover": {"short": [10, 20], "long": [50, 100]},
+    "price_channel_break": {"window": [20, 50, 100]},
+    "supertrend_entry": {"atr_period": [10, 14], "multiplier": [2, 3]},
+    "cci_entry": {"cci_period": [14, 20], "thresh": [100, 150]},
+    "adx_trend": {"adx_period": [14], "thresh": [20, 25, 30]},
+    "turtle_breakout": {"window": [20, 55]},
+    "heikin_ashi_trend": {},
+}
+
+# === RECHERCHE D'HYPERPARAMÈTRES (voir search.py) ===
+SEARCH_MODE = "grid"        # "grid" = produit cartésien complet, "random", "halving" ou "tpe"
+SEARCH_BUDGET = 2000        # Nb max d'évaluations par stratégie (en équivalent historique complet)
+SEARCH_BATCH = 100          # Setups évalués ensemble par round ("random" / "tpe")
+SEARCH_PATIENCE = 5         # Rounds sans amélioration avant arrêt anticipé
+SEARCH_OBJECTIVE = "sharpe" # Métrique optimisée (nom de metrics.METRIC_FUNCS)
+SEARCH_ETA = 3              # "halving" : facteur de sélection / d'allongement de l'historique
+SEARCH_MIN_FRACTION = 0.25  # "halving" : fraction d'historique du premier rung
+SEARCH_SEED = 42
 
 # === AUTRES OPTIONS ===
 MIN_TRADES_PER_SETUP = 10
 RESULTS_DIR = "results"                # Dossier où sont stockés les résultats CSV
+RESULTS_PARQUET = None                 # Ex : "results/all_results.parquet" = tous les résultats écrits en flux
+                                       # (mémoire bornée, seuls les top-K restent en RAM, voir result_sink.py)
+RESULTS_STORE = None                   # Ex : "results/results_store.sqlite" = store SQLite des résultats
+                                       # (relance = seuls les setups nouveaux sont calculés, voir result_store.py)
+
+# === MOTEUR DE BACKTEST ===
+BATCHED = True          # True = moteur vectorisé (une colonne par setup, un from_signals par batch)
+BATCH_SIZE = 500        # Nombre de setups simulés ensemble (borne la mémoire des matrices 2-D)
+METRICS = ["trades", "cagr", "sharpe", "max_dd", "pf"]   # Métriques calculées par setup (voir metrics.py)
+                                                        # trades/cagr/max_dd/pf sont requis pour le classement
+INDICATOR_CACHE_SIZE = 512   # Nb max d'indicateurs gardés en cache (éviction LRU), voir indicators.py
+WORKERS = 1             # Nb de processus (1 = séquentiel). Ex : os.cpu_count() sur une machine dédiée
+PARALLEL_CHUNK_SIZE = 2000   # Nb de setups par paquet (tâche d'un worker, point de reprise du store)
+PROFILE = True          # Temps et compteurs par étape / stratégie (voir profiling.py), coût négligeable
+PROFILE_TRACE = None    # Ex : "results/trace.json" = trace Chrome (chrome://tracing, Perfetto)
+CONTEXT_MODE = False    # True = chaque setup évalué par contexte de tendance (1 / 0 / -1, voir context.py)
+                        # à partir d'une seule simulation : une ligne par setup x contexte
+
+# === LONGS HISTORIQUES (intraday, voir backtester.run_strategy_chunked) ===
+CHUNK_BARS = None       # Ex : 50_000 = historique traité par tranches de barres, état reporté d'une tranche
+                        # à l'autre (mémoire ~ BATCH_SIZE x CHUNK_BARS) ; None = tout l'historique d'un bloc
+CHUNK_WARMUP = 2000     # Barres de préchauffage des indicateurs avant chaque tranche (>= plus longue fenêtre)
+MEMMAP_DIR = None       # Ex : "cache/memmap" = mode univers sur données mappées en mémoire, écrites ticker
+                        # par ticker (voir market_data.write_store), sans charger tout le panel en RAM
+
+# === ROBUSTESSE DES MEILLEURS SETUPS (voir robustness.py) ===
+ROBUSTNESS_RESAMPLES = 1000   # Rééchantillons (bootstrap, ordres de trades) par setup exporté ; 0 = désactivé
+ROBUSTNESS_BLOCK = 20         # Taille des blocs de barres du bootstrap (garde l'autocorrélation)
+ROBUSTNESS_CONFIDENCE = 0.90  # Bandes de confiance exportées (quantiles 5 % / 95 %)
+ROBUSTNESS_SEED = 42
+
+# === STABILITÉ DES PARAMÈTRES (voir plateau.py) ===
+PLATEAU_RADIUS = 1        # Voisinage : cellules à 1 cran près sur chaque axe de la grille ; 0 = classement sur la valeur brute
+PLATEAU_METRIC = "pf"     # Métrique lissée sur le voisinage
+PLATEAU_STAT = "mean"     # "mean" = moyenne du voisinage, "min" = pire voisin (plus conservateur)
+
+# === RÉGIMES DE MARCHÉ (voir regimes.py) ===
+REGIME_SCHEME = "ma_slope"    # "ma_slope", "vol_percentile" ou "adx"
+REGIME_PARAMS = {}            # Paramètres du schéma, ex : {"ma_period": 150} (défauts : regimes.SCHEMES)
+REGIME_TIMEFRAME = None       # None = timeframe des données, ou ex : "W" (labels hebdo, sans look-ahead)
+REGIME_CACHE_SIZE = 256       # Nb max de jeux de labels gardés en cache (éviction LRU)
+
+# === WALK-FORWARD (voir walkforward.py) ===
+WF_OBJECTIVE = "sharpe" # Métrique optimisée sur chaque train (nom de metrics.METRIC_FUNCS)
+WF_TOP_K = 5            # Nb de setups retenus par fenêtre et évalués sur le test
+WF_ANCHORED = False     # True = train ancré au début de l'historique, False = fenêtre glissante
 
 # Tu pourras rajouter ici : liste d'actifs, sélection dynamique, etc.
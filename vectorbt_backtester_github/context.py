@@ -1,28 +1,27 @@
 # context.py
 
-import pandas as pd
+import regimes
 
-def detect_trend(price, ma_period=200):
+def detect_trend(price, ma_period=200, slope_lookback=10, timeframe=None):
     """
     Retourne une série 'trend' avec les labels :
         1 = uptrend (haussier)
         -1 = downtrend (baissier)
         0 = range (neutre)
-    Basé sur la position du prix vs MA200 et la pente de la MA200.
+    Basé sur la position du prix vs MA200 et la pente de la MA200 (sur slope_lookback périodes).
+    Calcul et cache : schéma "ma_slope" de regimes.py (timeframe optionnel) ; Series int64 sans
+    nom, comme avant regimes.py.
     """
-    ma = price.rolling(ma_period).mean()
-    # On regarde la pente sur 10 périodes (tu peux adapter)
-    ma_slope = ma.diff(10)
+    labels = regimes.regime_labels(price, "ma_slope", timeframe=timeframe,
+                                   ma_period=ma_period, slope_lookback=slope_lookback)
+    return labels.astype("int64").rename(None)
 
-    uptrend = (price > ma) & (ma_slope > 0)
-    downtrend = (price < ma) & (ma_slope < 0)
-    neutral = ~(uptrend | downtrend)
-
-    trend = pd.Series(0, index=price.index)
-    trend[uptrend] = 1
-    trend[downtrend] = -1
-    # neutral est déjà 0
-
-    return trend  # Série Pandas alignée sur le price, 1 / 0 / -1
+def detect_regime(price_data, config):
+    """
+    Labels de régime selon config.REGIME_SCHEME / REGIME_PARAMS / REGIME_TIMEFRAME (voir regimes.py).
+    price_data : DataFrame OHLC (High/Low utilisés par le schéma "adx") ou Series de clôtures.
+    """
+    return regimes.regime_labels(price_data, config.REGIME_SCHEME, timeframe=config.REGIME_TIMEFRAME,
+                                 **config.REGIME_PARAMS)
 
-# Tu pourras étendre pour du multi-timeframe ou d’autres logiques plus tard.
+# Autres schémas (volatilité, ADX), multi-timeframe et balayage de paramètres : voir regimes.py.
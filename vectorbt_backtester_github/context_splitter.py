@@ -1,5 +1,3 @@
-
-
 """
 context_splitter.py
 
@@ -7,37 +5,44 @@ Module pour taguer chaque période de l'historique avec un contexte de marché (
 Permet ensuite de backtester ou valider par contexte.
 
 Usage :
-    from context_splitter import split_by_context
+    from context_splitter import split_by_context, context_labels
 
     price_data = ... # DataFrame OHLC
-    context_labels = split_by_context(price_data)
-    # Ajoute une colonne 'context' à price_data : 1 = uptrend, -1 = downtrend, 0 = range
+    df = split_by_context(price_data)
+    # Copie de price_data avec une colonne 'context' : 1 = uptrend, -1 = downtrend, 0 = range
+
+    labels = context_labels(price_data)   # série 'context' seule, sans copier les prix
 
-A personnaliser selon tes critères de trend.
+A personnaliser selon tes critères de trend (voir les schémas de regimes.py).
 
 """
 
-import pandas as pd
+import regimes
+
+def context_labels(price_data, ma_len=200, trend_lookback=10, scheme="ma_slope", timeframe=None,
+                   **params):
+    """
+    Renvoie la série 'context' (int8) alignée sur price_data, sans copier les prix :
+    - 1 : uptrend (MA200 haussière + prix au-dessus)
+    - -1 : downtrend (MA200 baissière + prix en dessous)
+    - 0 : range/neutre
+    Avec scheme="vol_percentile" ou "adx", ma_len / trend_lookback sont ignorés et 'params'
+    est passé au schéma (voir regimes.SCHEMES).
+    """
+    if scheme == "ma_slope":
+        params = {"ma_period": ma_len, "slope_lookback": trend_lookback, **params}
+    return regimes.regime_labels(price_data, scheme, timeframe=timeframe, **params)
 
-def split_by_context(price_data, ma_len=200, trend_lookback=10):
+def split_by_context(price_data, ma_len=200, trend_lookback=10, scheme="ma_slope", timeframe=None,
+                     **params):
     """
-    Ajoute une colonne 'context' à price_data :
+    Ajoute une colonne 'context' à une copie de price_data (labels de context_labels) :
     - 1 : uptrend (MA200 haussière + prix au-dessus)
     - -1 : downtrend (MA200 baissière + prix en dessous)
     - 0 : range/neutre
     """
     df = price_data.copy()
-    ma = df['Close'].rolling(ma_len).mean()
-    ma_slope = ma.diff(trend_lookback)
-    # Contexte uptrend
-    uptrend = (df['Close'] > ma) & (ma_slope > 0)
-    # Contexte downtrend
-    downtrend = (df['Close'] < ma) & (ma_slope < 0)
-    # Range sinon
-    context = pd.Series(0, index=df.index)
-    context[uptrend] = 1
-    context[downtrend] = -1
-    df['context'] = context
+    df["context"] = context_labels(price_data, ma_len, trend_lookback, scheme, timeframe, **params).astype("int64")
     return df
 
 if __name__ == "__main__":
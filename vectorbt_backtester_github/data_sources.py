@@ -0,0 +1,277 @@
+"""
+data_sources.py
+
+Sources de données prix interchangeables pour backtester.load_data / load_universe :
+- YahooSource : téléchargement Yahoo Finance (yfinance)
+- LocalFileSource : fichiers locaux CSV / Parquet / Feather ({ticker}.csv, ...), sans réseau
+  (tests, machines sans accès Internet)
+- CachedSource : cache disque colonnaire devant n'importe quelle source, clé ticker/timeframe ;
+  la plage de dates couverte est stockée à côté. Si seule la fin de la plage manque,
+  seule cette fin est téléchargée puis ajoutée au cache.
+
+Usage :
+    import data_sources
+
+    source = data_sources.get_source(config)    # selon config.DATA_SOURCE / DATA_CACHE_DIR
+    df = source.fetch("RXL.PA", "2016-01-01", "2025-07-20", "1d")
+
+Toutes les sources renvoient le même format : DataFrame Open/High/Low/Close/Volume,
+DatetimeIndex trié, dates de fin exclues (comme Yahoo).
+"""
+
+import importlib.util
+import json
+import os
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+import metrics
+
+NEEDED_COLS = ["Open", "High", "Low", "Close", "Volume"]
+
+def normalize_ohlcv(data):
+    """
+    Met un DataFrame OHLCV au format commun : colonnes à plat, Open/High/Low/Close/Volume
+    présentes, NaN supprimés, DatetimeIndex trié sans doublons.
+    """
+    data = data.copy()
+    # Patch multi-index : aplatis si besoin
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    # Patch : transforme les colonnes tuple en string
+    data.columns = [''.join(col) if isinstance(col, tuple) else col for col in data.columns]
+    if data.empty:
+        return pd.DataFrame(columns=NEEDED_COLS, index=pd.DatetimeIndex([]), dtype=float)
+    # Vérifie que tout est bien là
+    for col in NEEDED_COLS:
+        if col not in data.columns:
+            raise ValueError(f"Colonne {col} manquante dans les données téléchargées")
+    data = data[NEEDED_COLS].dropna()
+    # Index en DatetimeIndex
+    if not isinstance(data.index, pd.DatetimeIndex):
+        data.index = pd.to_datetime(data.index)
+    data = data[~data.index.duplicated(keep="last")].sort_index()
+    return data
+
+def _bound(ts, index):
+    """Convertit une date en Timestamp compatible avec le fuseau de l'index."""
+    ts = pd.Timestamp(ts)
+    if index.tz is not None and ts.tz is None:
+        return ts.tz_localize(index.tz)
+    if index.tz is None and ts.tz is not None:
+        return ts.tz_convert(None)
+    return ts
+
+def slice_dates(data, start, end):
+    """Renvoie les lignes de data dans [start, end[."""
+    if data.empty:
+        return data
+    mask = (data.index >= _bound(start, data.index)) & (data.index < _bound(end, data.index))
+    return data[mask]
+
+class DataSource:
+    """Interface commune des sources de données."""
+
+    def fetch(self, ticker, start, end, timeframe="1d"):
+        """Renvoie le DataFrame OHLCV normalisé de 'ticker' sur [start, end[."""
+        raise NotImplementedError
+
+    def fetch_many(self, tickers, start, end, timeframe="1d"):
+        """Renvoie {ticker: DataFrame OHLCV}. Par défaut : un fetch par ticker."""
+        return {ticker: self.fetch(ticker, start, end, timeframe) for ticker in tickers}
+
+class YahooSource(DataSource):
+    """Téléchargement Yahoo Finance (réseau requis)."""
+
+    def fetch(self, ticker, start, end, timeframe="1d"):
+        import yfinance as yf
+        data = yf.download(ticker, start=start, end=end, interval=timeframe)
+        return normalize_ohlcv(data)
+
+    def fetch_many(self, tickers, start, end, timeframe="1d"):
+        """Un seul appel yf.download pour tous les tickers."""
+        import yfinance as yf
+        data = yf.download(list(tickers), start=start, end=end, interval=timeframe, group_by="ticker")
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: normalize_ohlcv(data)}
+        return {
+            ticker: normalize_ohlcv(data[ticker]) if ticker in data.columns.get_level_values(0)
+            else normalize_ohlcv(pd.DataFrame())
+            for ticker in tickers
+        }
+
+class LocalFileSource(DataSource):
+    """
+    Fichiers locaux, un par ticker : {directory}/{ticker}.csv, .parquet ou .feather
+    (ou {ticker}_{timeframe}.ext, prioritaire s'il existe). Aucun accès réseau.
+    """
+
+    EXTENSIONS = (".parquet", ".feather", ".csv")
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, ticker, timeframe):
+        """Renvoie le chemin du fichier du ticker, ou lève FileNotFoundError."""
+        for name in (f"{ticker}_{timeframe}", ticker):
+            for ext in self.EXTENSIONS:
+                path = os.path.join(self.directory, name + ext)
+                if os.path.exists(path):
+                    return path
+        raise FileNotFoundError(f"Aucun fichier local pour {ticker} ({timeframe}) dans {self.directory}")
+
+    def fetch(self, ticker, start, end, timeframe="1d"):
+        data = read_frame(self.path_for(ticker, timeframe))
+        return slice_dates(normalize_ohlcv(data), start, end)
+
+# Moteurs pandas possibles par format de fichier (csv : aucun module requis)
+FORMAT_ENGINES = {"parquet": ("pyarrow", "fastparquet"), "feather": ("pyarrow",)}
+
+def has_engine(fmt):
+    """True si un moteur de lecture / écriture du format 'fmt' est installé."""
+    engines = FORMAT_ENGINES.get(fmt)
+    return engines is None or any(importlib.util.find_spec(name) is not None for name in engines)
+
+def read_frame(path):
+    """Lit un DataFrame indexé par date depuis un fichier CSV / Parquet / Feather."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".feather"):
+        return pd.read_feather(path).set_index("Date")
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+def write_frame(data, path):
+    """Écrit un DataFrame indexé par date en CSV / Parquet / Feather (selon l'extension)."""
+    if path.endswith(".parquet"):
+        data.to_parquet(path)
+    elif path.endswith(".feather"):
+        data.rename_axis("Date").reset_index().to_feather(path)
+    else:
+        data.to_csv(path)
+
+class CachedSource(DataSource):
+    """
+    Cache disque devant une autre source.
+    Un fichier par (ticker, timeframe) + un fichier .json avec la plage [start, end[ déjà couverte.
+    - plage demandée couverte : lecture locale uniquement
+    - seule la fin manque : téléchargement incrémental de la fin, ajoutée au cache
+    - sinon : téléchargement de l'union des plages, qui remplace le cache
+    """
+
+    def __init__(self, source, cache_dir, fmt="parquet"):
+        self.source = source
+        self.cache_dir = cache_dir
+        if not has_engine(fmt):
+            # Vérifié avant tout téléchargement : sinon l'écriture du cache échouerait après coup
+            print(f"Cache {fmt} indisponible (pyarrow non installé) : cache écrit en csv")
+            fmt = "csv"
+        self.fmt = fmt
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, ticker, timeframe):
+        key = "".join(c if c.isalnum() or c in "-_." else "_" for c in f"{ticker}_{timeframe}")
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.{self.fmt}", f"{base}.json"
+
+    def _read(self, ticker, timeframe):
+        """Renvoie (data, start, end) du cache, ou (None, None, None) si absent."""
+        data_path, meta_path = self._paths(ticker, timeframe)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None, None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return read_frame(data_path), pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"])
+
+    def _write(self, ticker, timeframe, data, start, end):
+        data_path, meta_path = self._paths(ticker, timeframe)
+        write_frame(data, data_path)
+        with open(meta_path, "w") as f:
+            json.dump({"start": str(start), "end": str(end)}, f)
+
+    def _plan(self, ticker, start, end, timeframe):
+        """
+        Décide quoi télécharger. Renvoie (cached, cached_start, cached_end, fetch_range)
+        avec fetch_range = None (cache suffisant), ("tail", a, b) ou ("full", a, b).
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        cached, c_start, c_end = self._read(ticker, timeframe)
+        if cached is None:
+            return None, None, None, ("full", start, end)
+        if c_start <= start and c_end >= end:
+            return cached, c_start, c_end, None
+        if c_start <= start and c_end >= start:
+            return cached, c_start, c_end, ("tail", c_end, end)
+        return cached, c_start, c_end, ("full", min(start, c_start), max(end, c_end))
+
+    @staticmethod
+    def _covered_end(fetched, b, timeframe):
+        """
+        Fin de la plage réellement couverte par un téléchargement demandé jusqu'à b : au plus
+        une barre après la dernière barre reçue, et pas au-delà de maintenant (les barres publiées
+        plus tard seront téléchargées au prochain appel).
+        """
+        bar = to_offset(metrics.timeframe_freq(timeframe))
+        ref = pd.DatetimeIndex([b])
+        last = _bound(fetched.index[-1], ref) + bar
+        return min(b, last, _bound(pd.Timestamp.now(tz=last.tz), ref))
+
+    def _merge(self, ticker, timeframe, cached, c_start, c_end, kind, a, b, fetched):
+        """
+        Met à jour le cache avec les données téléchargées et renvoie l'ensemble.
+        Un téléchargement vide (échec, plage future) n'est pas enregistré : le cache reste
+        tel quel et la plage sera redemandée au prochain appel.
+        """
+        fetched = normalize_ohlcv(fetched)
+        if fetched.empty:
+            return normalize_ohlcv(cached) if cached is not None else fetched
+        end = self._covered_end(fetched, b, timeframe)
+        if kind == "tail":
+            data = normalize_ohlcv(pd.concat([cached, fetched]))
+            self._write(ticker, timeframe, data, c_start, max(end, c_end))
+        else:
+            data = fetched
+            self._write(ticker, timeframe, data, a, end)
+        return data
+
+    def fetch(self, ticker, start, end, timeframe="1d"):
+        cached, c_start, c_end, plan = self._plan(ticker, start, end, timeframe)
+        if plan is None:
+            return slice_dates(normalize_ohlcv(cached), start, end)
+        kind, a, b = plan
+        fetched = self.source.fetch(ticker, a, b, timeframe)
+        data = self._merge(ticker, timeframe, cached, c_start, c_end, kind, a, b, fetched)
+        return slice_dates(data, start, end)
+
+    def fetch_many(self, tickers, start, end, timeframe="1d"):
+        """
+        Les tickers absents du cache sont téléchargés ensemble (un seul fetch_many de la source) ;
+        les fins manquantes sont téléchargées ticker par ticker.
+        """
+        plans = {ticker: self._plan(ticker, start, end, timeframe) for ticker in tickers}
+        missing = [t for t, p in plans.items() if p[0] is None]
+        downloaded = self.source.fetch_many(missing, start, end, timeframe) if missing else {}
+
+        out = {}
+        for ticker, (cached, c_start, c_end, plan) in plans.items():
+            if plan is None:
+                out[ticker] = slice_dates(normalize_ohlcv(cached), start, end)
+                continue
+            kind, a, b = plan
+            fetched = downloaded[ticker] if ticker in downloaded else self.source.fetch(ticker, a, b, timeframe)
+            data = self._merge(ticker, timeframe, cached, c_start, c_end, kind, a, b, fetched)
+            out[ticker] = slice_dates(data, start, end)
+        return out
+
+def get_source(config):
+    """
+    Construit la source configurée :
+    - config.DATA_SOURCE = "yahoo" ou "local" (fichiers de config.DATA_DIR)
+    - config.DATA_CACHE_DIR : dossier du cache disque (None = pas de cache)
+    """
+    if config.DATA_SOURCE == "local":
+        return LocalFileSource(config.DATA_DIR)
+    if config.DATA_SOURCE != "yahoo":
+        raise ValueError(f"Source de données inconnue : {config.DATA_SOURCE}")
+    source = YahooSource()
+    if config.DATA_CACHE_DIR:
+        source = CachedSource(source, config.DATA_CACHE_DIR, fmt=config.DATA_CACHE_FORMAT)
+    return source
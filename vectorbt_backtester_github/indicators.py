@@ -0,0 +1,177 @@
+"""
+indicators.py
+
+Cache des indicateurs utilisés par les stratégies (moyennes mobiles, max/min glissants, écart-type, EMA...).
+Une même fenêtre (ex : MA 200) est demandée des milliers de fois pendant un grid search :
+avec ce cache, elle n'est calculée qu'une fois par dataset.
+
+Clé du cache : (identité de la série de prix, nom de l'indicateur, paramètres).
+Mémoire bornée : éviction LRU au-delà de config.INDICATOR_CACHE_SIZE entrées.
+
+Usage :
+    import indicators
+
+    ma = indicators.sma(price, 200)
+    print(indicators.CACHE.stats())   # {'hits': ..., 'misses': ..., 'size': ...}
+"""
+
+from collections import OrderedDict
+import pandas as pd
+import config
+import indicators_nb
+
+class IndicatorCache:
+    """
+    Cache LRU d'indicateurs, avec compteurs hits/misses.
+    Chaque entrée garde une référence vers ses séries sources : tant que l'entrée existe,
+    l'id() de la série ne peut pas être réutilisé par un autre objet.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+
+    def get(self, sources, name, params, compute):
+        """
+        Renvoie l'indicateur 'name' calculé sur 'sources' (une série ou un tuple de séries).
+        Si absent du cache, appelle compute() et stocke le résultat.
+        """
+        if not isinstance(sources, tuple):
+            sources = (sources,)
+        key = (tuple(id(s) for s in sources), name, params)
+        entry = self._store.get(key)
+        if entry is not None and all(a is b for a, b in zip(entry[0], sources)):
+            self._store.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = compute()
+        self._store[key] = (sources, value)
+        self._store.move_to_end(key)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro."""
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Renvoie les compteurs du cache."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._store)}
+
+CACHE = IndicatorCache(maxsize=config.INDICATOR_CACHE_SIZE)
+
+def cached(sources, name, params, compute):
+    """Raccourci vers CACHE.get (pour les indicateurs sans helper dédié)."""
+    return CACHE.get(sources, name, params, compute)
+
+def sma(price, window):
+    """Moyenne mobile simple sur 'window' périodes."""
+    return CACHE.get(price, "sma", (window,), lambda: price.rolling(window).mean())
+
+def rolling_std(price, window):
+    """Écart-type glissant sur 'window' périodes."""
+    return CACHE.get(price, "std", (window,), lambda: price.rolling(window).std())
+
+def rolling_max(price, window):
+    """Plus haut glissant sur 'window' périodes."""
+    return CACHE.get(price, "max", (window,), lambda: price.rolling(window).max())
+
+def rolling_min(price, window):
+    """Plus bas glissant sur 'window' périodes."""
+    return CACHE.get(price, "min", (window,), lambda: price.rolling(window).min())
+
+def ema(price, span):
+    """Moyenne mobile exponentielle (adjust=False, comme dans les stratégies)."""
+    return CACHE.get(price, "ema", (span,), lambda: price.ewm(span=span, adjust=False).mean())
+
+def pct_change(price, periods):
+    """Rendement sur 'periods' périodes."""
+    return CACHE.get(price, "pct_change", (periods,), lambda: price.pct_change(periods))
+
+def macd(price, fast=12, slow=26, signal=9):
+    """Renvoie (macd, macd_signal)."""
+    def compute():
+        line = ema(price, fast) - ema(price, slow)
+        return line, line.ewm(span=signal, adjust=False).mean()
+    return CACHE.get(price, "macd", (fast, slow, signal), compute)
+
+def vwma(price, volume, window):
+    """Moyenne mobile pondérée par le volume sur 'window' périodes."""
+    def compute():
+        pv = CACHE.get((price, volume), "pv", (), lambda: price * volume)
+        return pv.rolling(window).sum() / volume.rolling(window).sum()
+    return CACHE.get((price, volume), "vwma", (window,), compute)
+
+def _wrap(price, values):
+    """Remet un tableau (n, n_colonnes) au format de 'price' (Series ou DataFrame)."""
+    if isinstance(price, pd.DataFrame):
+        return pd.DataFrame(values, index=price.index, columns=price.columns)
+    return pd.Series(values[:, 0], index=price.index)
+
+def _hlc(price, high, low):
+    """Sources OHLC d'un indicateur : sans high/low, le prix de clôture sert pour les trois."""
+    high = price if high is None else high
+    low = price if low is None else low
+    return (price, high, low)
+
+def rsi(price, period):
+    """RSI de Wilder sur 'period' périodes (noyau numba)."""
+    return CACHE.get(price, "rsi", (period,),
+                     lambda: _wrap(price, indicators_nb.rsi(price, [period])))
+
+def atr(price, period, high=None, low=None):
+    """Average True Range (noyau numba)."""
+    sources = _hlc(price, high, low)
+    return CACHE.get(sources, "atr", (period,),
+                     lambda: _wrap(price, indicators_nb.atr(sources[1], sources[2], price, [period])))
+
+def psar(price, af=0.02, max_af=0.2, high=None, low=None):
+    """Parabolic SAR (noyau numba)."""
+    sources = _hlc(price, high, low)
+    return CACHE.get(sources, "psar", (af, max_af),
+                     lambda: _wrap(price, indicators_nb.psar(sources[1], sources[2], price, af, max_af)))
+
+def supertrend(price, length=10, multiplier=3, high=None, low=None):
+    """Supertrend : renvoie le niveau (noyau numba)."""
+    sources = _hlc(price, high, low)
+    return CACHE.get(sources, "supertrend", (length, multiplier),
+                     lambda: _wrap(price, indicators_nb.supertrend(sources[1], sources[2], price,
+                                                                   length, multiplier)[0]))
+
+def cci(price, period=20, high=None, low=None):
+    """Commodity Channel Index (noyau numba)."""
+    sources = _hlc(price, high, low)
+    return CACHE.get(sources, "cci", (period,),
+                     lambda: _wrap(price, indicators_nb.cci(sources[1], sources[2], price, [period])))
+
+def adx(price, period=14, high=None, low=None):
+    """ADX : renvoie (adx, +DI, -DI) (noyau numba)."""
+    sources = _hlc(price, high, low)
+    def compute():
+        values = indicators_nb.adx(sources[1], sources[2], price, [period])
+        return tuple(_wrap(price, v) for v in values)
+    return CACHE.get(sources, "adx", (period,), compute)
+
+def stoch(price, k_period, d_period, smooth_k=1, high=None, low=None):
+    """Stochastique : renvoie (%K, %D) (noyau numba). smooth_k=1 = %K rapide."""
+    sources = _hlc(price, high, low)
+    def compute():
+        values = indicators_nb.stoch(sources[1], sources[2], price, k_period, d_period, smooth_k)
+        return tuple(_wrap(price, v) for v in values)
+    return CACHE.get(sources, "stoch", (k_period, d_period, smooth_k), compute)
+
+def heikin_ashi(price, open_=None, high=None, low=None):
+    """Heikin-Ashi : renvoie (ha_open, ha_close) (noyau numba)."""
+    open_ = price if open_ is None else open_
+    sources = (price, open_) + _hlc(price, high, low)[1:]
+    def compute():
+        ha_open, _, _, ha_close = indicators_nb.heikin_ashi(open_, sources[2], sources[3], price)
+        return _wrap(price, ha_open), _wrap(price, ha_close)
+    return CACHE.get(sources, "heikin_ashi", (), compute)
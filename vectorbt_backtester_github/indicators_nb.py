@@ -0,0 +1,426 @@
+"""
+indicators_nb.py
+
+Indicateurs techniques en noyaux NumPy compilés par numba (remplace pandas_ta dans les stratégies) :
+RSI, ATR, Parabolic SAR, Supertrend, CCI, ADX, stochastique, Heikin-Ashi.
+
+Conventions :
+- les entrées sont des tableaux 2-D float64 (barres x colonnes) ; un tableau 1-D est traité
+  comme une seule colonne ;
+- chaque fonction accepte PLUSIEURS jeux de paramètres en un appel (ex : windows=[7, 14, 21]) :
+  la sortie a n_params * n_colonnes colonnes, rangées paramètre par paramètre
+  (colonne j = i_param * n_colonnes + i_colonne) ;
+- les formules suivent pandas_ta (lissage de Wilder amorcé par une SMA, comme TA-Lib),
+  résultats identiques à la tolérance numérique près après la période de chauffe.
+
+Usage :
+    import indicators_nb
+
+    rsi = indicators_nb.rsi(close, [7, 14, 21])             # (n, 3) pour un close 1-D
+    adx, dmp, dmn = indicators_nb.adx(high, low, close, [14])
+"""
+
+import numpy as np
+from numba import njit
+
+# === NOYAUX 1-D ===
+
+@njit(cache=True)
+def _sma_1d(a, length, out):
+    """Moyenne mobile simple (NaN tant que la fenêtre contient un NaN, comme pandas rolling)."""
+    n = a.shape[0]
+    total = 0.0
+    n_nan = 0
+    for i in range(n):
+        x = a[i]
+        if np.isnan(x):
+            n_nan += 1
+        else:
+            total += x
+        if i >= length:
+            old = a[i - length]
+            if np.isnan(old):
+                n_nan -= 1
+            else:
+                total -= old
+        if i >= length - 1 and n_nan == 0:
+            out[i] = total / length
+        else:
+            out[i] = np.nan
+
+@njit(cache=True)
+def _rma_1d(a, length, out):
+    """Moyenne de Wilder (rma pandas_ta) : amorcée par la SMA des 'length' premières valeurs valides."""
+    n = a.shape[0]
+    out[:] = np.nan
+    start = 0
+    while start < n and np.isnan(a[start]):
+        start += 1
+    if start + length > n:
+        return
+    value = 0.0
+    for i in range(start, start + length):
+        value += a[i]
+    value /= length
+    out[start + length - 1] = value
+    alpha = 1.0 / length
+    for i in range(start + length, n):
+        if not np.isnan(a[i]):
+            value = (1.0 - alpha) * value + alpha * a[i]
+        out[i] = value
+
+@njit(cache=True)
+def _wilder_sum_1d(a, length, out):
+    """Lissage cumulatif de Wilder (TA-Lib, utilisé pour l'ADX) : amorce = somme des length-1 premières valeurs."""
+    n = a.shape[0]
+    out[:] = np.nan
+    start = 0
+    while start < n and np.isnan(a[start]):
+        start += 1
+    start = max(start, 1)
+    if start + length - 1 > n:
+        return
+    value = 0.0
+    for i in range(start, start + length - 1):
+        if not np.isnan(a[i]):
+            value += a[i]
+    out[start + length - 2] = value
+    for i in range(start + length - 1, n):
+        if not np.isnan(a[i]):
+            value = value - value / length + a[i]
+        out[i] = value
+
+@njit(cache=True)
+def _rolling_minmax_1d(a, length, out_min, out_max):
+    """Plus bas / plus haut glissants sur 'length' barres."""
+    n = a.shape[0]
+    for i in range(n):
+        if i < length - 1:
+            out_min[i] = np.nan
+            out_max[i] = np.nan
+            continue
+        lo = np.inf
+        hi = -np.inf
+        for j in range(i - length + 1, i + 1):
+            x = a[j]
+            if np.isnan(x):
+                lo = np.nan
+                hi = np.nan
+                break
+            lo = min(lo, x)
+            hi = max(hi, x)
+        out_min[i] = lo
+        out_max[i] = hi
+
+@njit(cache=True)
+def _true_range_1d(high, low, close, out):
+    """True range (NaN sur la première barre, faute de clôture précédente)."""
+    out[0] = np.nan
+    for i in range(1, high.shape[0]):
+        pc = close[i - 1]
+        out[i] = max(high[i] - low[i], abs(high[i] - pc), abs(pc - low[i]))
+
+# === NOYAUX 2-D (plusieurs colonnes x plusieurs paramètres) ===
+
+@njit(cache=True)
+def rsi_nb(close, windows, wilder):
+    """RSI. wilder=True : lissage de Wilder (pandas_ta) ; False : moyennes simples (utils.compute_rsi)."""
+    n, c = close.shape
+    out = np.full((n, windows.shape[0] * c), np.nan)
+    gain = np.empty(n)
+    loss = np.empty(n)
+    avg_gain = np.empty(n)
+    avg_loss = np.empty(n)
+    for col in range(c):
+        gain[0] = np.nan
+        loss[0] = np.nan
+        for i in range(1, n):
+            d = close[i, col] - close[i - 1, col]
+            gain[i] = max(d, 0.0) if not np.isnan(d) else np.nan
+            loss[i] = max(-d, 0.0) if not np.isnan(d) else np.nan
+        for p in range(windows.shape[0]):
+            if wilder:
+                _rma_1d(gain, windows[p], avg_gain)
+                _rma_1d(loss, windows[p], avg_loss)
+            else:
+                _sma_1d(gain, windows[p], avg_gain)
+                _sma_1d(loss, windows[p], avg_loss)
+            j = p * c + col
+            for i in range(n):
+                if wilder:
+                    out[i, j] = 100.0 * avg_gain[i] / (avg_gain[i] + avg_loss[i])
+                else:
+                    out[i, j] = 100.0 - 100.0 / (1.0 + avg_gain[i] / (avg_loss[i] + 1e-10))
+    return out
+
+@njit(cache=True)
+def atr_nb(high, low, close, windows):
+    """Average True Range (moyenne de Wilder du true range)."""
+    n, c = close.shape
+    out = np.full((n, windows.shape[0] * c), np.nan)
+    tr = np.empty(n)
+    tmp = np.empty(n)
+    for col in range(c):
+        _true_range_1d(high[:, col], low[:, col], close[:, col], tr)
+        for p in range(windows.shape[0]):
+            _rma_1d(tr, windows[p], tmp)
+            out[:, p * c + col] = tmp
+    return out
+
+@njit(cache=True)
+def supertrend_nb(high, low, close, lengths, multipliers):
+    """Supertrend : renvoie (niveau, direction 1/-1). lengths et multipliers sont appariés."""
+    n, c = close.shape
+    n_p = lengths.shape[0]
+    trend = np.full((n, n_p * c), np.nan)
+    direction = np.ones((n, n_p * c))
+    tr = np.empty(n)
+    atr = np.empty(n)
+    ub = np.empty(n)
+    lb = np.empty(n)
+    for col in range(c):
+        _true_range_1d(high[:, col], low[:, col], close[:, col], tr)
+        for p in range(n_p):
+            _rma_1d(tr, lengths[p], atr)
+            for i in range(n):
+                hl2 = 0.5 * (high[i, col] + low[i, col])
+                ub[i] = hl2 + multipliers[p] * atr[i]
+                lb[i] = hl2 - multipliers[p] * atr[i]
+            j = p * c + col
+            for i in range(1, n):
+                if close[i, col] > ub[i - 1]:
+                    direction[i, j] = 1.0
+                elif close[i, col] < lb[i - 1]:
+                    direction[i, j] = -1.0
+                else:
+                    direction[i, j] = direction[i - 1, j]
+                    if direction[i, j] > 0 and lb[i] < lb[i - 1]:
+                        lb[i] = lb[i - 1]
+                    if direction[i, j] < 0 and ub[i] > ub[i - 1]:
+                        ub[i] = ub[i - 1]
+                trend[i, j] = lb[i] if direction[i, j] > 0 else ub[i]
+    return trend, direction
+
+@njit(cache=True)
+def cci_nb(high, low, close, windows, constant):
+    """Commodity Channel Index : (TP - SMA(TP)) / (constant * écart absolu moyen)."""
+    n, c = close.shape
+    out = np.full((n, windows.shape[0] * c), np.nan)
+    tp = np.empty(n)
+    mean = np.empty(n)
+    for col in range(c):
+        for i in range(n):
+            tp[i] = (high[i, col] + low[i, col] + close[i, col]) / 3.0
+        for p in range(windows.shape[0]):
+            w = windows[p]
+            _sma_1d(tp, w, mean)
+            j = p * c + col
+            for i in range(w - 1, n):
+                if np.isnan(mean[i]):
+                    continue
+                mad = 0.0
+                for k in range(i - w + 1, i + 1):
+                    mad += abs(tp[k] - mean[i])
+                mad /= w
+                out[i, j] = (tp[i] - mean[i]) / (constant * mad)
+    return out
+
+@njit(cache=True)
+def adx_nb(high, low, close, windows):
+    """ADX de Wilder : renvoie (adx, +DI, -DI)."""
+    n, c = close.shape
+    n_p = windows.shape[0]
+    adx = np.full((n, n_p * c), np.nan)
+    dmp = np.full((n, n_p * c), np.nan)
+    dmn = np.full((n, n_p * c), np.nan)
+    pos = np.empty(n)
+    neg = np.empty(n)
+    tr = np.empty(n)
+    s_pos = np.empty(n)
+    s_neg = np.empty(n)
+    s_tr = np.empty(n)
+    dx = np.empty(n)
+    tmp = np.empty(n)
+    for col in range(c):
+        pos[0] = np.nan
+        neg[0] = np.nan
+        for i in range(1, n):
+            up = high[i, col] - high[i - 1, col]
+            dn = low[i - 1, col] - low[i, col]
+            pos[i] = up if (up > dn and up > 0) else 0.0
+            neg[i] = dn if (dn > up and dn > 0) else 0.0
+        _true_range_1d(high[:, col], low[:, col], close[:, col], tr)
+        for p in range(n_p):
+            w = windows[p]
+            _wilder_sum_1d(pos, w, s_pos)
+            _wilder_sum_1d(neg, w, s_neg)
+            _wilder_sum_1d(tr, w, s_tr)
+            j = p * c + col
+            seed_done = False
+            for i in range(n):
+                if np.isnan(s_tr[i]):
+                    dx[i] = np.nan
+                    continue
+                if not seed_done:
+                    # La barre d'amorce n'est pas publiée (comme TA-Lib)
+                    seed_done = True
+                    dx[i] = np.nan
+                    continue
+                dmp[i, j] = 100.0 * s_pos[i] / s_tr[i]
+                dmn[i, j] = 100.0 * s_neg[i] / s_tr[i]
+                dx[i] = 100.0 * abs(dmp[i, j] - dmn[i, j]) / (dmp[i, j] + dmn[i, j])
+            _rma_1d(dx, w, tmp)
+            adx[:, j] = tmp
+    return adx, dmp, dmn
+
+@njit(cache=True)
+def stoch_nb(high, low, close, k_windows, d_windows, smooth_k):
+    """Stochastique : renvoie (%K, %D). k_windows et d_windows sont appariés ; smooth_k=1 = %K rapide."""
+    n, c = close.shape
+    n_p = k_windows.shape[0]
+    k_out = np.full((n, n_p * c), np.nan)
+    d_out = np.full((n, n_p * c), np.nan)
+    lo = np.empty(n)
+    hi = np.empty(n)
+    dummy = np.empty(n)
+    raw = np.empty(n)
+    k_line = np.empty(n)
+    d_line = np.empty(n)
+    for col in range(c):
+        for p in range(n_p):
+            _rolling_minmax_1d(low[:, col], k_windows[p], lo, dummy)
+            _rolling_minmax_1d(high[:, col], k_windows[p], dummy, hi)
+            for i in range(n):
+                rng = hi[i] - lo[i]
+                if rng == 0:
+                    rng = np.finfo(np.float64).eps
+                raw[i] = 100.0 * (close[i, col] - lo[i]) / rng
+            if smooth_k > 1:
+                _sma_1d(raw, smooth_k, k_line)
+            else:
+                k_line[:] = raw
+            _sma_1d(k_line, d_windows[p], d_line)
+            j = p * c + col
+            k_out[:, j] = k_line
+            d_out[:, j] = d_line
+    return k_out, d_out
+
+@njit(cache=True)
+def heikin_ashi_nb(open_, high, low, close):
+    """Bougies Heikin-Ashi : renvoie (ha_open, ha_high, ha_low, ha_close)."""
+    n, c = close.shape
+    ha_open = np.empty((n, c))
+    ha_high = np.empty((n, c))
+    ha_low = np.empty((n, c))
+    ha_close = np.empty((n, c))
+    for col in range(c):
+        for i in range(n):
+            ha_close[i, col] = 0.25 * (open_[i, col] + high[i, col] + low[i, col] + close[i, col])
+            if i == 0:
+                ha_open[i, col] = 0.5 * (open_[0, col] + close[0, col])
+            else:
+                ha_open[i, col] = 0.5 * (ha_open[i - 1, col] + ha_close[i - 1, col])
+            ha_high[i, col] = max(ha_open[i, col], high[i, col], ha_close[i, col])
+            ha_low[i, col] = min(ha_open[i, col], low[i, col], ha_close[i, col])
+    return ha_open, ha_high, ha_low, ha_close
+
+@njit(cache=True)
+def psar_nb(high, low, close, af0s, max_afs):
+    """Parabolic SAR (niveau unique, long ou short). af0s et max_afs sont appariés."""
+    n, c = close.shape
+    n_p = af0s.shape[0]
+    out = np.full((n, n_p * c), np.nan)
+    for col in range(c):
+        for p in range(n_p):
+            af0 = af0s[p]
+            max_af = max_afs[p]
+            falling = False
+            if n > 1:
+                up = high[1, col] - high[0, col]
+                dn = low[0, col] - low[1, col]
+                falling = dn > up and dn > 0
+            sar = close[0, col]
+            if n > 1:
+                ep = low[1, col] if falling else high[1, col]
+            else:
+                ep = low[0, col] if falling else high[0, col]
+            af = af0
+            j = p * c + col
+            for i in range(1, n):
+                h = high[i, col]
+                l = low[i, col]
+                new_sar = sar + af * (ep - sar)
+                if falling:
+                    if l < ep:
+                        ep = l
+                        af = min(af + af0, max_af)
+                    new_sar = max(high[i - 1, col], high[max(0, i - 2), col], new_sar)
+                    reverse = h > new_sar
+                else:
+                    if h > ep:
+                        ep = h
+                        af = min(af + af0, max_af)
+                    new_sar = min(low[i - 1, col], low[max(0, i - 2), col], new_sar)
+                    reverse = l < new_sar
+                if reverse:
+                    new_sar = ep
+                    af = af0
+                    falling = not falling
+                    ep = l if falling else h
+                sar = new_sar
+                out[i, j] = sar
+    return out
+
+# === WRAPPERS NUMPY ===
+
+def _as_2d(a):
+    """Convertit une entrée (Series, DataFrame, tableau 1-D/2-D) en tableau float64 2-D contigu."""
+    a = np.asarray(a, dtype=np.float64)
+    if a.ndim == 1:
+        a = a[:, None]
+    return np.ascontiguousarray(a)
+
+def _params(*values, dtype=np.float64):
+    """Met des paramètres scalaires ou listes au même nombre de combinaisons."""
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=dtype)) for v in values])
+    return [np.ascontiguousarray(a) for a in arrays]
+
+def rsi(close, windows, wilder=True):
+    """RSI pour chaque fenêtre de 'windows'. Sortie (n, n_windows * n_colonnes)."""
+    (windows,) = _params(windows, dtype=np.int64)
+    return rsi_nb(_as_2d(close), windows, wilder)
+
+def atr(high, low, close, windows):
+    """ATR pour chaque fenêtre de 'windows'."""
+    (windows,) = _params(windows, dtype=np.int64)
+    return atr_nb(_as_2d(high), _as_2d(low), _as_2d(close), windows)
+
+def supertrend(high, low, close, lengths, multipliers):
+    """Supertrend pour chaque couple (length, multiplier). Renvoie (niveau, direction)."""
+    lengths, multipliers = _params(lengths, multipliers)
+    return supertrend_nb(_as_2d(high), _as_2d(low), _as_2d(close), lengths.astype(np.int64), multipliers)
+
+def cci(high, low, close, windows, constant=0.015):
+    """CCI pour chaque fenêtre de 'windows'."""
+    (windows,) = _params(windows, dtype=np.int64)
+    return cci_nb(_as_2d(high), _as_2d(low), _as_2d(close), windows, constant)
+
+def adx(high, low, close, windows):
+    """ADX pour chaque fenêtre de 'windows'. Renvoie (adx, +DI, -DI)."""
+    (windows,) = _params(windows, dtype=np.int64)
+    return adx_nb(_as_2d(high), _as_2d(low), _as_2d(close), windows)
+
+def stoch(high, low, close, k_windows, d_windows, smooth_k=3):
+    """Stochastique pour chaque couple (k, d). Renvoie (%K, %D)."""
+    k_windows, d_windows = _params(k_windows, d_windows)
+    return stoch_nb(_as_2d(high), _as_2d(low), _as_2d(close),
+                    k_windows.astype(np.int64), d_windows.astype(np.int64), smooth_k)
+
+def heikin_ashi(open_, high, low, close):
+    """Heikin-Ashi. Renvoie (ha_open, ha_high, ha_low, ha_close)."""
+    return heikin_ashi_nb(_as_2d(open_), _as_2d(high), _as_2d(low), _as_2d(close))
+
+def psar(high, low, close, af0=0.02, max_af=0.2):
+    """Parabolic SAR pour chaque couple (af0, max_af)."""
+    af0, max_af = _params(af0, max_af)
+    return psar_nb(_as_2d(high), _as_2d(low), _as_2d(close), af0, max_af)
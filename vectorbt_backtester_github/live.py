@@ -0,0 +1,762 @@
+"""
+live.py
+
+Scan incrémental des signaux sur la dernière barre : au lieu de recalculer tout l'historique
+pour chaque setup, les indicateurs gardent un état glissant (sommes glissantes pour les
+moyennes, état de Wilder pour le RSI / l'ATR / l'ADX, état EMA pour le MACD, bandes et direction
+du Supertrend, SAR / point extrême / facteur du Parabolic SAR, files monotones pour les plus hauts /
+plus bas de Donchian) ; ajouter une barre coûte O(1) par indicateur.
+
+- Les indicateurs sont partagés : un même (indicateur, paramètres) n'a qu'un état, quel que
+  soit le nombre de setups qui l'utilisent ; chaque état est vectorisé sur les tickers.
+- Les setups qui ne diffèrent que par l'exécution (SL/TP, paramètres ignorés) partagent leurs
+  signaux (même clé de signal que backtester.split_setup).
+- Les signaux (entrées / sorties brutes de la barre courante) sont identiques à la dernière
+  ligne de la stratégie de strategies.py calculée sur tout l'historique.
+- Stratégies sans version incrémentale (absentes de LIVE_STRATEGIES, ex : cci_entry) : ignorées
+  avec un message.
+- Le scanner est picklable : l'état peut être sauvé après le préchauffage et rechargé au
+  scan suivant (seules les nouvelles barres sont alors traitées).
+
+Usage :
+    from live import LiveScanner
+
+    scanner = LiveScanner(strategies.generate_strategy_setups(), history)   # préchauffage
+    scanner.signals(active=True)               # setups (x tickers) avec une entrée / sortie
+    scanner.update(new_bar)                    # ex : panel.iloc[-1] (Series champ / (champ, ticker))
+"""
+
+from collections import deque
+import numpy as np
+import pandas as pd
+import backtester
+import strategies
+
+# === INDICATEURS INCRÉMENTAUX (vectorisés sur les tickers) ===
+
+class _Node:
+    """Indicateur incrémental : valeur de la barre courante et de la barre précédente."""
+
+    def __init__(self, n):
+        self.value = np.full(n, np.nan)
+        self.prev = self.value
+
+    def step(self, t):
+        self.prev = self.value
+        self.value = self.compute(t)
+
+def _v(x):
+    """Valeur courante d'un indicateur, ou la constante elle-même."""
+    return x.value if isinstance(x, _Node) else x
+
+class _Field(_Node):
+    """Champ OHLCV de la barre, fourni par LiveIndicators.update."""
+
+    def __init__(self, n):
+        super().__init__(n)
+        self.bar = self.value
+
+    def compute(self, t):
+        return self.bar
+
+class _Func(_Node):
+    """Fonction élément par élément d'indicateurs ou de constantes (ex : np.subtract)."""
+
+    def __init__(self, n, func, *args):
+        super().__init__(n)
+        self.func = func
+        self.args = args
+
+    def compute(self, t):
+        return self.func(*(_v(a) for a in self.args))
+
+class _Lag(_Node):
+    """Valeur de la source 'periods' barres plus tôt (NaN avant), comme shift(periods)."""
+
+    def __init__(self, n, src, periods):
+        super().__init__(n)
+        self.src = src
+        self.buf = np.full((periods, n), np.nan)
+        self.pos = 0
+
+    def compute(self, t):
+        out = self.buf[self.pos].copy()
+        self.buf[self.pos] = self.src.value
+        self.pos = (self.pos + 1) % len(self.buf)
+        return out
+
+class _RollingSum(_Node):
+    """
+    Somme glissante sur 'length' barres, NaN tant que la fenêtre contient un NaN (comme pandas
+    rolling). Somme recalculée depuis le buffer à chaque tour complet : pas de dérive.
+    """
+
+    def __init__(self, n, src, length):
+        super().__init__(n)
+        self.src = src
+        self.buf = np.zeros((length, n))
+        self.pos = 0
+        self.total = np.zeros(n)
+        self.n_nan = np.zeros(n, dtype=np.int64)
+
+    def compute(self, t):
+        x = self.src.value
+        length = len(self.buf)
+        if t >= length:
+            old = self.buf[self.pos]
+            self.total -= np.nan_to_num(old)
+            self.n_nan -= np.isnan(old)
+        self.total += np.nan_to_num(x)
+        self.n_nan += np.isnan(x)
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % length
+        if self.pos == 0:
+            self.total = np.nansum(self.buf, axis=0)
+        return np.where((t >= length - 1) & (self.n_nan == 0), self.total, np.nan)
+
+class _RollingExtreme(_Node):
+    """
+    Plus haut (is_max) / plus bas glissant sur 'length' barres, barre courante incluse :
+    file monotone par ticker, O(1) amorti. NaN si la fenêtre contient un NaN.
+    """
+
+    def __init__(self, n, src, length, is_max):
+        super().__init__(n)
+        self.src = src
+        self.length = length
+        self.is_max = is_max
+        self.queues = [deque() for _ in range(n)]
+        self.last_nan = np.full(n, -length, dtype=np.int64)
+
+    def compute(self, t):
+        out = np.full(len(self.queues), np.nan)
+        start = t - self.length + 1
+        values = self.src.value
+        for j, (x, missing) in enumerate(zip(values.tolist(), np.isnan(values).tolist())):
+            queue = self.queues[j]
+            if missing:
+                self.last_nan[j] = t
+            elif self.is_max:
+                while queue and queue[-1][1] <= x:
+                    queue.pop()
+                queue.append((t, x))
+            else:
+                while queue and queue[-1][1] >= x:
+                    queue.pop()
+                queue.append((t, x))
+            while queue and queue[0][0] < start:
+                queue.popleft()
+            if start >= 0 and self.last_nan[j] < start and queue:
+                out[j] = queue[0][1]
+        return out
+
+class _EMA(_Node):
+    """EMA (ewm adjust=False) : amorcée par la première valeur valide, inchangée sur un NaN."""
+
+    def __init__(self, n, src, span):
+        super().__init__(n)
+        self.src = src
+        self.alpha = 2.0 / (span + 1.0)
+
+    def compute(self, t):
+        x, value = self.src.value, self.value
+        out = np.where(np.isnan(value), x, (1.0 - self.alpha) * value + self.alpha * x)
+        return np.where(np.isnan(x), value, out)
+
+class _Wilder(_Node):
+    """
+    Moyenne de Wilder (indicators_nb._rma_1d) : amorcée par la SMA des 'length' premières
+    valeurs valides, puis value = (1 - 1/length) * value + x / length.
+    """
+
+    def __init__(self, n, src, length):
+        super().__init__(n)
+        self.src = src
+        self.length = length
+        self.count = np.zeros(n, dtype=np.int64)
+        self.total = np.zeros(n)
+
+    def compute(self, t):
+        x = self.src.value
+        valid = ~np.isnan(x)
+        seeding = valid & (self.count < self.length)
+        running = valid & (self.count >= self.length)
+        self.count += seeding
+        self.total[seeding] += x[seeding]
+        out = self.value.copy()
+        seeded = seeding & (self.count == self.length)
+        out[seeded] = self.total[seeded] / self.length
+        alpha = 1.0 / self.length
+        out[running] = (1.0 - alpha) * out[running] + alpha * x[running]
+        return out
+
+class _WilderSum(_Node):
+    """
+    Lissage cumulatif de Wilder (indicators_nb._wilder_sum_1d, ADX) : à partir de la première
+    valeur valide (barre 1 au plus tôt), amorce = somme des length-1 premières barres, puis
+    value = value - value / length + x.
+    """
+
+    def __init__(self, n, src, length):
+        super().__init__(n)
+        self.src = src
+        self.length = length
+        self.start = np.full(n, -1, dtype=np.int64)
+        self.total = np.zeros(n)
+
+    def compute(self, t):
+        x = self.src.value
+        out = np.full(len(x), np.nan)
+        if t == 0:
+            return out
+        valid = ~np.isnan(x)
+        self.start[(self.start < 0) & valid] = t
+        k = np.where(self.start >= 0, t - self.start, -1)
+        seeding = (k >= 0) & (k < self.length - 1)
+        self.total[seeding & valid] += x[seeding & valid]
+        running = (k >= self.length - 1) & valid
+        self.total[running] += x[running] - self.total[running] / self.length
+        published = k >= self.length - 2
+        out[published] = self.total[published]
+        return out
+
+class _AfterSeed(_Node):
+    """Valeur de la source, sauf à sa première barre valide (barre d'amorce non publiée, comme TA-Lib)."""
+
+    def __init__(self, n, src):
+        super().__init__(n)
+        self.src = src
+        self.seen = np.zeros(n, dtype=bool)
+
+    def compute(self, t):
+        x = self.src.value
+        valid = ~np.isnan(x)
+        out = np.where(self.seen, x, np.nan)
+        self.seen |= valid
+        return out
+
+class _Supertrend(_Node):
+    """
+    Supertrend (indicators_nb.supertrend_nb) : bandes hl2 +/- multiplier * ATR, la bande active
+    ne recule pas tant que la direction tient ; direction changée quand la clôture sort des
+    bandes de la barre précédente. NaN sur la première barre.
+    """
+
+    def __init__(self, n, high, low, close, atr, multiplier):
+        super().__init__(n)
+        self.high = high
+        self.low = low
+        self.close = close
+        self.atr = atr
+        self.multiplier = multiplier
+        self.upper = np.full(n, np.nan)
+        self.lower = np.full(n, np.nan)
+        self.direction = np.ones(n)
+
+    def compute(self, t):
+        hl2 = 0.5 * (self.high.value + self.low.value)
+        upper = hl2 + self.multiplier * self.atr.value
+        lower = hl2 - self.multiplier * self.atr.value
+        if t == 0:
+            self.upper, self.lower = upper, lower
+            return np.full(len(upper), np.nan)
+        close = self.close.value
+        up, down = close > self.upper, close < self.lower
+        direction = np.where(up, 1.0, np.where(down, -1.0, self.direction))
+        hold = ~up & ~down
+        lower = np.where(hold & (direction > 0) & (lower < self.lower), self.lower, lower)
+        upper = np.where(hold & (direction < 0) & (upper > self.upper), self.upper, upper)
+        self.upper, self.lower, self.direction = upper, lower, direction
+        return np.where(direction > 0, lower, upper)
+
+class _ParabolicSAR(_Node):
+    """
+    Parabolic SAR (indicators_nb.psar_nb) : SAR, point extrême, facteur d'accélération et sens
+    par ticker ; sens initial donné par le mouvement directionnel des deux premières barres.
+    NaN sur la première barre.
+    """
+
+    def __init__(self, n, high, low, close, af0, max_af):
+        super().__init__(n)
+        self.high = high
+        self.low = low
+        self.close = close
+        self.af0 = af0
+        self.max_af = max_af
+        self.sar = np.full(n, np.nan)
+        self.ep = np.full(n, np.nan)
+        self.af = np.full(n, af0)
+        self.falling = np.zeros(n, dtype=bool)
+        self.highs = (self.sar, self.sar)   # plus hauts des barres t-1 et t-2
+        self.lows = (self.sar, self.sar)
+
+    def compute(self, t):
+        h, l = self.high.value, self.low.value
+        if t == 0:
+            self.sar = self.close.value.copy()
+            self.highs, self.lows = (h, h), (l, l)
+            return np.full(len(h), np.nan)
+        (h1, h2), (l1, l2) = self.highs, self.lows
+        if t == 1:
+            up, dn = h - h1, l1 - l
+            self.falling = (dn > up) & (dn > 0)
+            self.ep = np.where(self.falling, l, h)
+        falling, ep, af = self.falling, self.ep, self.af
+        sar = self.sar + af * (ep - self.sar)
+        extend = np.where(falling, l < ep, h > ep)
+        ep = np.where(extend, np.where(falling, l, h), ep)
+        af = np.where(extend, np.minimum(af + self.af0, self.max_af), af)
+        sar = np.where(falling, np.maximum(np.maximum(h1, h2), sar), np.minimum(np.minimum(l1, l2), sar))
+        reverse = np.where(falling, h > sar, l < sar)
+        sar = np.where(reverse, ep, sar)
+        af = np.where(reverse, self.af0, af)
+        falling = falling ^ reverse
+        ep = np.where(reverse, np.where(falling, l, h), ep)
+        self.sar, self.ep, self.af, self.falling = sar, ep, af, falling
+        self.highs, self.lows = (h, h1), (l, l1)
+        return sar
+
+class _HeikinOpen(_Node):
+    """Ouverture Heikin-Ashi : (o + c) / 2 sur la première barre, puis moyenne des HA précédentes."""
+
+    def __init__(self, n, open_, close, ha_close):
+        super().__init__(n)
+        self.open_ = open_
+        self.close = close
+        self.ha_close = ha_close
+
+    def compute(self, t):
+        if t == 0:
+            return 0.5 * (self.open_.value + self.close.value)
+        return 0.5 * (self.value + self.ha_close.prev)
+
+def _mean4(a, b, c, d):
+    return (a + b + c + d) / 4.0
+
+def _true_range(high, low, prev_close):
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)))
+
+def _gain(x, prev):
+    return np.maximum(x - prev, 0.0)
+
+def _loss(x, prev):
+    return np.maximum(prev - x, 0.0)
+
+def _plus_dm(high, prev_high, low, prev_low):
+    up, dn = high - prev_high, prev_low - low
+    return np.where(np.isnan(prev_high), np.nan, np.where((up > dn) & (up > 0), up, 0.0))
+
+def _minus_dm(high, prev_high, low, prev_low):
+    up, dn = high - prev_high, prev_low - low
+    return np.where(np.isnan(prev_low), np.nan, np.where((dn > up) & (dn > 0), dn, 0.0))
+
+def _di(smoothed, smoothed_tr):
+    return 100.0 * smoothed / smoothed_tr
+
+def _dx(dmp, dmn):
+    return 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+
+def _rsi(avg_gain, avg_loss):
+    return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+class _Std:
+    """Écart-type glissant à partir des sommes (objet picklable, contrairement à une closure)."""
+
+    def __init__(self, window):
+        self.window = window
+
+    def __call__(self, total, squares):
+        var = (squares - total * total / self.window) / (self.window - 1)
+        return np.sqrt(np.maximum(var, 0.0))
+
+def _pct_change(x, lagged):
+    return x / lagged - 1.0
+
+def _stoch_k(close, lo, hi):
+    rng = hi - lo
+    rng = np.where(rng == 0, np.finfo(np.float64).eps, rng)
+    return 100.0 * (close - lo) / rng
+
+class LiveIndicators:
+    """
+    Graphe d'indicateurs incrémentaux partagés, mis à jour une fois par barre dans l'ordre de
+    création (une dépendance est toujours créée avant l'indicateur qui l'utilise).
+    Mêmes définitions que indicators.py (pandas rolling / ewm, noyaux numba).
+    """
+
+    def __init__(self, n_tickers, fields):
+        self.n = n_tickers
+        self.t = -1
+        self.nodes = {}
+        self.fields = {f: self._node(("field", f), _Field) for f in fields}
+
+    def _node(self, key, cls, *args):
+        if key not in self.nodes:
+            self.nodes[key] = cls(self.n, *args)
+        return self.nodes[key]
+
+    def _func(self, key, func, *args):
+        return self._node(key, _Func, func, *args)
+
+    def update(self, bar):
+        """Ajoute une barre : {champ: tableau (n_tickers,)}."""
+        self.t += 1
+        for field, node in self.fields.items():
+            node.bar = bar[field]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for node in self.nodes.values():
+                node.step(self.t)
+
+    def field(self, name):
+        """Champ OHLCV ; la clôture remplace un champ absent (comme indicators._hlc)."""
+        return self.fields.get(name, self.fields["Close"])
+
+    @property
+    def close(self):
+        return self.fields["Close"]
+
+    def lag(self, src, periods=1):
+        return self._node(("lag", id(src), periods), _Lag, src, periods)
+
+    def rolling_sum(self, src, window):
+        return self._node(("sum", id(src), window), _RollingSum, src, window)
+
+    def sma(self, src, window):
+        return self._func(("sma", id(src), window), np.divide, self.rolling_sum(src, window), float(window))
+
+    def rolling_std(self, src, window):
+        """Écart-type glissant (ddof=1) par sommes et sommes des carrés."""
+        squares = self._func(("square", id(src)), np.square, src)
+        return self._func(("std", id(src), window), _Std(window),
+                          self.rolling_sum(src, window), self.rolling_sum(squares, window))
+
+    def rolling_max(self, src, window):
+        return self._node(("max", id(src), window), _RollingExtreme, src, window, True)
+
+    def rolling_min(self, src, window):
+        return self._node(("min", id(src), window), _RollingExtreme, src, window, False)
+
+    def ema(self, src, span):
+        return self._node(("ema", id(src), span), _EMA, src, span)
+
+    def pct_change(self, src, periods):
+        return self._func(("pct_change", id(src), periods), _pct_change, src, self.lag(src, periods))
+
+    def macd(self, src, fast=12, slow=26, signal=9):
+        line = self._func(("macd", id(src), fast, slow), np.subtract, self.ema(src, fast), self.ema(src, slow))
+        return line, self.ema(line, signal)
+
+    def vwma(self, src, volume, window):
+        pv = self._func(("pv", id(src), id(volume)), np.multiply, src, volume)
+        return self._func(("vwma", id(src), id(volume), window), np.divide,
+                          self.rolling_sum(pv, window), self.rolling_sum(volume, window))
+
+    def rsi(self, src, period):
+        prev = self.lag(src)
+        gain = self._func(("gain", id(src)), _gain, src, prev)
+        loss = self._func(("loss", id(src)), _loss, src, prev)
+        return self._func(("rsi", id(src), period), _rsi,
+                          self._node(("rma", id(gain), period), _Wilder, gain, period),
+                          self._node(("rma", id(loss), period), _Wilder, loss, period))
+
+    def atr(self, period):
+        high, low, close = self.field("High"), self.field("Low"), self.close
+        tr = self._func(("true_range",), _true_range, high, low, self.lag(close))
+        return self._node(("rma", id(tr), period), _Wilder, tr, period)
+
+    def supertrend(self, length, multiplier):
+        high, low = self.field("High"), self.field("Low")
+        return self._node(("supertrend", length, multiplier), _Supertrend,
+                          high, low, self.close, self.atr(length), multiplier)
+
+    def psar(self, af0, max_af):
+        return self._node(("psar", af0, max_af), _ParabolicSAR,
+                          self.field("High"), self.field("Low"), self.close, af0, max_af)
+
+    def adx(self, period):
+        """(adx, +DI, -DI) comme indicators_nb.adx_nb : sommes de Wilder, barre d'amorce non publiée."""
+        high, low = self.field("High"), self.field("Low")
+        moves = (high, self.lag(high), low, self.lag(low))
+        plus = self._func(("plus_dm",), _plus_dm, *moves)
+        minus = self._func(("minus_dm",), _minus_dm, *moves)
+        tr = self._func(("true_range",), _true_range, high, low, self.lag(self.close))
+        wilder_tr = self._node(("wilder_sum", id(tr), period), _WilderSum, tr, period)
+        s_tr = self._node(("after_seed", id(wilder_tr)), _AfterSeed, wilder_tr)
+        dmp = self._func(("dmp", period), _di,
+                         self._node(("wilder_sum", id(plus), period), _WilderSum, plus, period), s_tr)
+        dmn = self._func(("dmn", period), _di,
+                         self._node(("wilder_sum", id(minus), period), _WilderSum, minus, period), s_tr)
+        dx = self._func(("dx", period), _dx, dmp, dmn)
+        return self._node(("rma", id(dx), period), _Wilder, dx, period), dmp, dmn
+
+    def stoch(self, k_period, d_period):
+        close = self.close
+        lo = self.rolling_min(self.field("Low"), k_period)
+        hi = self.rolling_max(self.field("High"), k_period)
+        k = self._func(("stoch_k", k_period), _stoch_k, close, lo, hi)
+        return k, self.sma(k, d_period)
+
+    def heikin_ashi(self):
+        open_, close = self.field("Open"), self.close
+        ha_close = self._func(("ha_close",), _mean4, open_, self.field("High"), self.field("Low"), close)
+        return self._node(("ha_open",), _HeikinOpen, open_, close, ha_close), ha_close
+
+# === SIGNAUX (barre courante, à partir de value / prev des indicateurs) ===
+
+def _cross(a, b):
+    return (a.value > b.value) & (a.prev <= b.prev), (a.value < b.value) & (a.prev >= b.prev)
+
+def _above_below(x, upper, lower):
+    """Entrée si x > upper, sortie si x < lower."""
+    return _v(x) > _v(upper), _v(x) < _v(lower)
+
+def _below_above(x, lower, upper):
+    """Entrée si x < lower, sortie si x > upper."""
+    return _v(x) < _v(lower), _v(x) > _v(upper)
+
+def _breakout(price, upper, lower):
+    """Entrée si le prix dépasse le plus haut précédent, sortie s'il passe sous le plus bas précédent."""
+    return price.value > upper.prev, price.value < lower.prev
+
+def _breakdown(price, level):
+    return price.value < level.prev, price.value > level.prev
+
+def _channel_break(price, upper, ma):
+    return price.value > upper.prev, price.value < ma.value
+
+def _mean_reversion(price, ma, thresh):
+    dev = (price.value - ma.value) / ma.value
+    return dev < -thresh, price.value > ma.value
+
+def _range_bound(price, lo, hi):
+    return price.value <= lo.value, price.value >= hi.value
+
+def _stoch_cross(k, d, thresh_low, thresh_high):
+    up, down = _cross(k, d)
+    return up & (k.value < thresh_low), down & (k.value > thresh_high)
+
+def _adx_trend(adx, dmp, dmn, thresh):
+    return (adx.value > thresh) & (dmp.value > dmn.value), (adx.value < thresh) | (dmn.value > dmp.value)
+
+def _triple_cross(m1, m2, m3):
+    def ordered(a, b, c):
+        return (a > b) & (b > c)
+    now_up, was_up = ordered(m1.value, m2.value, m3.value), ordered(m1.prev, m2.prev, m3.prev)
+    now_down, was_down = ordered(m3.value, m2.value, m1.value), ordered(m3.prev, m2.prev, m1.prev)
+    return now_up & ~was_up, now_down & ~was_down
+
+# === STRATÉGIES INCRÉMENTALES ===
+# Même nom, mêmes paramètres et mêmes défauts que strategies.py ; chaque fonction renvoie
+# (fonction de signal, arguments) construits sur le graphe d'indicateurs partagé.
+
+def moving_average_crossover(ind, ma_short, ma_long):
+    return _cross, (ind.sma(ind.close, ma_short), ind.sma(ind.close, ma_long))
+
+def rsi_pullback(ind, rsi_period, rsi_val):
+    return _below_above, (ind.rsi(ind.close, rsi_period), rsi_val, 50)
+
+def breakout_high(ind, window):
+    high = ind.rolling_max(ind.close, window)
+    return _breakout, (ind.close, high, high)
+
+def breakout_low(ind, window):
+    return _breakdown, (ind.close, ind.rolling_min(ind.close, window))
+
+def mean_reversion(ind, window, thresh):
+    return _mean_reversion, (ind.close, ind.sma(ind.close, window), thresh)
+
+def momentum(ind, window, thresh):
+    return _above_below, (ind.pct_change(ind.close, window), thresh, 0)
+
+def macd_cross(ind, fast=12, slow=26, signal=9):
+    return _cross, ind.macd(ind.close, fast, slow, signal)
+
+def _bollinger(ind, window, n_std, sign):
+    ma = ind.sma(ind.close, window)
+    band = ind._func(("bollinger", window, n_std, sign), _band, ma, ind.rolling_std(ind.close, window), sign * n_std)
+    return ma, band
+
+def _band(ma, std, width):
+    return ma + width * std
+
+def bollinger_band_break(ind, window, n_std):
+    ma, upper = _bollinger(ind, window, n_std, 1)
+    return _above_below, (ind.close, upper, ma)
+
+def bollinger_mean_revert(ind, window, n_std):
+    ma, lower = _bollinger(ind, window, n_std, -1)
+    return _below_above, (ind.close, lower, ma)
+
+def range_bound(ind, window):
+    return _range_bound, (ind.close, ind.rolling_min(ind.close, window), ind.rolling_max(ind.close, window))
+
+def stochastic_cross(ind, k_period, d_period, thresh_low=20, thresh_high=80):
+    k, d = ind.stoch(k_period, d_period)
+    return _stoch_cross, (k, d, thresh_low, thresh_high)
+
+def donchian_breakout(ind, window):
+    return _breakout, (ind.close, ind.rolling_max(ind.close, window), ind.rolling_min(ind.close, window))
+
+def atr_trailing_stop(ind, atr_period, multiplier):
+    ma = ind.sma(ind.close, atr_period)
+    stop = ind._func(("atr_stop", atr_period, multiplier), _band, ma, ind.atr(atr_period), -multiplier)
+    return _above_below, (ind.close, ma, stop)
+
+def rsi_overbought_oversold(ind, rsi_period, overbought=70, oversold=30):
+    return _below_above, (ind.rsi(ind.close, rsi_period), oversold, overbought)
+
+def ema_crossover(ind, ema_fast, ema_slow):
+    return _cross, (ind.ema(ind.close, ema_fast), ind.ema(ind.close, ema_slow))
+
+def parabolic_sar(ind, af=0.02, max_af=0.2):
+    sar = ind.psar(af, max_af)
+    return _above_below, (ind.close, sar, sar)
+
+def triple_ma_crossover(ind, ma1, ma2, ma3):
+    return _triple_cross, (ind.sma(ind.close, ma1), ind.sma(ind.close, ma2), ind.sma(ind.close, ma3))
+
+def vwma_crossover(ind, short, long):
+    volume = ind.field("Volume")
+    return _cross, (ind.vwma(ind.close, volume, short), ind.vwma(ind.close, volume, long))
+
+def price_channel_break(ind, window):
+    return _channel_break, (ind.close, ind.rolling_max(ind.close, window), ind.sma(ind.close, window))
+
+def supertrend_entry(ind, atr_period=10, multiplier=3):
+    st = ind.supertrend(atr_period, multiplier)
+    return _above_below, (ind.close, st, st)
+
+def adx_trend(ind, adx_period=14, thresh=25):
+    return _adx_trend, ind.adx(adx_period) + (thresh,)
+
+def heikin_ashi_trend(ind):
+    ha_open, ha_close = ind.heikin_ashi()
+    return _above_below, (ha_close, ha_open, ha_open)
+
+LIVE_STRATEGIES = {
+    "moving_average_crossover": moving_average_crossover,
+    "rsi_pullback": rsi_pullback,
+    "breakout_high": breakout_high,
+    "breakout_low": breakout_low,
+    "mean_reversion": mean_reversion,
+    "momentum": momentum,
+    "macd_cross": macd_cross,
+    "bollinger_band_break": bollinger_band_break,
+    "bollinger_mean_revert": bollinger_mean_revert,
+    "support_resistance_break": breakout_high,
+    "range_bound": range_bound,
+    "stochastic_cross": stochastic_cross,
+    "donchian_breakout": donchian_breakout,
+    "atr_trailing_stop": atr_trailing_stop,
+    "rsi_overbought_oversold": rsi_overbought_oversold,
+    "ema_crossover": ema_crossover,
+    "parabolic_sar": parabolic_sar,
+    "triple_ma_crossover": triple_ma_crossover,
+    "vwma_crossover": vwma_crossover,
+    "price_channel_break": price_channel_break,
+    "supertrend_entry": supertrend_entry,
+    "adx_trend": adx_trend,
+    "turtle_breakout": donchian_breakout,
+    "heikin_ashi_trend": heikin_ashi_trend,
+}
+# Sans version incrémentale : cci_entry. Son écart absolu moyen se mesure à la moyenne de la
+# fenêtre courante : quand la moyenne change, chaque écart |TP - moyenne| de la fenêtre change,
+# et il faut refaire la somme sur toute la fenêtre. Il n'y a donc pas d'état glissant O(1).
+
+# === SCANNER ===
+
+class LiveScanner:
+    """
+    Signaux de la dernière barre pour {stratégie: setups} (ou une liste / ParamSpace, comme
+    backtester.run_backtests), sur un actif ou un panel de tickers.
+    history : données de préchauffage (Series, DataFrame OHLCV, panel ou MarketData).
+    """
+
+    def __init__(self, setups, history):
+        by_strategy = backtester.runnable_setups(setups, history)
+        skipped = [s for s in by_strategy if s not in LIVE_STRATEGIES]
+        if skipped:
+            print(f"Stratégies ignorées (pas de version incrémentale) : {skipped}")
+        names = [s for s in by_strategy if s in LIVE_STRATEGIES]
+        data = backtester.market_data(history, names)
+        self.tickers = data.tickers
+        self.indicators = LiveIndicators(len(self.tickers or [0]), data.fields)
+        self.plans = []
+        for strat_name in names:
+            signal_names = backtester.signal_param_names(strategies.STRATEGY_FUNCS[strat_name])
+            keys, setup_signal, rows = {}, [], []
+            for setup in by_strategy[strat_name]:
+                key, _ = backtester.split_setup(setup, signal_names)
+                setup_signal.append(keys.setdefault(key, len(keys)))
+                rows.append(setup)
+            if not rows:
+                continue
+            builder = LIVE_STRATEGIES[strat_name]
+            specs = [builder(self.indicators, **dict(key)) for key in keys]
+            params = pd.DataFrame(rows)
+            params.insert(0, "strategy", strat_name)
+            self.plans.append((params, np.asarray(setup_signal), specs))
+        self.entries = self.exits = None
+        self.last_date = None
+        self.extend(data)
+
+    @property
+    def n_setups(self):
+        return sum(len(params) for params, _, _ in self.plans)
+
+    def extend(self, price_data):
+        """Ajoute plusieurs barres (mêmes formats que history) ; signaux évalués sur la dernière."""
+        data = backtester.market_data(price_data)
+        fields = self.indicators.fields
+        for i in range(len(data)):
+            self.indicators.update({f: data.values[data.fields.index(f), i] for f in fields})
+        if len(data):
+            self.last_date = data.index[-1]
+            self._evaluate()
+        return self
+
+    def update(self, bar):
+        """
+        Ajoute une barre et réévalue les signaux. bar : {champ: valeur} ou Series indexée par
+        champ (un actif) ou par (champ, ticker) (ligne d'un panel, ex : panel.iloc[-1]).
+        """
+        values = {}
+        for field in self.indicators.fields:
+            value = bar[field]
+            if isinstance(value, pd.Series):
+                value = value.reindex(self.tickers)
+            values[field] = np.asarray(value, dtype=np.float64).reshape(-1)
+        self.indicators.update(values)
+        self.last_date = getattr(bar, "name", None)
+        self._evaluate()
+        return self
+
+    def _evaluate(self):
+        """Signaux bruts de la barre courante : (n_setups, n_tickers) entrées / sorties."""
+        entries, exits = [], []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for _, setup_signal, specs in self.plans:
+                signals = [func(*args) for func, args in specs]
+                entries.append(np.stack([e for e, _ in signals])[setup_signal])
+                exits.append(np.stack([x for _, x in signals])[setup_signal])
+        n = len(self.tickers or [0])
+        self.entries = np.concatenate(entries) if entries else np.empty((0, n), dtype=bool)
+        self.exits = np.concatenate(exits) if exits else np.empty((0, n), dtype=bool)
+
+    def signals(self, active=False):
+        """
+        DataFrame une ligne par setup (et par ticker pour un panel) : stratégie, paramètres,
+        entry / exit de la barre courante. active=True : seulement les lignes avec un signal.
+        """
+        params = pd.concat([p for p, _, _ in self.plans], ignore_index=True) if self.plans else pd.DataFrame()
+        if self.tickers is None:
+            frame = params.assign(entry=self.entries[:, 0], exit=self.exits[:, 0])
+        else:
+            n = len(self.tickers)
+            frame = params.loc[params.index.repeat(n)].reset_index(drop=True)
+            frame.insert(1, "ticker", np.tile(np.asarray(self.tickers, dtype=object), len(params)))
+            frame["entry"] = self.entries.reshape(-1)
+            frame["exit"] = self.exits.reshape(-1)
+        if active:
+            frame = frame[frame["entry"] | frame["exit"]].reset_index(drop=True)
+        return frame
@@ -5,6 +5,10 @@ import strategies
 import context
 import backtester
 import results_analyzer
+import search
+import profiling
+from result_sink import ResultSink
+from result_store import ResultStore
 
 def main():
     print("=== VECTORBT BACKTESTER ===")
@@ -12,32 +16,51 @@ def main():
     print(f"Période : {config.START_DATE} -> {config.END_DATE}")
 
     # Charger les données
-    price_data = backtester.load_data(
-        ticker=config.TICKER,
-        start=config.START_DATE,
-        end=config.END_DATE
-    )
-
-    # Détection du contexte de tendance
-    trend_labels = context.detect_trend(price_data["Close"])
-
-    # Générer les setups à backtester
-    setups = strategies.generate_setups()
-
-    # Lancer les backtests
-    results = backtester.run_backtests(
-        price_data=price_data,
-        setups=setups,
-        trend_labels=trend_labels,
-        config=config
-    )
+    with profiling.stage("data_load"):
+        price_data = backtester.load_data(
+            ticker=config.TICKER,
+            start=config.START_DATE,
+            end=config.END_DATE
+        )
+
+    # Détection du contexte de marché (schéma de config.REGIME_SCHEME, voir regimes.py)
+    with profiling.stage("trend_detection"):
+        trend_labels = context.detect_regime(price_data, config)
+
+    if config.SEARCH_MODE != "grid":
+        # Recherche guidée (random / successive halving / TPE) au lieu du produit cartésien
+        with profiling.stage("search"):
+            results = search.run_search(price_data, config)
+    else:
+        # Générer les setups à backtester (espace de paramètres propre à chaque stratégie)
+        with profiling.stage("setup_generation"):
+            setups = strategies.generate_strategy_setups()
+
+        # Lancer les backtests (écriture en flux si RESULTS_PARQUET est défini,
+        # reprise des setups déjà calculés si RESULTS_STORE est défini)
+        sink = ResultSink(config.RESULTS_PARQUET) if config.RESULTS_PARQUET else None
+        store = ResultStore(config.RESULTS_STORE) if config.RESULTS_STORE else None
+        with profiling.stage("backtests"):
+            results = backtester.run_backtests(
+                price_data=price_data,
+                setups=setups,
+                trend_labels=trend_labels,
+                config=config,
+                batched=config.BATCHED,
+                workers=config.WORKERS,
+                sink=sink,
+                store=store
+            )
+        if store is not None:
+            store.close()
 
     # Analyse et export des résultats
-    results_analyzer.analyze_and_export(results)
+    with profiling.stage("export"):
+        results_analyzer.analyze_and_export(results, price_data, trend_labels)
 
     print("=== FINISHED ===")
 
-from walkforward import walkforward_validate
+from walkforward import walkforward_validate, walkforward_optimize
 
 def main_walkforward():
     print("=== VECTORBT WALKFORWARD BACKTESTER ===")
@@ -45,52 +68,110 @@ def main_walkforward():
     print(f"Période : {config.START_DATE} -> {config.END_DATE}")
 
     # Charger les données
-    price_data = backtester.load_data(
-        ticker=config.TICKER,
-        start=config.START_DATE,
-        end=config.END_DATE
-    )
-
-    # Préparer les fonctions de stratégie
-    strategy_funcs = {
-        'ma_crossover': strategies.ma_crossover,
-        'rsi_pullback': strategies.rsi_pullback,
-        # Ajoute ici d'autres stratégies si tu veux
-    }
-
-    # Préparer la grille de paramètres (exemple simple)
-    param_grid = {
-        'ma_crossover': [
-            {'ma_short': 20, 'ma_long': 200, 'sl_pct': 0.01, 'tp_pct': 0.02},
-            {'ma_short': 50, 'ma_long': 200, 'sl_pct': 0.015, 'tp_pct': 0.03},
-            # Tu peux en générer plus si besoin !
-        ],
-        'rsi_pullback': [
-            {'rsi': 35, 'ma_long': 200, 'sl_pct': 0.01, 'tp_pct': 0.02},
-            # Idem, à compléter si tu veux
-        ],
-    }
+    with profiling.stage("data_load"):
+        price_data = backtester.load_data(
+            ticker=config.TICKER,
+            start=config.START_DATE,
+            end=config.END_DATE
+        )
+
+    # Grille de chaque stratégie du registre (plages de config.STRATEGY_PARAMS + SL / TP),
+    # sans les stratégies dont une entrée manque dans les données
+    with profiling.stage("setup_generation"):
+        spaces = backtester.runnable_setups(strategies.generate_strategy_setups(), price_data)
+        param_grid = {strat_name: space.dicts() for strat_name, space in spaces.items()}
+    strategy_funcs = {strat_name: strategies.STRATEGY_FUNCS[strat_name] for strat_name in param_grid}
 
     # Lancer la validation walk-forward
-    results = walkforward_validate(
-        price_data=price_data,
-        strategy_funcs=strategy_funcs,
-        param_grid=param_grid,
-        window_size=500,
-        test_size=100,
-        min_trades=15
-    )
+    with profiling.stage("walkforward_validate"):
+        results = walkforward_validate(
+            price_data=price_data,
+            strategy_funcs=strategy_funcs,
+            param_grid=param_grid,
+            window_size=500,
+            test_size=100,
+            min_trades=15,
+            workers=config.WORKERS
+        )
 
     print("=== RÉSULTATS WALK-FORWARD ===")
     print(results.head(10))
-    results.to_csv('results/walkforward_results.csv', index=False)
+    with profiling.stage("export"):
+        results.to_csv('results/walkforward_results.csv', index=False)
     print("Résultats walk-forward exportés dans results/walkforward_results.csv")
+
+    # Optimisation in-sample par fenêtre, évaluation OOS des top-K
+    with profiling.stage("walkforward_optimize"):
+        selections, oos_equity = walkforward_optimize(
+            price_data=price_data,
+            strategy_funcs=strategy_funcs,
+            param_grid=param_grid,
+            window_size=500,
+            test_size=100,
+            min_trades=15,
+            objective=config.WF_OBJECTIVE,
+            top_k=config.WF_TOP_K,
+            anchored=config.WF_ANCHORED,
+            workers=config.WORKERS
+        )
+    with profiling.stage("export"):
+        selections.to_csv('results/walkforward_selections.csv', index=False)
+        oos_equity.rename("equity").to_csv('results/walkforward_oos_equity.csv')
+    if not oos_equity.empty:
+        print(f"Capital OOS final : {oos_equity.iloc[-1]:.3f}")
+    print("Sélections et courbe OOS exportées dans results/walkforward_selections.csv / walkforward_oos_equity.csv")
     print("=== FINISHED WALK-FORWARD ===")
 
+def main_universe():
+    print("=== VECTORBT BACKTESTER (UNIVERS) ===")
+    tickers = backtester.read_tickers(config.TICKERS_FILE or config.TICKERS)
+    print(f"Actifs : {len(tickers)}")
+    print(f"Période : {config.START_DATE} -> {config.END_DATE}")
+
+    # Charger toutes les données en un seul panel aligné (champ, ticker), ou mappé en mémoire
+    # depuis le disque pour les univers intraday (config.MEMMAP_DIR)
+    load = backtester.load_market_data if config.MEMMAP_DIR else backtester.load_universe
+    with profiling.stage("data_load"):
+        panel = load(
+            tickers=tickers,
+            start=config.START_DATE,
+            end=config.END_DATE
+        )
+
+    # Générer les setups à backtester (espace de paramètres propre à chaque stratégie)
+    with profiling.stage("setup_generation"):
+        setups = strategies.generate_strategy_setups()
+
+    # Lancer les backtests : tous les tickers dans la même passe vectorisée
+    store = ResultStore(config.RESULTS_STORE) if config.RESULTS_STORE else None
+    with profiling.stage("backtests"):
+        results = backtester.run_backtests(
+            price_data=panel,
+            setups=setups,
+            trend_labels=None,
+            config=config,
+            batched=True,
+            workers=config.WORKERS,
+            store=store
+        )
+    if store is not None:
+        store.close()
+
+    # Classements par ticker et agrégés
+    with profiling.stage("export"):
+        results_analyzer.analyze_universe(results)
+
+    print("=== FINISHED ===")
+
 if __name__ == "__main__":
-    main()
-    print("\n=== Lancement automatique du pipeline WALK-FORWARD ===")
-    main_walkforward()
+    if config.TICKERS or config.TICKERS_FILE:
+        main_universe()
+    else:
+        main()
+        print("\n=== Lancement automatique du pipeline WALK-FORWARD ===")
+        main_walkforward()
+    # Temps par étape / stratégie et compteurs (config.PROFILE), trace Chrome si PROFILE_TRACE
+    profiling.report(config.PROFILE_TRACE)
 
 # Pour lancer le pipeline classique : python main.py
 # Pour lancer la version walk-forward : ajoute à la fin du fichier :
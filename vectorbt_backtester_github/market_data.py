@@ -0,0 +1,196 @@
+"""
+market_data.py
+
+Conteneur de données de marché : les champs OHLCV sont copiés UNE fois dans un buffer float64
+contigu (champ, barre, ticker) ; tout le reste (stratégies, indicateurs, fenêtres de
+walk-forward, workers) travaille sur des vues de ce buffer, sans conversion ni copie.
+- series(champ) : Series (un actif) ou DataFrame barres x tickers (panel) sans copie, toujours
+  le même objet pour un même champ (le cache d'indicateurs, indexé par identité, reste valable) ;
+- window(start, stop) : MarketData d'une plage de barres, vue du même buffer (mémorisée) ;
+- values / index : buffer et index bruts (mise en mémoire partagée, voir parallel.py) ;
+- save(dossier) / MarketData.open(dossier) : buffer sur disque (values.npy), relu mappé en
+  mémoire : seules les pages lues (fenêtres de barres) sont chargées. write_store construit un
+  tel dossier ticker par ticker, pour les univers intraday qui ne tiennent pas en RAM.
+
+Usage :
+    from market_data import MarketData
+
+    data = MarketData.from_frame(price_data)          # Series, DataFrame OHLCV ou panel (champ, ticker)
+    close = data.close                                # Series sans copie
+    high = data.series("High")
+    train = data.window(0, 500)                       # vue des 500 premières barres
+    data.save("cache/memmap/rxl")                     # puis MarketData.open("cache/memmap/rxl")
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+class MarketData:
+    """
+    Buffer OHLCV (n_champs, n_barres, n_tickers) float64 C-contigu + index.
+    tickers=None : un seul actif (les champs sont des Series), sinon panel (DataFrames).
+    path : dossier d'origine si le buffer est mappé en mémoire (voir open), sinon None.
+    """
+
+    def __init__(self, values, index, fields, tickers=None, path=None):
+        self.values = values
+        self.index = index
+        self.fields = tuple(fields)
+        self.tickers = tickers
+        self.path = path
+        self._position = {field: i for i, field in enumerate(self.fields)}
+        self._series = {}
+        self._windows = {}
+
+    @classmethod
+    def from_frame(cls, price_data, fields=None):
+        """
+        Construit le conteneur (une copie, la seule) à partir d'une Series de clôtures, d'un
+        DataFrame OHLCV ou d'un panel à colonnes (champ, ticker) (voir backtester.load_universe).
+        fields : champs à garder (défaut : tous les champs de FIELDS présents).
+        """
+        if isinstance(price_data, MarketData):
+            return price_data if fields is None else price_data.select(fields)
+        if isinstance(price_data, pd.Series):
+            frames, tickers = {"Close": price_data.to_frame()}, None
+        elif isinstance(price_data.columns, pd.MultiIndex):
+            present = price_data.columns.get_level_values(0)
+            frames = {f: price_data[f] for f in FIELDS if f in present}
+            tickers = list(frames["Close"].columns)
+        else:
+            frames = {f: price_data[[f]] for f in FIELDS if f in price_data.columns}
+            tickers = None
+        if fields is not None:
+            frames = {f: frames[f] for f in fields if f in frames}
+        values = np.empty((len(frames), len(price_data), len(tickers or [0])), dtype=np.float64)
+        for i, frame in enumerate(frames.values()):
+            values[i] = frame.to_numpy(dtype=np.float64)
+        return cls(values, price_data.index, frames, tickers)
+
+    @classmethod
+    def open(cls, path):
+        """Relit un dossier écrit par save / write_store, buffer mappé en mémoire (lecture seule)."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+        index = np.load(os.path.join(path, "index.npy"))
+        if meta["index"]["kind"] == "datetime":
+            index = pd.DatetimeIndex(index.view(f"M8[{meta['index']['unit']}]"), name=meta["index"]["name"])
+            if meta["index"]["tz"] is not None:
+                index = index.tz_localize("UTC").tz_convert(meta["index"]["tz"])
+        else:
+            index = pd.Index(index, name=meta["index"]["name"])
+        return cls(values, index, meta["fields"], meta["tickers"], path=path)
+
+    def save(self, path):
+        """Écrit le conteneur dans le dossier 'path' (values.npy, index.npy, meta.json), voir open."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "values.npy"), self.values)
+        _write_meta(path, self.index, self.fields, self.tickers)
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def __contains__(self, field):
+        return field in self._position
+
+    def field(self, name):
+        """Vue numpy (n_barres,) pour un actif, (n_barres, n_tickers) pour un panel."""
+        array = self.values[self._position[name]]
+        return array[:, 0] if self.tickers is None else array
+
+    def series(self, name):
+        """Series / DataFrame pandas du champ, vue du buffer (même objet à chaque appel)."""
+        if name not in self._series:
+            array = self.field(name)
+            if self.tickers is None:
+                self._series[name] = pd.Series(array, index=self.index, name=name, copy=False)
+            else:
+                self._series[name] = pd.DataFrame(array, index=self.index, columns=self.tickers, copy=False)
+        return self._series[name]
+
+    @property
+    def close(self):
+        return self.series("Close")
+
+    def select(self, fields):
+        """
+        Conteneur réduit aux champs 'fields' présents (copie de ces seuls champs). Un buffer
+        mappé en mémoire est renvoyé tel quel : les champs inutiles restent sur disque.
+        """
+        kept = [f for f in fields if f in self._position]
+        if tuple(kept) == self.fields or self.path is not None:
+            return self
+        values = np.ascontiguousarray(self.values[[self._position[f] for f in kept]])
+        return MarketData(values, self.index, kept, self.tickers)
+
+    def window(self, start, stop=None):
+        """
+        Plage de barres [start, stop) (indices négatifs acceptés), sans copie.
+        Mémorisée : une même plage renvoie le même objet (et donc les mêmes Series).
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if (start, stop) == (0, len(self)):
+            return self
+        if (start, stop) not in self._windows:
+            self._windows[(start, stop)] = MarketData(
+                self.values[:, start:stop], self.index[start:stop], self.fields, self.tickers
+            )
+        return self._windows[(start, stop)]
+
+    def to_frame(self):
+        """DataFrame pandas (copie), au format de from_frame."""
+        if self.tickers is None:
+            if self.fields == ("Close",):
+                return self.close.copy()
+            return pd.DataFrame({f: self.field(f) for f in self.fields}, index=self.index)
+        return pd.concat({f: self.series(f) for f in self.fields}, axis=1)
+
+    def __repr__(self):
+        tickers = "1 actif" if self.tickers is None else f"{len(self.tickers)} tickers"
+        return f"MarketData({len(self)} barres, {tickers}, champs={list(self.fields)})"
+
+def _write_meta(path, index, fields, tickers):
+    """Écrit index.npy et meta.json (écrit en dernier : marque un dossier complet)."""
+    if isinstance(index, pd.DatetimeIndex):
+        np.save(os.path.join(path, "index.npy"), index.asi8)
+        info = {"kind": "datetime", "unit": index.unit, "tz": None if index.tz is None else str(index.tz)}
+    else:
+        np.save(os.path.join(path, "index.npy"), np.asarray(index))
+        info = {"kind": "raw"}
+    info["name"] = index.name
+    meta = {"fields": list(fields), "tickers": None if tickers is None else list(tickers), "index": info}
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def write_store(path, tickers, load, fields=FIELDS):
+    """
+    Construit un panel mappé en mémoire (format de MarketData.save) sans jamais charger tout
+    l'univers : load(ticker) renvoie le DataFrame OHLCV d'un ticker (vide = ticker ignoré).
+    Deux passes : index commun (union des dates), puis écriture de chaque ticker dans sa colonne.
+    Renvoie MarketData.open(path).
+    """
+    index, kept = None, []
+    for ticker in tickers:
+        frame = load(ticker)
+        if frame.empty:
+            continue
+        kept.append(ticker)
+        index = frame.index if index is None else index.union(frame.index)
+    if not kept:
+        raise ValueError("Aucune donnée pour les tickers demandés")
+    os.makedirs(path, exist_ok=True)
+    values = np.lib.format.open_memmap(os.path.join(path, "values.npy"), mode="w+", dtype=np.float64,
+                                       shape=(len(fields), len(index), len(kept)))
+    for j, ticker in enumerate(kept):
+        frame = load(ticker).reindex(index)
+        for i, field in enumerate(fields):
+            values[i, :, j] = frame[field].to_numpy(dtype=np.float64)
+    values.flush()
+    del values
+    _write_meta(path, index, fields, kept)
+    return MarketData.open(path)
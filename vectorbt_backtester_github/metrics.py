@@ -0,0 +1,341 @@
+"""
+metrics.py
+
+Métriques de performance calculées directement depuis les rendements et les trades d'un Portfolio
+vectorbt, vectorisées sur toutes les colonnes (un setup par colonne) : remplace pf.stats(),
+qui calcule des dizaines de métriques et construit une Series pandas par setup.
+
+L'annualisation se base sur le calendrier réel de l'index (années écoulées, barres par an),
+pas sur une fréquence fixe : le CAGR est donc correct en données journalières de bourse
+(~252 barres/an) comme en intraday (1m, 5m, 1h : séances et week-ends pris en compte).
+Sans index daté, les barres par an viennent du timeframe (bars_per_year).
+
+Historiques trop longs pour la mémoire (voir backtester.run_strategy_chunked) : StreamingInputs
+accumule les mêmes métriques tranche par tranche (moments des rendements, capital et plus haut
+courants, trades clos), sans garder les rendements.
+
+Usage :
+    import metrics
+
+    values = metrics.compute_metrics(pf, ["trades", "cagr", "sharpe", "max_dd", "pf"])
+    values["sharpe"]   # tableau numpy, une valeur par colonne du portfolio
+
+Métriques disponibles : voir METRIC_FUNCS.
+
+Par contexte de marché (1 = uptrend, 0 = range, -1 = downtrend, voir context.py) :
+    values = metrics.compute_context_metrics(pf, trend_labels, ["trades", "cagr", "max_dd"])
+    values["cagr"]     # tableau (n_colonnes, n_contextes), à partir d'UNE seule simulation
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+DEFAULT_METRICS = ["trades", "cagr", "sharpe", "max_dd", "pf"]
+CONTEXTS = (1, 0, -1)
+
+# Valeur de remplacement des NaN (comme safe_stat dans backtester.py), 0 par défaut
+FALLBACKS = {"max_dd": -1}
+
+# Calendrier de bourse utilisé quand l'index n'est pas daté : séances par an, minutes par séance
+TRADING_DAYS = 252
+SESSION_MINUTES = 390
+
+# Unités des timeframes (notation Yahoo : 1m, 5m, 1h, 1d, 1wk, 1mo) : (fréquence pandas, minutes)
+TIMEFRAME_UNITS = {
+    "m": ("min", 1),
+    "h": ("h", 60),
+    "d": ("D", SESSION_MINUTES),
+    "wk": ("W", 5 * SESSION_MINUTES),
+    "mo": ("MS", 21 * SESSION_MINUTES),
+}
+
+def _parse_timeframe(timeframe):
+    match = re.fullmatch(r"(\d*)(mo|wk|m|h|d)", str(timeframe).lower())
+    if match is None:
+        raise ValueError(f"Timeframe inconnu : {timeframe} (ex : 1m, 5m, 1h, 1d, 1wk)")
+    return int(match.group(1) or 1), match.group(2)
+
+def timeframe_freq(timeframe):
+    """Fréquence pandas d'un timeframe ('5m' -> '5min', '1d' -> '1D'), passée à vectorbt (freq)."""
+    count, unit = _parse_timeframe(timeframe)
+    return f"{count}{TIMEFRAME_UNITS[unit][0]}"
+
+def bars_per_year(timeframe):
+    """Barres par an d'un timeframe sur le calendrier de bourse ('1d' -> 252, '1m' -> 98 280)."""
+    count, unit = _parse_timeframe(timeframe)
+    bar_minutes = count * TIMEFRAME_UNITS[unit][1]
+    return TRADING_DAYS * SESSION_MINUTES / bar_minutes
+
+def years_between(index, timeframe="1d"):
+    """Nombre d'années calendaires couvertes par l'index (au moins une barre)."""
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        return max((index[-1] - index[0]) / pd.Timedelta(days=365.25), 1e-9)
+    return max(len(index), 1) / bars_per_year(timeframe)
+
+def periods_per_year(index, timeframe="1d"):
+    """Nombre moyen de barres par an, estimé depuis l'index (bars_per_year(timeframe) par défaut)."""
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        return (len(index) - 1) / years_between(index)
+    return bars_per_year(timeframe)
+
+class MetricInputs:
+    """
+    Données brutes partagées par toutes les métriques (calculées une seule fois, à la demande) :
+    - returns : rendements par barre, tableau (n_barres, n_colonnes)
+    - trade_col / trade_pnl : colonne et PnL de chaque trade (records vectorbt)
+    - index : index temporel, pour l'annualisation
+    - years / ppy : durée en années et barres par an, par colonne (scalaires ou tableaux) ;
+      par défaut déduits de l'index. Utile quand les colonnes couvrent des périodes différentes
+      (fenêtres walk-forward empilées).
+    """
+
+    def __init__(self, returns, trade_col, trade_pnl, index, years=None, ppy=None):
+        self.returns = np.nan_to_num(np.asarray(returns, dtype=float).reshape(len(index), -1))
+        self.n_cols = self.returns.shape[1]
+        self.trade_col = np.asarray(trade_col, dtype=np.int64)
+        self.trade_pnl = np.asarray(trade_pnl, dtype=float)
+        self.index = index
+        self.years = years_between(index) if years is None else np.asarray(years, dtype=float)
+        self.ppy = periods_per_year(index) if ppy is None else np.asarray(ppy, dtype=float)
+        self._cache = {}
+
+    @classmethod
+    def from_portfolio(cls, pf, years=None, ppy=None):
+        records = pf.trades.values
+        return cls(pf.returns().values, records["col"], records["pnl"], pf.wrapper.index, years, ppy)
+
+    def _get(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    def per_col(self, weights):
+        """Somme par colonne d'une valeur par trade."""
+        return np.bincount(self.trade_col, weights=weights, minlength=self.n_cols)
+
+    @property
+    def trade_count(self):
+        return self._get("trade_count", lambda: np.bincount(self.trade_col, minlength=self.n_cols).astype(float))
+
+    @property
+    def equity(self):
+        """Courbe de capital normalisée (1 au départ)."""
+        return self._get("equity", lambda: np.cumprod(1 + self.returns, axis=0))
+
+    @property
+    def final_equity(self):
+        return self.equity[-1]
+
+    @property
+    def total_return(self):
+        return self._get("total_return", lambda: self.final_equity - 1)
+
+    @property
+    def cagr(self):
+        return self._get("cagr", lambda: np.power(np.maximum(self.final_equity, 0), 1 / self.years) - 1)
+
+    @property
+    def max_drawdown(self):
+        def compute():
+            equity = self.equity
+            return np.min(equity / np.maximum.accumulate(equity, axis=0) - 1, axis=0)
+        return self._get("max_dd", compute)
+
+    @property
+    def mean_std(self):
+        def compute():
+            if self.returns.shape[0] < 2:
+                nan = np.full(self.n_cols, np.nan)
+                return nan, nan
+            return self.returns.mean(axis=0), self.returns.std(axis=0, ddof=1)
+        return self._get("mean_std", compute)
+
+    @property
+    def downside(self):
+        """Écart-type des pertes (racine de la moyenne des rendements négatifs au carré)."""
+        return self._get("downside", lambda: np.sqrt(np.mean(np.minimum(self.returns, 0) ** 2, axis=0)))
+
+class StreamingInputs(MetricInputs):
+    """
+    MetricInputs accumulé tranche par tranche (update), pour les historiques qui ne tiennent pas
+    en mémoire : seuls des agrégats par colonne sont gardés (nb de barres, moyenne et M2 des
+    rendements, somme des pertes au carré, capital et plus haut courants, pire drawdown)
+    ainsi que les trades clos. years / ppy : ceux de l'historique complet.
+    """
+
+    def __init__(self, n_cols, years, ppy):
+        self.n_cols = n_cols
+        self.years = np.asarray(years, dtype=float)
+        self.ppy = np.asarray(ppy, dtype=float)
+        self.trade_col = np.empty(0, dtype=np.int64)
+        self.trade_pnl = np.empty(0, dtype=float)
+        self.n_bars = 0
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.down_sq = np.zeros(n_cols)
+        self.equity_end = np.ones(n_cols)
+        self.peak = np.full(n_cols, -np.inf)
+        self.worst_dd = np.full(n_cols, np.inf)
+        self._cache = {}
+
+    def update(self, returns, trade_col, trade_pnl):
+        """Ajoute les rendements d'une tranche (n_barres, n_colonnes) et ses trades."""
+        returns = np.nan_to_num(np.asarray(returns, dtype=float).reshape(-1, self.n_cols))
+        n = len(returns)
+        if n:
+            # Fusion des moyennes / M2 (Chan et al.) : même variance que sur la série complète
+            mean = returns.mean(axis=0)
+            delta = mean - self.mean
+            total = self.n_bars + n
+            self.m2 += ((returns - mean) ** 2).sum(axis=0) + delta ** 2 * self.n_bars * n / total
+            self.mean += delta * n / total
+            self.n_bars = total
+            self.down_sq += (np.minimum(returns, 0) ** 2).sum(axis=0)
+            equity = self.equity_end * np.cumprod(1 + returns, axis=0)
+            peak = np.maximum(self.peak, np.maximum.accumulate(equity, axis=0))
+            self.worst_dd = np.minimum(self.worst_dd, np.min(equity / peak - 1, axis=0))
+            self.equity_end, self.peak = equity[-1], peak[-1]
+        self.trade_col = np.concatenate([self.trade_col, np.asarray(trade_col, dtype=np.int64)])
+        self.trade_pnl = np.concatenate([self.trade_pnl, np.asarray(trade_pnl, dtype=float)])
+        self._cache = {}
+
+    @property
+    def final_equity(self):
+        return self.equity_end
+
+    @property
+    def max_drawdown(self):
+        return self.worst_dd
+
+    @property
+    def mean_std(self):
+        if self.n_bars < 2:
+            nan = np.full(self.n_cols, np.nan)
+            return nan, nan
+        return self.mean, np.sqrt(self.m2 / (self.n_bars - 1))
+
+    @property
+    def downside(self):
+        return np.sqrt(self.down_sq / max(self.n_bars, 1))
+
+def _safe_ratio(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den != 0, num / np.where(den != 0, den, 1), np.nan)
+
+def _trades(m):
+    return m.trade_count
+
+def _win_rate(m):
+    return _safe_ratio(m.per_col((m.trade_pnl > 0).astype(float)), m.trade_count)
+
+def _profit_factor(m):
+    gains = m.per_col(np.where(m.trade_pnl > 0, m.trade_pnl, 0))
+    losses = -m.per_col(np.where(m.trade_pnl < 0, m.trade_pnl, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(losses > 0, gains / np.where(losses > 0, losses, 1), np.where(gains > 0, np.inf, np.nan))
+
+def _expectancy(m):
+    return _safe_ratio(m.per_col(m.trade_pnl), m.trade_count)
+
+def _total_return(m):
+    return m.total_return
+
+def _cagr(m):
+    return m.cagr
+
+def _volatility(m):
+    return m.mean_std[1] * np.sqrt(m.ppy)
+
+def _sharpe(m):
+    mean, std = m.mean_std
+    return _safe_ratio(mean, std) * np.sqrt(m.ppy)
+
+def _sortino(m):
+    return _safe_ratio(m.mean_std[0], m.downside) * np.sqrt(m.ppy)
+
+def _max_dd(m):
+    return m.max_drawdown
+
+def _calmar(m):
+    return _safe_ratio(m.cagr, np.abs(m.max_drawdown))
+
+METRIC_FUNCS = {
+    "trades": _trades,
+    "win_rate": _win_rate,
+    "pf": _profit_factor,
+    "expectancy": _expectancy,
+    "total_return": _total_return,
+    "cagr": _cagr,
+    "volatility": _volatility,
+    "sharpe": _sharpe,
+    "sortino": _sortino,
+    "max_dd": _max_dd,
+    "calmar": _calmar,
+}
+
+def compute_metrics(pf, names=None, fill=True, years=None, ppy=None):
+    """
+    Calcule les métriques demandées pour toutes les colonnes du portfolio.
+    Renvoie {nom: tableau numpy (n_colonnes,)}. Avec fill=True, les NaN sont remplacés
+    par FALLBACKS (0 par défaut). Les infinis (ex : PF sans trade perdant) sont conservés.
+    years / ppy : voir MetricInputs.
+    """
+    inputs = pf if isinstance(pf, MetricInputs) else MetricInputs.from_portfolio(pf, years, ppy)
+    out = {}
+    for name in names or DEFAULT_METRICS:
+        if name not in METRIC_FUNCS:
+            raise ValueError(f"Métrique inconnue : {name} (disponibles : {list(METRIC_FUNCS)})")
+        values = np.asarray(METRIC_FUNCS[name](inputs), dtype=float)
+        if fill:
+            values = np.where(np.isnan(values), FALLBACKS.get(name, 0), values)
+        out[name] = values
+    return out
+
+def context_inputs(pf, labels, contexts=CONTEXTS):
+    """
+    Découpe une simulation par contexte, sans la relancer : pour chaque contexte, MetricInputs
+    limité aux barres de ce contexte (rendements et courbe de capital recollés) et aux trades
+    ouverts dans ce contexte. labels : un label par barre (commun à toutes les colonnes).
+    L'annualisation garde les barres par an de l'historique complet, la durée est la fraction
+    d'années passée dans le contexte. Renvoie {contexte: MetricInputs, ou None si aucune barre}.
+    """
+    labels = np.asarray(labels)
+    records = pf.trades.values
+    returns = np.asarray(pf.returns().values, dtype=float)
+    returns = returns.reshape(len(labels), -1)
+    index = pf.wrapper.index
+    years = years_between(index)
+    ppy = periods_per_year(index)
+    trade_ctx = labels[records["entry_idx"]]
+    out = {}
+    for ctx in contexts:
+        mask = labels == ctx
+        if not mask.any():
+            out[ctx] = None
+            continue
+        in_ctx = trade_ctx == ctx
+        out[ctx] = MetricInputs(
+            returns[mask], records["col"][in_ctx], records["pnl"][in_ctx], index[mask],
+            years=years * mask.mean(), ppy=ppy
+        )
+    return out
+
+def compute_context_metrics(pf, labels, names=None, contexts=CONTEXTS, fill=True):
+    """
+    Métriques par contexte à partir d'une seule simulation (voir context_inputs).
+    Renvoie {nom: tableau (n_colonnes, n_contextes)}, contextes dans l'ordre de 'contexts'.
+    Un contexte sans aucune barre donne des NaN (remplacés par FALLBACKS si fill=True).
+    """
+    n_cols = pf.wrapper.shape_2d[1]
+    per_ctx = []
+    for inputs in context_inputs(pf, labels, contexts).values():
+        if inputs is None:
+            values = {
+                name: np.full(n_cols, FALLBACKS.get(name, 0) if fill else np.nan, dtype=float)
+                for name in names or DEFAULT_METRICS
+            }
+        else:
+            values = compute_metrics(inputs, names, fill=fill)
+        per_ctx.append(values)
+    return {name: np.column_stack([values[name] for values in per_ctx]) for name in per_ctx[0]}
@@ -0,0 +1,159 @@
+"""
+parallel.py
+
+Exécution parallèle des backtests sur un pool de processus.
+- Les données prix sont placées UNE fois en mémoire partagée (multiprocessing.shared_memory) :
+  chaque worker s'y attache au démarrage au lieu de recevoir une copie picklée par tâche.
+  Un market_data.MarketData est partagé tel quel (son buffer OHLCV) et reconstruit sans copie ;
+  mappé en mémoire (MarketData.open), seul son dossier est transmis : chaque worker le rouvre
+  et les pages lues sont partagées par le cache du système.
+- Les tâches sont envoyées par paquets (chunks) et les résultats reviennent en flux,
+  dans l'ordre de soumission (résultats déterministes quel que soit le nombre de workers).
+
+Usage :
+    import parallel
+
+    def task(price_data, chunk):        # fonction de niveau module (picklable)
+        ...
+    for res in parallel.imap_chunks(task, chunks, price_data, workers=8):
+        ...
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from market_data import MarketData
+
+# Données partagées vues par le worker courant (initialisées par _init_worker)
+_SHARED = {}
+
+def _to_shm(array):
+    """Copie un tableau numpy dans un segment de mémoire partagée. Renvoie (shm, spec)."""
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+def _from_shm(spec):
+    """Attache un tableau en mémoire partagée (sans copie). Renvoie (shm, array)."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+class SharedPriceData:
+    """
+    Place un DataFrame (ou une Series, ou un MarketData) de prix en mémoire partagée.
+    Valeurs et index (dates) sont stockés en float64 / int64 ; seuls les noms de colonnes
+    et la description des segments sont picklés vers les workers.
+    """
+
+    def __init__(self, price_data):
+        self.is_series = isinstance(price_data, pd.Series)
+        self._segments = []
+        if isinstance(price_data, MarketData) and price_data.path is not None:
+            self.spec = {"mapped": price_data.path}
+            return
+        if isinstance(price_data, MarketData):
+            values, index = price_data.values, price_data.index
+            columns, market = None, (price_data.fields, price_data.tickers)
+        else:
+            frame = price_data.to_frame() if self.is_series else price_data
+            values, index = frame.to_numpy(dtype=np.float64), frame.index
+            columns, market = frame.columns, None
+
+        values_shm, values_spec = _to_shm(values)
+        self._segments.append(values_shm)
+        if isinstance(index, pd.DatetimeIndex):
+            index_shm, index_spec = _to_shm(index.asi8)
+            self._segments.append(index_shm)
+            tz = None if index.tz is None else str(index.tz)
+            index_info = ("datetime", index_spec, (index.unit, tz), index.name)
+        else:
+            index_info = ("raw", index, None, None)
+        self.spec = {
+            "values": values_spec,
+            "index": index_info,
+            "columns": columns,
+            "is_series": self.is_series,
+            "market": market,
+        }
+
+    def close(self):
+        """Libère les segments de mémoire partagée."""
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_price_data(spec):
+    """Reconstruit (sans copie) les données prix à partir de la spec de SharedPriceData."""
+    if "mapped" in spec:
+        return [], MarketData.open(spec["mapped"])
+    segments = []
+    shm, values = _from_shm(spec["values"])
+    segments.append(shm)
+    kind, index_spec, index_meta, index_name = spec["index"]
+    if kind == "datetime":
+        shm, asi8 = _from_shm(index_spec)
+        segments.append(shm)
+        unit, tz = index_meta
+        index = pd.DatetimeIndex(asi8.view(f"M8[{unit}]"), name=index_name)
+        if tz is not None:
+            index = index.tz_localize("UTC").tz_convert(tz)
+    else:
+        index = index_spec
+    if spec["market"] is not None:
+        fields, tickers = spec["market"]
+        return segments, MarketData(values, index, fields, tickers)
+    frame = pd.DataFrame(values, index=index, columns=spec["columns"], copy=False)
+    data = frame.iloc[:, 0] if spec["is_series"] else frame
+    return segments, data
+
+def _init_worker(spec):
+    """Initialiseur du pool : attache les données partagées une fois par worker."""
+    segments, data = attach_price_data(spec)
+    _SHARED["segments"] = segments
+    _SHARED["price_data"] = data
+
+def _run_task(task, chunk):
+    """Exécute 'task' dans le worker, sur les données partagées."""
+    return task(_SHARED["price_data"], chunk)
+
+def chunked(items, chunk_size):
+    """Découpe une liste en paquets de 'chunk_size' éléments."""
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def imap_chunks(task, chunks, price_data, workers=1):
+    """
+    Applique task(price_data, chunk) à chaque chunk et renvoie les résultats en flux,
+    dans l'ordre des chunks.
+    - workers <= 1 : exécution séquentielle dans le processus courant
+    - workers > 1 : pool de processus, price_data en mémoire partagée,
+      au plus 2 chunks en attente par worker (mémoire bornée)
+    'task' doit être une fonction de niveau module (picklable).
+    """
+    if workers is None or workers <= 1:
+        for chunk in chunks:
+            yield task(price_data, chunk)
+        return
+
+    with (
+        SharedPriceData(price_data) as shared,
+        ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                            initargs=(shared.spec,)) as executor,
+    ):
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_run_task, task, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
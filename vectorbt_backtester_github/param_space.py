@@ -0,0 +1,158 @@
+"""
+param_space.py
+
+Espace de paramètres paresseux : produit cartésien de plages (dict {nom: valeurs}) sans
+matérialiser les combinaisons. Une combinaison est retrouvée par arithmétique d'indices
+(np.unravel_index sur les tailles des plages), dans le même ordre que des boucles imbriquées
+(dernier paramètre le plus rapide).
+
+Contraintes (ex : ma_short < ma_long) : fonctions vectorisées qui reçoivent {nom: tableau} et
+renvoient un masque booléen. Elles sont évaluées par blocs de 'block_size' combinaisons ; seul
+le nombre de combinaisons valides par bloc est gardé (accès direct au i-ème setup valide) :
+mémoire et démarrage restent constants quelle que soit la taille de la grille.
+
+Usage :
+    from param_space import ParamSpace
+
+    space = ParamSpace(
+        {"ma_short": range(10, 61, 5), "ma_long": range(80, 241, 20), "sl_pct": [0.01, 0.02]},
+        constraints=[lambda p: p["ma_short"] < p["ma_long"]],
+    )
+    len(space)                   # nb de combinaisons valides
+    space[0]                     # {'ma_short': 10, 'ma_long': 80, 'sl_pct': 0.01}
+    space[100:200]               # liste de dicts (un paquet)
+    for chunk in space.chunks(2000):
+        ...                      # liste de 2000 dicts au plus
+    space.records(0, 10)         # tableau structuré numpy
+"""
+
+import numpy as np
+import pandas as pd
+
+class ParamSpace:
+    """Produit cartésien paresseux de plages de paramètres, filtré par des contraintes vectorisées."""
+
+    def __init__(self, ranges, constraints=(), block_size=1 << 20):
+        self.names = list(ranges)
+        self.values = [np.asarray(list(v)) for v in ranges.values()]
+        self.shape = tuple(len(v) for v in self.values)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        self.constraints = list(constraints)
+        self.block_size = block_size
+        self._offsets = None
+
+    def where(self, constraint):
+        """Nouvel espace avec une contrainte supplémentaire."""
+        ranges = dict(zip(self.names, self.values))
+        return ParamSpace(ranges, self.constraints + [constraint], self.block_size)
+
+    def columns(self, flat):
+        """Valeurs des paramètres pour des indices du produit complet : {nom: tableau}."""
+        if not self.names:
+            return {}
+        positions = np.unravel_index(flat, self.shape)
+        return {name: values[pos] for name, values, pos in zip(self.names, self.values, positions)}
+
+    def _valid_flat(self, start, stop):
+        """Indices (produit complet) des combinaisons valides dans [start, stop)."""
+        flat = np.arange(start, stop, dtype=np.int64)
+        if not self.constraints or not len(flat):
+            return flat
+        cols = self.columns(flat)
+        mask = np.ones(len(flat), dtype=bool)
+        for constraint in self.constraints:
+            mask &= np.asarray(constraint(cols), dtype=bool)
+        return flat[mask]
+
+    @property
+    def offsets(self):
+        """Nombre cumulé de combinaisons valides avant chaque bloc (calculé une fois, par blocs)."""
+        if self._offsets is None:
+            starts = range(0, self.size, self.block_size)
+            counts = [len(self._valid_flat(s, min(s + self.block_size, self.size))) for s in starts]
+            self._offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        return self._offsets
+
+    def __len__(self):
+        if not self.constraints:
+            return self.size
+        return int(self.offsets[-1])
+
+    def flat_range(self, start, stop):
+        """Indices (produit complet) des combinaisons valides numéro start à stop-1."""
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        if not self.constraints:
+            return np.arange(start, stop, dtype=np.int64)
+        offsets = self.offsets
+        block = int(np.searchsorted(offsets, start, side="right")) - 1
+        parts, skip, needed = [], start - offsets[block], stop - start
+        while needed > 0:
+            s = block * self.block_size
+            flat = self._valid_flat(s, min(s + self.block_size, self.size))[skip:skip + needed]
+            parts.append(flat)
+            needed -= len(flat)
+            skip = 0
+            block += 1
+        return np.concatenate(parts)
+
+    def records(self, start=0, stop=None):
+        """Combinaisons valides start à stop-1 en tableau structuré numpy."""
+        flat = self.flat_range(start, len(self) if stop is None else stop)
+        cols = self.columns(flat)
+        out = np.empty(len(flat), dtype=[(name, values.dtype) for name, values in zip(self.names, self.values)])
+        for name, values in cols.items():
+            out[name] = values
+        return out
+
+    def dicts(self, start=0, stop=None):
+        """Combinaisons valides start à stop-1 en liste de dicts (scalaires Python)."""
+        return self._dicts(self.flat_range(start, len(self) if stop is None else stop))
+
+    def _dicts(self, flat):
+        if not self.names:
+            return [{} for _ in flat]
+        cols = self.columns(flat)
+        lists = [cols[name].tolist() for name in self.names]
+        return [dict(zip(self.names, row)) for row in zip(*lists)]
+
+    def frame(self, start=0, stop=None):
+        """Combinaisons valides start à stop-1 en DataFrame."""
+        return pd.DataFrame(self.records(start, stop))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            rows = self.dicts(start, stop)
+            return rows if step == 1 else rows[::step]
+        n = len(self)
+        i = item + n if item < 0 else item
+        if not 0 <= i < n:
+            raise IndexError(f"Indice {item} hors de l'espace ({n} combinaisons)")
+        return self.dicts(i, i + 1)[0]
+
+    def chunks(self, size):
+        """Itère par paquets de 'size' combinaisons (listes de dicts), bloc par bloc."""
+        for flat in self.flat_chunks(size):
+            yield self._dicts(flat)
+
+    def flat_chunks(self, size):
+        """Itère sur les indices (produit complet) par paquets de 'size' combinaisons valides."""
+        pending = np.empty(0, dtype=np.int64)
+        for start in range(0, self.size, self.block_size):
+            flat = self._valid_flat(start, min(start + self.block_size, self.size))
+            pending = np.concatenate([pending, flat]) if len(pending) else flat
+            while len(pending) >= size:
+                yield pending[:size]
+                pending = pending[size:]
+        if len(pending):
+            yield pending
+
+    def __iter__(self):
+        for chunk in self.chunks(self.block_size):
+            yield from chunk
+
+    def __repr__(self):
+        ranges = ", ".join(f"{name}[{len(v)}]" for name, v in zip(self.names, self.values))
+        return f"ParamSpace({ranges}, {len(self)} combinaisons)"
@@ -0,0 +1,88 @@
+"""
+plateau.py
+
+Stabilité des paramètres : un setup dont le PF s'effondre dès qu'on décale un paramètre d'un cran
+est un pic isolé (chance), pas une zone exploitable. Les résultats d'une stratégie sont rangés
+dans un tableau N-D indexé par ses plages de config (strategies.strategy_ranges : ex ma_short,
+ma_long, sl_pct, tp_pct), puis chaque cellule reçoit la moyenne et le minimum de la métrique
+sur son voisinage (cellules adjacentes à 'radius' crans près, sur tous les axes).
+
+Le lissage est un filtre N-D séparable (scipy.ndimage, cellules absentes ignorées : moyenne
+= somme des valeurs / nombre de cellules présentes) : quelques secondes pour des millions de
+cellules, sans recherche de voisins ligne par ligne.
+
+Usage :
+    import plateau
+
+    scored = plateau.add_plateau_scores(results_df, metric="pf", radius=1)
+    scored.nlargest(10, "plateau_pf")      # zones stables, pas pics isolés
+"""
+
+import numpy as np
+from scipy import ndimage
+import strategies
+
+# Colonnes définissant une grille séparée (une par stratégie, ticker et contexte)
+GROUP_COLUMNS = ("strategy", "ticker", "context")
+
+def grid_positions(df, ranges):
+    """
+    Position de chaque ligne dans la grille des plages 'ranges' ({paramètre: valeurs}).
+    Renvoie (axes triés, positions (n_lignes, n_axes), on_grid) : on_grid = lignes dont
+    tous les paramètres tombent sur une valeur de leur plage (les autres n'ont pas de cellule).
+    """
+    axes = [np.unique(np.asarray(values, dtype=float)) for values in ranges.values()]
+    positions = np.zeros((len(df), len(axes)), dtype=np.int64)
+    on_grid = np.ones(len(df), dtype=bool)
+    for i, (name, axis) in enumerate(zip(ranges, axes)):
+        if name not in df.columns:
+            on_grid[:] = False
+            break
+        values = df[name].to_numpy(dtype=float)
+        pos = np.clip(np.searchsorted(axis, values), 0, len(axis) - 1)
+        on_grid &= np.isclose(axis[pos], values)
+        positions[:, i] = pos
+    return axes, positions, on_grid
+
+def smooth(grid, radius=1):
+    """
+    Moyenne et minimum de chaque cellule sur son voisinage (cube de côté 2*radius+1), en ignorant
+    les cellules NaN. Renvoie (mean, min), NaN là où le voisinage est entièrement vide.
+    """
+    size = 2 * radius + 1
+    valid = np.isfinite(grid)
+    total = ndimage.uniform_filter(np.where(valid, grid, 0.0), size=size, mode="constant", cval=0.0)
+    count = ndimage.uniform_filter(valid.astype(float), size=size, mode="constant", cval=0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 1e-12, total / np.where(count > 1e-12, count, 1), np.nan)
+    low = ndimage.minimum_filter(np.where(valid, grid, np.inf), size=size, mode="constant", cval=np.inf)
+    return mean, np.where(np.isfinite(low), low, np.nan)
+
+def add_plateau_scores(results_df, metric="pf", radius=1):
+    """
+    Ajoute plateau_{metric} (moyenne du voisinage) et plateau_{metric}_min (pire voisin) aux
+    résultats : une grille N-D par stratégie (et ticker / contexte), aux plages de
+    strategies.strategy_ranges. Les valeurs non finies (PF infini sans trade perdant) et les
+    setups sans trade ne comptent pas. Une ligne hors grille (paramètre hors plage, ex : recherche
+    aléatoire) n'a pas de voisin : son score est sa propre valeur.
+    """
+    df = results_df.copy()
+    values = df[metric].to_numpy(dtype=float)
+    mean_col, min_col = f"plateau_{metric}", f"plateau_{metric}_min"
+    mean_out, min_out = values.copy(), values.copy()
+    if "trades" in df.columns:
+        # Sans trade, la métrique vaut sa valeur de remplacement (0) : cellule sans information
+        values = np.where(df["trades"].to_numpy(dtype=float) > 0, values, np.nan)
+    keys = [c for c in GROUP_COLUMNS if c in df.columns]
+    for key, index in df.groupby(keys, sort=False).indices.items():
+        strat_name = key[0] if isinstance(key, tuple) else key
+        if strat_name not in strategies.STRATEGY_FUNCS:
+            continue
+        axes, positions, on_grid = grid_positions(df.iloc[index], strategies.strategy_ranges(strat_name))
+        rows, cells = index[on_grid], tuple(positions[on_grid].T)
+        grid = np.full(tuple(len(axis) for axis in axes), np.nan)
+        grid[cells] = values[rows]
+        mean, low = smooth(grid, radius)
+        mean_out[rows], min_out[rows] = mean[cells], low[cells]
+    df[mean_col], df[min_col] = mean_out, min_out
+    return df
@@ -0,0 +1,181 @@
+"""
+profiling.py
+
+Instrumentation légère du pipeline : temps et compteurs par étape (chargement des données,
+contexte, setups, signaux, simulation, métriques, export...) et par stratégie.
+Coût : deux appels à time.perf_counter et une mise à jour de dict par étape mesurée
+(les étapes sont des paquets, pas des barres) : peut rester activé en production.
+Désactivé (config.PROFILE = False), stage() renvoie un contexte vide.
+
+Les workers (parallel.py) mesurent dans leur propre processus : les tâches encapsulent leur
+travail dans collect() et renvoient les mesures, fusionnées dans le profiler principal.
+
+Usage :
+    import profiling
+
+    with profiling.stage("simulation", strategy="rsi_pullback"):
+        ...
+    profiling.count("exceptions", strategy="rsi_pullback")
+    profiling.report()                        # tableau récapitulatif
+    profiling.PROFILER.export_trace("results/trace.json")   # chrome://tracing ou Perfetto
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+import config
+
+MAX_TRACE_EVENTS = 200_000
+
+class Profiler:
+    """
+    Accumule par (étape, stratégie) : nombre d'appels, temps total et max ; et des compteurs.
+    Avec trace=True, garde aussi chaque mesure comme événement Chrome trace
+    (au plus MAX_TRACE_EVENTS).
+    """
+
+    def __init__(self, enabled=True, trace=False):
+        self.enabled = enabled
+        self.trace = trace
+        self.timings = {}
+        self.counters = {}
+        self.events = []
+
+    def stage(self, name, strategy=None):
+        """Contexte qui mesure le temps passé dans l'étape 'name'."""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name, strategy)
+
+    @contextmanager
+    def _stage(self, name, strategy):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add_time(name, strategy, end - start, start)
+
+    def add_time(self, name, strategy, seconds, start=None):
+        """Ajoute une mesure (secondes) à l'étape (name, strategy)."""
+        entry = self.timings.get((name, strategy))
+        if entry is None:
+            self.timings[(name, strategy)] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+        if self.trace and start is not None and len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append({
+                "name": name if strategy is None else f"{name}/{strategy}",
+                "cat": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def count(self, name, n=1, strategy=None):
+        """Incrémente le compteur (name, strategy)."""
+        if self.enabled:
+            key = (name, strategy)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def snapshot(self):
+        """Mesures courantes, picklables (renvoyées par les workers)."""
+        return {"timings": self.timings, "counters": self.counters, "events": self.events}
+
+    def merge(self, snapshot):
+        """Ajoute les mesures d'un autre profiler (worker, collect())."""
+        if not snapshot:
+            return
+        for key, (calls, total, worst) in snapshot["timings"].items():
+            entry = self.timings.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += total
+            entry[2] = max(entry[2], worst)
+        for key, n in snapshot["counters"].items():
+            self.counters[key] = self.counters.get(key, 0) + n
+        room = MAX_TRACE_EVENTS - len(self.events)
+        if self.trace and room > 0:
+            self.events.extend(snapshot["events"][:room])
+
+    def reset(self):
+        self.timings = {}
+        self.counters = {}
+        self.events = []
+
+    def summary(self):
+        """
+        DataFrame récapitulatif, une ligne par (étape, stratégie) : appels, temps total / moyen / max,
+        part du temps total des étapes globales (sans stratégie), puis les compteurs.
+        """
+        rows = [
+            {"stage": name, "strategy": strategy or "", "calls": calls, "total_s": total,
+             "mean_ms": 1000 * total / calls, "max_ms": 1000 * worst}
+            for (name, strategy), (calls, total, worst) in self.timings.items()
+        ]
+        timings = pd.DataFrame(rows, columns=["stage", "strategy", "calls", "total_s", "mean_ms", "max_ms"])
+        top = timings.loc[timings["strategy"] == "", "total_s"].sum()
+        timings["share"] = timings["total_s"] / top if top > 0 else float("nan")
+        counters = pd.DataFrame(
+            [{"counter": name, "strategy": strategy or "", "value": n}
+             for (name, strategy), n in self.counters.items()],
+            columns=["counter", "strategy", "value"]
+        )
+        return timings.sort_values(["strategy", "total_s"], ascending=[True, False]), counters
+
+    def export_trace(self, path):
+        """Écrit les événements au format Chrome trace (JSON), lisible dans chrome://tracing / Perfetto."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+PROFILER = Profiler(enabled=config.PROFILE, trace=config.PROFILE_TRACE is not None)
+
+def stage(name, strategy=None):
+    """Raccourci vers PROFILER.stage."""
+    return PROFILER.stage(name, strategy)
+
+def count(name, n=1, strategy=None):
+    """Raccourci vers PROFILER.count."""
+    PROFILER.count(name, n, strategy)
+
+@contextmanager
+def collect():
+    """
+    Mesure un bloc dans un profiler séparé (worker ou tâche locale) ; le dict produit
+    reçoit le snapshot à la sortie, à fusionner avec merge() dans le processus principal.
+    """
+    global PROFILER
+    outer = PROFILER
+    PROFILER = Profiler(enabled=outer.enabled, trace=outer.trace)
+    out = {}
+    try:
+        yield out
+    finally:
+        out.update(PROFILER.snapshot())
+        PROFILER = outer
+
+def merge(snapshot):
+    """Raccourci vers PROFILER.merge."""
+    PROFILER.merge(snapshot)
+
+def report(trace_path=None):
+    """Affiche le récapitulatif et écrit la trace Chrome si un chemin est fourni."""
+    if not PROFILER.enabled:
+        return
+    timings, counters = PROFILER.summary()
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print("\n=== PROFIL PAR ÉTAPE ===")
+        print(timings.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        if not counters.empty:
+            print("\n=== COMPTEURS ===")
+            print(counters.to_string(index=False))
+    if trace_path and PROFILER.trace:
+        PROFILER.export_trace(trace_path)
+        print(f"Trace exportée dans {trace_path}")
@@ -0,0 +1,212 @@
+"""
+regimes.py
+
+Moteur de régimes de marché : un label par barre, 1 / 0 / -1 (voir context.py, metrics.CONTEXTS).
+Remplace le calcul MA200 + pente dupliqué dans context.detect_trend et context_splitter.
+Schémas disponibles (SCHEMES, paramètres par défaut entre parenthèses) :
+- "ma_slope"       : 1 si prix > MA et pente de la MA > 0, -1 si prix < MA et pente < 0, 0 sinon
+                     (ma_period=200, slope_lookback=10)
+- "vol_percentile" : volatilité réalisée (écart-type des rendements sur vol_window) classée en
+                     percentile glissant sur rank_window ; 1 = vol basse (< low), -1 = vol haute
+                     (> high), 0 sinon (vol_window=20, rank_window=252, low=0.3, high=0.7)
+- "adx"            : tendance si ADX > threshold, 1 si +DI > -DI, -1 sinon ; 0 = range
+                     (period=14, threshold=25)
+
+Multi-timeframe : timeframe="W" (ou toute fréquence pandas) calcule les labels sur les barres
+rééchantillonnées, puis chaque barre d'origine reçoit le label de la dernière barre
+rééchantillonnée TERMINÉE (pas de look-ahead).
+
+Vectorisation et cache : regime_grid calcule les labels de plusieurs paramétrages en un seul
+passage (chaque MA / volatilité / ADX n'est calculé qu'une fois par fenêtre) ; chaque jeu de
+labels est gardé en cache (tableau int8, éviction LRU) sous la clé (empreinte des données,
+schéma, timeframe, paramètres). Balayer des définitions de régime ne coûte donc que les
+paramétrages nouveaux.
+
+Usage :
+    import regimes
+
+    labels = regimes.regime_labels(price_data, "ma_slope", ma_period=200)      # Series int8
+    grid = regimes.regime_grid(price_data, "adx", [{"threshold": 20}, {"threshold": 25}])
+    grid = regimes.regime_grid(price_data, "ma_slope", {"ma_period": [100, 150, 200]}, timeframe="W")
+"""
+
+from collections import OrderedDict
+from itertools import product
+import numpy as np
+import pandas as pd
+import config
+import indicators_nb
+import result_store
+
+SCHEMES = {
+    "ma_slope": {"ma_period": 200, "slope_lookback": 10},
+    "vol_percentile": {"vol_window": 20, "rank_window": 252, "low": 0.3, "high": 0.7},
+    "adx": {"period": 14, "threshold": 25},
+}
+
+def _ohlc(data):
+    """Renvoie (close, high, low) en Series ; sans High/Low, le close sert pour les trois."""
+    if isinstance(data, pd.DataFrame):
+        close = data["Close"]
+        return close, data.get("High", close), data.get("Low", close)
+    return data, data, data
+
+def _labels(up, down):
+    """Combine deux masques (barres x paramétrages) en labels int8 1 / 0 / -1."""
+    return up.astype(np.int8) - down.astype(np.int8)
+
+def _ma_slope(data, params):
+    close = _ohlc(data)[0].to_numpy(dtype=float)
+    mas = {p: pd.Series(close).rolling(p).mean().to_numpy() for p in {q["ma_period"] for q in params}}
+    out = np.empty((len(close), len(params)), dtype=np.int8)
+    for j, q in enumerate(params):
+        ma = mas[q["ma_period"]]
+        slope = np.full_like(ma, np.nan)
+        lb = q["slope_lookback"]
+        slope[lb:] = ma[lb:] - ma[:-lb]
+        out[:, j] = _labels((close > ma) & (slope > 0), (close < ma) & (slope < 0))
+    return out
+
+def _vol_percentile(data, params):
+    close = _ohlc(data)[0]
+    returns = close.pct_change()
+    vol = pd.DataFrame({w: returns.rolling(w).std() for w in sorted({q["vol_window"] for q in params})})
+    ranks = {
+        r: vol.rolling(r).rank(pct=True)
+        for r in {q["rank_window"] for q in params}
+    }
+    out = np.empty((len(close), len(params)), dtype=np.int8)
+    for j, q in enumerate(params):
+        rank = ranks[q["rank_window"]][q["vol_window"]].to_numpy()
+        out[:, j] = _labels(rank < q["low"], rank > q["high"])
+    return out
+
+def _adx(data, params):
+    close, high, low = _ohlc(data)
+    periods = sorted({q["period"] for q in params})
+    adx, dmp, dmn = indicators_nb.adx(high, low, close, periods)
+    col = {p: i for i, p in enumerate(periods)}
+    out = np.empty((len(close), len(params)), dtype=np.int8)
+    for j, q in enumerate(params):
+        i = col[q["period"]]
+        trending = adx[:, i] > q["threshold"]
+        out[:, j] = _labels(trending & (dmp[:, i] > dmn[:, i]), trending & (dmp[:, i] < dmn[:, i]))
+    return out
+
+SCHEME_FUNCS = {
+    "ma_slope": _ma_slope,
+    "vol_percentile": _vol_percentile,
+    "adx": _adx,
+}
+
+def _resample(data, timeframe):
+    """
+    Rééchantillonne les prix sur 'timeframe'. Renvoie (données, horodatage de la dernière barre
+    d'origine de chaque période), pour savoir à partir de quand chaque label est connu.
+    """
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    if isinstance(data, pd.DataFrame):
+        resampled = data.resample(timeframe).agg({c: agg.get(c, "last") for c in data.columns})
+    else:
+        resampled = data.resample(timeframe).last()
+    last_bar = pd.Series(data.index, index=data.index).resample(timeframe).last()
+    keep = last_bar.notna().to_numpy()
+    return resampled[keep], pd.DatetimeIndex(last_bar[keep])
+
+def _to_base(labels, known_at, index):
+    """Ramène des labels multi-timeframe sur l'index d'origine (label connu à la barre suivante)."""
+    frame = pd.DataFrame(labels, index=known_at).reindex(index).shift(1).ffill().fillna(0)
+    return frame.to_numpy(dtype=np.int8)
+
+def _expand(params, scheme):
+    """Paramétrages complets : liste de dicts, ou dict de listes (produit cartésien)."""
+    if isinstance(params, dict):
+        names = list(params)
+        values = [v if isinstance(v, (list, tuple, range)) else [v] for v in params.values()]
+        params = [dict(zip(names, combo)) for combo in product(*values)]
+    for p in params:
+        unknown = set(p) - set(SCHEMES[scheme])
+        if unknown:
+            raise ValueError(f"Paramètres inconnus pour le schéma {scheme} : {sorted(unknown)}")
+    params = [{**SCHEMES[scheme], **p} for p in params]
+    if scheme == "ma_slope":
+        bad = sorted({p["slope_lookback"] for p in params if p["slope_lookback"] < 1})
+        if bad:
+            raise ValueError(f"slope_lookback doit être >= 1 (pente sur au moins une barre) : {bad}")
+    return params
+
+class RegimeCache:
+    """Cache LRU de labels int8, clé (empreinte, schéma, timeframe, paramètres)."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+
+    def get(self, key):
+        value = self._store.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._store[key] = value
+        self._store.move_to_end(key)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro."""
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Renvoie les compteurs du cache."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._store)}
+
+CACHE = RegimeCache(maxsize=config.REGIME_CACHE_SIZE)
+
+def regime_grid(data, scheme="ma_slope", params=None, timeframe=None):
+    """
+    Labels de régime pour plusieurs paramétrages en un passage.
+    - data : Series de clôtures ou DataFrame OHLC (High/Low utilisés par "adx" si présents)
+    - params : liste de dicts ou dict de listes (produit cartésien) ; paramètres manquants =
+      défauts de SCHEMES ; None = un seul paramétrage par défaut
+    - timeframe : None = timeframe des données, sinon fréquence pandas ("W", "ME"...)
+    Renvoie un DataFrame int8 (barres x paramétrages), colonnes = MultiIndex des paramètres.
+    """
+    if scheme not in SCHEME_FUNCS:
+        raise ValueError(f"Schéma de régime inconnu : {scheme} (disponibles : {list(SCHEME_FUNCS)})")
+    params = _expand([{}] if params is None else params, scheme)
+    names = list(SCHEMES[scheme])
+    keys = [tuple(p[name] for name in names) for p in params]
+    fingerprint = result_store.data_fingerprint(data)
+
+    columns = {key: CACHE.get((fingerprint, scheme, timeframe, key)) for key in keys}
+    missing = [p for p, key in zip(params, keys) if columns[key] is None]
+    if missing:
+        if timeframe is None:
+            labels = SCHEME_FUNCS[scheme](data, missing)
+        else:
+            resampled, known_at = _resample(data, timeframe)
+            labels = _to_base(SCHEME_FUNCS[scheme](resampled, missing), known_at, data.index)
+        for j, p in enumerate(missing):
+            key = tuple(p[name] for name in names)
+            columns[key] = np.ascontiguousarray(labels[:, j])
+            CACHE.put((fingerprint, scheme, timeframe, key), columns[key])
+
+    return pd.DataFrame(
+        np.column_stack([columns[key] for key in keys]),
+        index=data.index,
+        columns=pd.MultiIndex.from_tuples(keys, names=names)
+    )
+
+def regime_labels(data, scheme="ma_slope", timeframe=None, **params):
+    """Labels d'un seul paramétrage : Series int8 (1 / 0 / -1) alignée sur data."""
+    labels = regime_grid(data, scheme, [params], timeframe).iloc[:, 0]
+    return labels.rename("context")
@@ -0,0 +1,141 @@
+"""
+result_sink.py
+
+Écriture en flux des résultats de backtest, à mémoire bornée :
+- les résultats arrivent par paquets (DataFrames) et sont écrits au fil de l'eau dans un
+  fichier Parquet (row groups de 'batch_rows' lignes) au lieu d'être accumulés en mémoire ;
+- pour chaque contexte (ou 'global'), seuls les top-K meilleurs / pires setups sont gardés
+  en mémoire : le classement n'a jamais besoin de l'ensemble des résultats.
+
+Usage :
+    from result_sink import ResultSink
+
+    sink = ResultSink("results/all_results.parquet", top_k=10)
+    for df in paquets_de_resultats:
+        sink.write(df)
+    sink.close()
+    sink.rankings[None]["robust"].best   # 10 meilleurs setups robustes (global)
+"""
+
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+
+class TopK:
+    """Garde les k meilleures et les k pires lignes (selon la colonne 'sort_by') d'un flux de DataFrames."""
+
+    def __init__(self, k=10, sort_by="pf"):
+        self.k = k
+        self.sort_by = sort_by
+        self.best = None
+        self.worst = None
+
+    def update(self, df):
+        """Fusionne un paquet de lignes avec les top-K courants."""
+        if df.empty:
+            return
+        best = df.nlargest(self.k, self.sort_by)
+        worst = df.nsmallest(self.k, self.sort_by)
+        if self.best is not None:
+            best = pd.concat([self.best, best]).nlargest(self.k, self.sort_by)
+            worst = pd.concat([self.worst, worst]).nsmallest(self.k, self.sort_by)
+        self.best = best
+        self.worst = worst
+
+    @property
+    def empty(self):
+        return self.best is None or self.best.empty
+
+class ResultSink:
+    """
+    Reçoit les résultats par paquets, les écrit en Parquet (si 'path' est fourni)
+    et maintient pour chaque contexte deux classements top-K :
+    - 'robust' : setups avec min_trades+ trades et cagr/max_dd valides
+    - 'raw' : tous les setups (utilisé si aucun setup robuste)
+    ainsi que le nombre de setups testés et les moments de leurs Sharpe (voir trial_stats).
+    """
+
+    def __init__(self, path=None, top_k=10, sort_by="pf", min_trades=20, batch_rows=50_000):
+        if path is not None and importlib.util.find_spec("pyarrow") is None:
+            # Vérifié dès la création : sinon le sweep échouerait au premier flush, résultats perdus
+            raise ImportError("ResultSink(path=...) écrit en Parquet : installer pyarrow (requirements.txt)")
+        self.path = path
+        self.top_k = top_k
+        self.sort_by = sort_by
+        self.min_trades = min_trades
+        self.batch_rows = batch_rows
+        self.n_rows = 0
+        self.rankings = {}
+        self._buffer = []
+        self._buffered = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        """Ajoute un paquet de résultats."""
+        if df.empty:
+            return
+        self.n_rows += len(df)
+        contexts = df["context"].unique() if "context" in df.columns else [None]
+        for ctx in contexts:
+            part = df if ctx is None else df[df["context"] == ctx]
+            ranking = self.rankings.setdefault(ctx, {
+                "robust": TopK(self.top_k, self.sort_by),
+                "raw": TopK(self.top_k, self.sort_by),
+                "trials": np.zeros(3),
+            })
+            ranking["raw"].update(part)
+            if "sharpe" in part.columns:
+                sharpe = part["sharpe"].to_numpy(dtype=float)
+                sharpe = sharpe[np.isfinite(sharpe)]
+                ranking["trials"] += (len(sharpe), sharpe.sum(), np.square(sharpe).sum())
+            ranking["robust"].update(part[
+                (part["trades"] >= self.min_trades) &
+                part["cagr"].notna() & part["max_dd"].notna()
+            ])
+
+        if self.path is not None:
+            self._buffer.append(df)
+            self._buffered += len(df)
+            if self._buffered >= self.batch_rows:
+                self.flush()
+
+    def trial_stats(self, ctx=None):
+        """
+        (nb de setups testés, écart-type de leurs Sharpe) pour le contexte ctx : ce qu'il faut pour
+        corriger un Sharpe du nombre d'essais (voir robustness.deflated_sharpe).
+        """
+        n, total, squares = self.rankings[ctx]["trials"]
+        if n < 2:
+            return int(n), None
+        return int(n), float(np.sqrt(max(squares - total ** 2 / n, 0) / (n - 1)))
+
+    def flush(self):
+        """Écrit les lignes en attente comme un row group Parquet."""
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = pd.concat(self._buffer, ignore_index=True)
+        self._buffer = []
+        self._buffered = 0
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._schema = pa.Schema.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        df = df.reindex(columns=self._schema.names)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        """Vide le buffer et ferme le fichier Parquet."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def to_frame(self):
+        """Relit tous les résultats écrits (à n'utiliser que si ça tient en mémoire)."""
+        self.close()
+        return pd.read_parquet(self.path)
@@ -0,0 +1,111 @@
+"""
+result_store.py
+
+Store local (SQLite) des résultats de backtest, adressé par contenu : chaque résultat est rangé
+sous le hash de (empreinte des données, stratégie, paramètres, version du moteur, métriques).
+- une relance saute les setups déjà calculés ;
+- un sweep interrompu reprend au dernier paquet enregistré (un commit par paquet) ;
+- modifier une plage de config.py ne recalcule que les nouvelles combinaisons.
+Les setups invalides sont aussi enregistrés (pour ne pas les relancer), ainsi que les setups
+en erreur (statut + message, pour les inspecter) : ces derniers sont recalculés à la relance.
+
+Usage :
+    from result_store import ResultStore
+
+    store = ResultStore("results/results_store.sqlite")
+    results = backtester.run_backtests(price_data, setups, trend_labels, config, batched=True, store=store)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+
+FINGERPRINT_BLOCK = 1 << 16   # Barres hachées par bloc (data_fingerprint)
+
+def data_fingerprint(data):
+    """Empreinte (sha256) des valeurs, de l'index et des colonnes d'une Series / d'un DataFrame."""
+    h = hashlib.sha256()
+    values = data.to_numpy(dtype=float)
+    # Par blocs de barres : mêmes octets qu'en un bloc, sans copier un long historique en entier
+    for start in range(0, len(values), FINGERPRINT_BLOCK):
+        h.update(np.ascontiguousarray(values[start:start + FINGERPRINT_BLOCK]).tobytes())
+    index = data.index
+    h.update(np.asarray(index.asi8 if isinstance(index, pd.DatetimeIndex) else index).tobytes())
+    h.update(repr(list(data.columns) if isinstance(data, pd.DataFrame) else data.name).encode())
+    return h.hexdigest()
+
+def _jsonable(value):
+    """Convertit les scalaires numpy / Timestamp pour json.dumps."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+def result_key(fingerprint, strategy, setup, engine_version, metric_names):
+    """Clé de contenu d'un résultat (hash hexadécimal)."""
+    payload = {
+        "data": fingerprint,
+        "strategy": strategy,
+        "params": setup,
+        "engine": engine_version,
+        "metrics": list(metric_names),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=_jsonable).encode()).hexdigest()
+
+class ResultStore:
+    """
+    Table SQLite results(key, strategy, status, payload, created) :
+    - status : "ok", "invalid" (pas de signaux exploitables) ou "error"
+    - payload : lignes de résultat en JSON (une par ticker en mode univers) ou message d'erreur
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, strategy TEXT, status TEXT, payload TEXT, created REAL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys, chunk_size=500):
+        """Renvoie {key: (status, payload)} pour les clés présentes."""
+        keys = list(keys)
+        out = {}
+        for i in range(0, len(keys), chunk_size):
+            part = keys[i:i + chunk_size]
+            rows = self.conn.execute(
+                f"SELECT key, status, payload FROM results WHERE key IN ({','.join('?' * len(part))})", part
+            )
+            out.update({key: (status, payload) for key, status, payload in rows})
+        return out
+
+    def put_many(self, items):
+        """
+        Enregistre une liste de (key, strategy, status, payload) puis commit (= point de reprise).
+        payload : liste de dicts (status "ok") ou message (autres statuts).
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            [(key, strategy, status, json.dumps(payload, default=_jsonable), now)
+             for key, strategy, status, payload in items]
+        )
+        self.conn.commit()
+
+    def frame(self, entries):
+        """DataFrame des lignes "ok" parmi les (status, payload) de get_many."""
+        rows = [row for status, payload in entries if status == "ok" for row in json.loads(payload)]
+        return pd.DataFrame(rows)
+
+    def counts(self):
+        """Nombre de résultats par statut."""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM results GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
@@ -4,76 +4,168 @@
 import os
 import pandas as pd
 import config
+import plateau
+import robustness
+from result_sink import ResultSink
 
 def safe_df(df, fallback=0):
     """Remplace tous les NaN du DataFrame par fallback."""
     return df.fillna(fallback)
 
-def analyze_and_export(results_df):
+def metric_cols(df):
+    """Colonnes de métriques du DataFrame, dans l'ordre de config.METRICS (seules celles calculées)."""
+    return [m for m in config.METRICS if m in df.columns]
+
+def display_frame(df):
+    """
+    Lignes à afficher en console : stratégie, paramètres renseignés pour ces lignes (chaque
+    stratégie a les siens, voir strategies.strategy_space) et métriques.
+    """
+    scores = [c for c in df.columns if c.startswith("plateau_")]
+    params = [
+        c for c in df.columns
+        if c not in config.METRICS + scores + ["strategy", "ticker", "context"] and df[c].notna().any()
+    ]
+    return safe_df(df[["strategy"] + params + metric_cols(df) + scores])
+
+def score_robustness(best, sink, ctx, price_data, trend_labels):
+    """
+    Ajoute aux meilleurs setups les colonnes de robustesse (bandes de confiance, p-values, voir
+    robustness.py), le Sharpe étant corrigé du nombre de setups testés dans ce contexte.
+    Sans données de prix (ou avec config.ROBUSTNESS_RESAMPLES = 0), best est renvoyé tel quel.
+    """
+    if price_data is None or not config.ROBUSTNESS_RESAMPLES:
+        return best
+    n_trials, sharpe_std = sink.trial_stats(ctx)
+    scored = robustness.score_setups(best, price_data, trend_labels, ctx, n_trials, sharpe_std)
+    # p-value inconnue (setup non resimulable, historique trop court) : aucune preuve, pas 0 (safe_df)
+    return scored.fillna({name: 1.0 for name in robustness.PVALUE_COLUMNS})
+
+def analyze_and_export(results_df, price_data=None, trend_labels=None):
     """
     Analyse les résultats des backtests, trie et exporte les meilleurs et pires setups,
     robustes (20+ trades, cagr/max_dd valides), pour CHAQUE contexte (uptrend, downtrend, range).
     Gère l'affichage/exports contextuels et prépare le pipeline pour validation OOS.
+    results_df : DataFrame complet, ou ResultSink (classements top-K déjà calculés en flux).
+    price_data / trend_labels : données backtestées (et labels de contexte) ; si fournies, les
+    meilleurs setups exportés sont resimulés pour leurs p-values / bandes de confiance (score_robustness).
+    Avec un DataFrame complet et config.PLATEAU_RADIUS > 0, le classement se fait sur le score de
+    plateau (métrique lissée sur les paramètres voisins, voir plateau.py) plutôt que sur le PF brut ;
+    un ResultSink, qui n'a gardé que ses top-K, reste classé sur sa colonne de tri.
     """
-    if results_df.empty:
+    if isinstance(results_df, ResultSink):
+        sink = results_df
+    elif config.PLATEAU_RADIUS and not results_df.empty:
+        results_df = plateau.add_plateau_scores(results_df, config.PLATEAU_METRIC, config.PLATEAU_RADIUS)
+        suffix = "_min" if config.PLATEAU_STAT == "min" else ""
+        sink = ResultSink(top_k=10, sort_by=f"plateau_{config.PLATEAU_METRIC}{suffix}")
+        sink.write(results_df)
+    else:
+        sink = ResultSink(top_k=10)
+        sink.write(results_df)
+
+    if sink.n_rows == 0:
         print("Aucun résultat à analyser.")
         return
 
-    # Si la colonne 'context' existe, split par contexte
-    if "context" in results_df.columns:
-        unique_contexts = results_df["context"].unique()
-    else:
-        unique_contexts = [None]  # Cas fallback (no context split)
-
     # Création du dossier results si absent
     os.makedirs(config.RESULTS_DIR, exist_ok=True)
 
-    for ctx in unique_contexts:
+    # Un classement par contexte (None = pas de colonne 'context' : cas global)
+    for ctx, ranking in sink.rankings.items():
         if ctx is not None:
-            df_ctx = results_df[results_df["context"] == ctx]
             ctx_str = f"context_{ctx}"
             print(f"\n=== CONTEXTE {ctx} ===")
         else:
-            df_ctx = results_df
             ctx_str = "global"
             print("\n=== GLOBAL ===")
 
-        # Filtrage des setups robustes
-        filtered = df_ctx[
-            (df_ctx["trades"] >= 20) &
-            df_ctx["cagr"].notna() & df_ctx["max_dd"].notna()
-        ]
-        if filtered.empty:
+        # Setups robustes déjà filtrés par le sink
+        robust = ranking["robust"]
+        if robust.empty:
             print("Aucun setup robuste (20+ trades, cagr/max_dd valides).")
             # Afficher et exporter quand même les 5 meilleurs setups bruts (sur le PF)
-            best_raw = df_ctx.sort_values(by="pf", ascending=False)
-            worst_raw = df_ctx.sort_values(by="pf", ascending=True)
+            best_raw = ranking["raw"].best
+            worst_raw = ranking["raw"].worst
             print("\n=== MEILLEURS SETUPS (bruts, non robustes) ===")
-            print(safe_df(best_raw.head(5)[["ma_short", "ma_long", "rsi", "sl_pct", "tp_pct", "trades", "cagr", "sharpe", "max_dd", "pf"]]))
+            print(display_frame(best_raw.head(5)))
             print("\n=== PIRES SETUPS (bruts, non robustes) ===")
-            print(safe_df(worst_raw.head(5)[["ma_short", "ma_long", "rsi", "sl_pct", "tp_pct", "trades", "cagr", "sharpe", "max_dd", "pf"]]))
+            print(display_frame(worst_raw.head(5)))
             # Export CSV aussi
-            safe_df(best_raw.head(10)).to_csv(f"{config.RESULTS_DIR}/best_strategies_raw_{ctx_str}.csv", index=False)
+            best_raw = score_robustness(best_raw.head(10), sink, ctx, price_data, trend_labels)
+            safe_df(best_raw).to_csv(f"{config.RESULTS_DIR}/best_strategies_raw_{ctx_str}.csv", index=False)
             safe_df(worst_raw.head(10)).to_csv(f"{config.RESULTS_DIR}/worst_strategies_raw_{ctx_str}.csv", index=False)
             continue
 
-        # Trier par profit factor décroissant
-        best = filtered.sort_values(by="pf", ascending=False)
-        worst = filtered.sort_values(by="pf", ascending=True)
+        # Triés par profit factor (ou score de plateau, décroissant / croissant)
+        best = robust.best
+        worst = robust.worst
 
         # Exporter les 10 meilleurs et 10 pires setups pour chaque contexte
-        safe_df(best.head(10)).to_csv(f"{config.RESULTS_DIR}/best_strategies_{ctx_str}.csv", index=False)
+        best = score_robustness(best.head(10), sink, ctx, price_data, trend_labels)
+        safe_df(best).to_csv(f"{config.RESULTS_DIR}/best_strategies_{ctx_str}.csv", index=False)
         safe_df(worst.head(10)).to_csv(f"{config.RESULTS_DIR}/worst_strategies_{ctx_str}.csv", index=False)
 
         # Affichage console
         print("\n=== MEILLEURS SETUPS (robustes) ===")
-        print(safe_df(best.head(5)[["ma_short", "ma_long", "rsi", "sl_pct", "tp_pct", "trades", "cagr", "sharpe", "max_dd", "pf"]]))
+        print(display_frame(best.head(5)))
 
         print("\n=== PIRES SETUPS (robustes) ===")
-        print(safe_df(worst.head(5)[["ma_short", "ma_long", "rsi", "sl_pct", "tp_pct", "trades", "cagr", "sharpe", "max_dd", "pf"]]))
+        print(display_frame(worst.head(5)))
 
         print(f"\nRésultats exportés dans le dossier : {config.RESULTS_DIR}/")
 
     print("\n=== SYNTHÈSE FINIE : rapport par contexte ===")
 
 # Plug possible : ajouter affichage colonne 'robust' ou 'robust_ratio' si validator.py est utilisé.
+
+def analyze_universe(results_df, top_n=10, min_trades=20):
+    """
+    Classements multi-actifs (résultats avec une colonne 'ticker', voir backtester.load_universe) :
+    - par ticker : les top_n meilleurs setups robustes (min_trades+) de chaque actif, triés par PF
+    - agrégé : chaque setup (stratégie + params) noté sur tout l'univers
+      (PF médian, % d'actifs avec PF > 1, pire drawdown...)
+    Exporte best_strategies_per_ticker.csv et best_strategies_universe.csv.
+    """
+    if results_df.empty:
+        print("Aucun résultat à analyser.")
+        return
+
+    os.makedirs(config.RESULTS_DIR, exist_ok=True)
+    param_cols = [c for c in results_df.columns if c not in config.METRICS + ["strategy", "ticker", "context"]]
+
+    # Classement par ticker
+    filtered = results_df[results_df["trades"] >= min_trades]
+    per_ticker = (
+        filtered.sort_values(by="pf", ascending=False)
+        .groupby("ticker", sort=False)
+        .head(top_n)
+        .sort_values(by=["ticker", "pf"], ascending=[True, False])
+    )
+    safe_df(per_ticker).to_csv(f"{config.RESULTS_DIR}/best_strategies_per_ticker.csv", index=False)
+
+    # Classement agrégé sur l'univers (Sharpe moyen seulement s'il fait partie de config.METRICS)
+    aggregates = {
+        "n_tickers": ("ticker", "nunique"),
+        "median_pf": ("pf", "median"),
+        "mean_pf": ("pf", "mean"),
+        "pct_profitable": ("pf", lambda x: (x > 1).mean()),
+        "mean_sharpe": ("sharpe", "mean"),
+        "mean_cagr": ("cagr", "mean"),
+        "worst_max_dd": ("max_dd", "min"),
+        "total_trades": ("trades", "sum"),
+    }
+    aggregates = {name: agg for name, agg in aggregates.items() if agg[0] in results_df.columns}
+    universe = (
+        results_df.groupby(["strategy"] + param_cols, dropna=False)
+        .agg(**aggregates)
+        .reset_index()
+        .sort_values(by=["median_pf", "pct_profitable"], ascending=False)
+    )
+    safe_df(universe.head(100)).to_csv(f"{config.RESULTS_DIR}/best_strategies_universe.csv", index=False)
+
+    print("\n=== MEILLEURS SETUPS PAR TICKER (top 1) ===")
+    print(safe_df(per_ticker.groupby("ticker", sort=False).head(1)[["ticker", "strategy"] + param_cols + metric_cols(per_ticker)]))
+    print("\n=== MEILLEURS SETUPS SUR L'UNIVERS ===")
+    print(safe_df(universe.head(5)))
+    print(f"\nRésultats exportés dans le dossier : {config.RESULTS_DIR}/")
@@ -0,0 +1,214 @@
+"""
+robustness.py
+
+Robustesse statistique des meilleurs setups (ceux que results_analyzer.analyze_and_export classe
+par profit factor) : un PF élevé sur un seul historique peut n'être que de la chance.
+- trade_shuffle_drawdowns : max drawdown de la suite de trades rejouée dans un ordre aléatoire
+  (la séquence réalisée était-elle particulièrement favorable ?) ;
+- block_bootstrap_sharpe : Sharpe recalculé sur des historiques rééchantillonnés par blocs de
+  barres (bootstrap circulaire, garde l'autocorrélation à l'intérieur des blocs) ;
+- deflated_sharpe : probabilité que le vrai Sharpe soit > 0, corrigée du nombre de setups testés
+  (Bailey & López de Prado), de l'asymétrie et de l'aplatissement des rendements.
+
+Tout est calculé en matrices (setups x rééchantillons), par paquets de rééchantillons pour borner
+la mémoire (MAX_CELLS), jamais setup par setup. Résultats reproductibles à graine égale.
+
+Usage :
+    import robustness
+
+    scored = robustness.score_setups(best_df, price_data, n_trials=len(results), trial_sharpe_std=0.4)
+    scored[["pf", "sharpe_ci_low", "sharpe_pvalue", "dsr_pvalue", "mc_max_dd_low"]]
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+import config
+import backtester
+import metrics
+import strategies
+import validator
+
+# Nb max de valeurs d'une matrice (setups x rééchantillons x barres ou trades) calculée d'un bloc
+MAX_CELLS = 1 << 24
+
+EULER_GAMMA = 0.5772156649015329
+
+ROBUSTNESS_COLUMNS = [
+    "sharpe_ci_low", "sharpe_ci_high", "sharpe_pvalue", "dsr_pvalue",
+    "mc_max_dd_low", "mc_max_dd_high", "mc_dd_pvalue",
+]
+PVALUE_COLUMNS = ["sharpe_pvalue", "dsr_pvalue", "mc_dd_pvalue"]
+
+def _resample_batches(n_resamples, cells_per_resample):
+    """Tailles des paquets de rééchantillons (au moins 1 par paquet)."""
+    step = max(1, MAX_CELLS // max(cells_per_resample, 1))
+    return [min(step, n_resamples - start) for start in range(0, n_resamples, step)]
+
+def trade_matrix(trade_col, trade_ret, n_cols):
+    """
+    Rendements des trades rangés par colonne : tableau (n_colonnes, max_trades), complété par des 0
+    (neutres pour la capitalisation et le drawdown, quelle que soit leur place dans la suite).
+    """
+    trade_col = np.asarray(trade_col, dtype=np.int64)
+    counts = np.bincount(trade_col, minlength=n_cols)
+    order = np.argsort(trade_col, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    out = np.zeros((n_cols, counts.max(initial=0)))
+    cols = trade_col[order]
+    out[cols, np.arange(len(order)) - starts[cols]] = np.asarray(trade_ret, dtype=float)[order]
+    return out
+
+def _max_drawdown(trade_returns):
+    """Max drawdown (<= 0) de la capitalisation des trades, dernier axe = suite de trades."""
+    equity = np.cumprod(1 + trade_returns, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 1)
+    return np.min(equity / peak - 1, axis=-1, initial=0)
+
+def trade_shuffle_drawdowns(trade_returns, n_resamples, rng):
+    """
+    Max drawdown de n_resamples ordres aléatoires des trades de chaque colonne.
+    trade_returns : tableau (n_colonnes, max_trades) de trade_matrix. Les permutations sont
+    communes à toutes les colonnes (les 0 de complément rendent chacune uniforme sur ses trades).
+    Renvoie (drawdowns (n_colonnes, n_resamples), drawdown de l'ordre réalisé (n_colonnes,)).
+    """
+    n_cols, n_trades = trade_returns.shape
+    realized = _max_drawdown(trade_returns)
+    if n_trades < 2:
+        return np.repeat(realized[:, None], n_resamples, axis=1), realized
+    parts = []
+    for size in _resample_batches(n_resamples, n_cols * n_trades):
+        perm = np.argsort(rng.random((size, n_trades)), axis=1)
+        parts.append(_max_drawdown(trade_returns[:, perm]))
+    return np.concatenate(parts, axis=1), realized
+
+def block_bootstrap_sharpe(returns, n_resamples, block, ppy, rng):
+    """
+    Sharpe annualisé de n_resamples historiques tirés par bootstrap circulaire en blocs de 'block'
+    barres. returns : rendements par barre (n_barres, n_colonnes) ; les mêmes tirages de barres
+    servent à toutes les colonnes. Renvoie un tableau (n_colonnes, n_resamples).
+    """
+    n_bars, n_cols = returns.shape
+    block = max(1, min(block, n_bars))
+    n_blocks = -(-n_bars // block)
+    offsets = np.arange(block)
+    parts = []
+    for size in _resample_batches(n_resamples, n_bars * n_cols):
+        starts = rng.integers(0, n_bars, (size, n_blocks))
+        bars = (starts[:, :, None] + offsets).reshape(size, -1)[:, :n_bars] % n_bars
+        sample = returns[bars]
+        std = sample.std(axis=1, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, sample.mean(axis=1) / np.where(std > 0, std, 1), np.nan)
+        parts.append(sharpe.T * np.sqrt(ppy))
+    return np.concatenate(parts, axis=1)
+
+def deflated_sharpe(returns, n_trials, trial_sharpe_std, ppy):
+    """
+    Deflated Sharpe ratio : probabilité (par colonne) que le vrai Sharpe soit > au Sharpe maximal
+    attendu par chance parmi n_trials setups dont les Sharpe annualisés ont l'écart-type
+    trial_sharpe_std. Avec n_trials <= 1, c'est le Probabilistic Sharpe Ratio (seuil 0).
+    returns : rendements par barre (n_barres, n_colonnes).
+    """
+    n_bars = returns.shape[0]
+    mean = returns.mean(axis=0)
+    centered = returns - mean
+    var = np.mean(centered ** 2, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = mean / np.sqrt(var)
+        skew = np.mean(centered ** 3, axis=0) / var ** 1.5
+        kurt = np.mean(centered ** 4, axis=0) / var ** 2
+    threshold = 0.0
+    if n_trials and n_trials > 1 and trial_sharpe_std:
+        # Sharpe maximal attendu de n_trials essais sans talent (en Sharpe par barre)
+        expected_max = ((1 - EULER_GAMMA) * ndtri(1 - 1 / n_trials)
+                        + EULER_GAMMA * ndtri(1 - 1 / (n_trials * np.e)))
+        threshold = trial_sharpe_std / np.sqrt(ppy) * expected_max
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = np.sqrt(1 - skew * sharpe + (kurt - 1) / 4 * sharpe ** 2)
+        return ndtr((sharpe - threshold) * np.sqrt(n_bars - 1) / denom)
+
+def setup_portfolio(setups_df, price_data):
+    """
+    Resimule les lignes d'un DataFrame de résultats (colonne 'strategy', paramètres, 'ticker' pour
+    un panel) en un seul from_signals, une colonne par ligne, dans l'ordre des lignes.
+    Renvoie (portfolio, valid) : valid = lignes dont les signaux ont pu être générés (les autres
+    ont des signaux vides).
+    """
+    close, inputs = backtester.market_inputs(price_data)
+    df = setups_df.reset_index(drop=True)
+    n_rows, n_bars = len(df), len(close)
+    entries = np.zeros((n_bars, n_rows), dtype=bool)
+    exits = np.zeros((n_bars, n_rows), dtype=bool)
+    sl_stop, tp_stop = np.full(n_rows, np.nan), np.full(n_rows, np.nan)
+    valid = np.zeros(n_rows, dtype=bool)
+    for strat_name, index in df.groupby("strategy", sort=False).groups.items():
+        strat_func = strategies.STRATEGY_FUNCS.get(strat_name)
+        if strat_func is None:
+            continue
+        signal_names = backtester.signal_param_names(strat_func)
+        for row, setup in zip(index, validator.setup_records(df.loc[index])):
+            ticker = df.at[row, "ticker"] if "ticker" in df.columns else None
+            price = close if ticker is None else close[ticker]
+            extra = backtester.strategy_inputs(strat_name, inputs)
+            if ticker is not None:
+                extra = {name: values[ticker] for name, values in extra.items()}
+            signal, (sl, tp) = backtester.split_setup(setup, signal_names)
+            signals = backtester.generate_signals(strat_func, price, signal, extra)
+            if signals is None:
+                continue
+            entries[:, row], exits[:, row] = signals
+            sl_stop[row], tp_stop[row] = (np.nan if sl is None else sl), (np.nan if tp is None else tp)
+            valid[row] = True
+    if "ticker" in df.columns:
+        close = pd.DataFrame(close[df["ticker"]].to_numpy(), index=close.index)
+    return backtester.simulate_batch(close, entries, exits, sl_stop, tp_stop), valid
+
+def score_setups(setups_df, price_data, labels=None, ctx=None, n_trials=None, trial_sharpe_std=None,
+                 n_resamples=None, seed=None):
+    """
+    Ajoute à setups_df (lignes de résultats : 'strategy', paramètres, 'ticker' pour un panel) les
+    colonnes de robustesse (ROBUSTNESS_COLUMNS), pour la bande de confiance config.ROBUSTNESS_CONFIDENCE :
+    - sharpe_ci_low / sharpe_ci_high : bande du Sharpe bootstrap (blocs de config.ROBUSTNESS_BLOCK barres)
+    - sharpe_pvalue : part des historiques bootstrap avec un Sharpe <= 0
+    - dsr_pvalue : 1 - deflated Sharpe (n_trials setups testés, écart-type trial_sharpe_std de leurs Sharpe)
+    - mc_max_dd_low / mc_max_dd_high : bande du max drawdown des trades rejoués dans un ordre aléatoire
+    - mc_dd_pvalue : part des ordres aléatoires au drawdown aussi ou moins profond que l'ordre
+      réalisé (faible = séquence réalisée chanceuse, drawdown du backtest sous-estimé)
+    labels / ctx : restreint l'analyse aux barres (et trades ouverts) du contexte ctx, comme
+    metrics.context_inputs. n_resamples / seed : config.ROBUSTNESS_RESAMPLES / ROBUSTNESS_SEED par défaut.
+    """
+    n_resamples = n_resamples or config.ROBUSTNESS_RESAMPLES
+    seed = config.ROBUSTNESS_SEED if seed is None else seed
+    out = setups_df.copy()
+    if out.empty:
+        return out.assign(**{name: pd.Series(dtype=float) for name in ROBUSTNESS_COLUMNS})
+    pf, valid = setup_portfolio(out, price_data)
+    records = pf.trades.values
+    returns = np.nan_to_num(np.asarray(pf.returns().values, dtype=float).reshape(len(pf.wrapper.index), -1))
+    ppy = metrics.periods_per_year(pf.wrapper.index)
+    trade_col, trade_ret = records["col"], records["return"]
+    if labels is not None and ctx is not None:
+        if isinstance(labels, pd.Series):
+            labels = labels.reindex(pf.wrapper.index).fillna(0)
+        labels = np.asarray(labels)
+        in_ctx = labels[records["entry_idx"]] == ctx
+        trade_col, trade_ret = trade_col[in_ctx], trade_ret[in_ctx]
+        returns = returns[labels == ctx]
+
+    rng = np.random.default_rng(seed)
+    tail = (1 - config.ROBUSTNESS_CONFIDENCE) / 2
+    if len(returns) > 1:
+        sharpe = block_bootstrap_sharpe(returns, n_resamples, config.ROBUSTNESS_BLOCK, ppy, rng)
+        out["sharpe_ci_low"] = np.nanquantile(sharpe, tail, axis=1)
+        out["sharpe_ci_high"] = np.nanquantile(sharpe, 1 - tail, axis=1)
+        out["sharpe_pvalue"] = np.mean(~(sharpe > 0), axis=1)
+        out["dsr_pvalue"] = 1 - deflated_sharpe(returns, n_trials, trial_sharpe_std, ppy)
+    else:
+        out[["sharpe_ci_low", "sharpe_ci_high", "sharpe_pvalue", "dsr_pvalue"]] = np.nan
+    drawdowns, realized = trade_shuffle_drawdowns(trade_matrix(trade_col, trade_ret, len(out)), n_resamples, rng)
+    out["mc_max_dd_low"] = np.quantile(drawdowns, tail, axis=1)
+    out["mc_max_dd_high"] = np.quantile(drawdowns, 1 - tail, axis=1)
+    out["mc_dd_pvalue"] = np.mean(drawdowns >= realized[:, None] - 1e-12, axis=1)
+    out.loc[~valid, ROBUSTNESS_COLUMNS] = np.nan
+    return out
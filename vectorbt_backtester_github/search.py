@@ -0,0 +1,235 @@
+"""
+search.py
+
+Recherche d'hyperparamètres sur les plages de chaque stratégie (config.STRATEGY_PARAMS + SL_PCT,
+TP_PCT, voir strategies.strategy_space), à la place du produit cartésien complet :
+- "random"  : tirage aléatoire sans remise
+- "halving" : successive halving ; beaucoup de setups évalués sur un historique court (les barres
+  les plus récentes), les meilleurs sont promus sur un historique eta fois plus long, jusqu'à
+  l'historique complet
+- "tpe"     : bayésien (Tree-structured Parzen Estimator) sur les valeurs discrètes des plages ;
+  les setups proposés maximisent l(x) / g(x), densités des bons et des mauvais setups déjà évalués
+
+Budget : nombre max d'évaluations par stratégie, compté en équivalent historique complet
+(un setup évalué sur 1/3 de l'historique coûte 1/3). Arrêt anticipé ("random", "tpe") si le
+meilleur score ne progresse plus pendant 'patience' rounds.
+Les setups sont évalués par paquets avec le moteur vectorisé (backtester.run_strategy_batched).
+
+Usage :
+    import search
+
+    results = search.run_search(price_data, config)   # même format que backtester.run_backtests
+"""
+
+import math
+import numpy as np
+import pandas as pd
+import backtester
+import strategies
+
+MODES = ("random", "halving", "tpe")
+
+def search_space(strat_name):
+    """Plages de recherche de la stratégie, les mêmes que strategies.strategy_space."""
+    return {name: list(values) for name, values in strategies.strategy_ranges(strat_name).items()}
+
+class Evaluator:
+    """
+    Évalue des setups d'une stratégie par paquets sur les 'n_bars' dernières barres (défaut : tout).
+    Le score est la métrique 'objective' ; -inf si le setup est invalide ou a moins de min_trades trades
+    (au prorata de la longueur d'historique évaluée).
+    Les évaluations sur l'historique complet sont gardées pour le DataFrame de résultats.
+    data : clôtures ou données OHLCV (converties en MarketData : les historiques raccourcis
+    sont des vues du même buffer, voir market_data.py).
+    """
+
+    def __init__(self, strat_name, data, objective="sharpe", min_trades=10, batch_size=500):
+        self.strat_name = strat_name
+        self.strat_func = strategies.STRATEGY_FUNCS[strat_name]
+        self.data = backtester.market_data(data)
+        self.close = self.data.close
+        self.objective = objective
+        self.min_trades = min_trades
+        self.batch_size = batch_size
+        self.signal_names = backtester.signal_param_names(self.strat_func)
+        self.cost = 0.0
+        self.frames = []
+
+    def key(self, setup):
+        """
+        Clé de simulation : deux setups de même clé donnent exactement le même résultat.
+        None si le setup ne respecte pas les contraintes de la stratégie.
+        """
+        if not strategies.is_valid_setup(self.strat_name, setup):
+            return None
+        return backtester.split_setup(setup, self.signal_names)
+
+    def _history(self, n_bars):
+        # Fenêtre mémorisée : mêmes objets pour une même longueur, le cache d'indicateurs reste valable
+        window = self.data if n_bars is None else self.data.window(-n_bars)
+        return backtester.market_inputs(window)
+
+    def evaluate(self, setups, n_bars=None):
+        """Renvoie le tableau des scores des setups (alignés sur 'setups')."""
+        close, inputs = self._history(n_bars)
+        setup_metrics, valid = backtester.run_strategy_batched(
+            self.strat_func, close, setups, self.batch_size, inputs=inputs
+        )
+        fraction = len(close) / len(self.close)
+        self.cost += len(setups) * fraction
+        if not valid.any():
+            return np.full(len(setups), -np.inf)
+        if close is self.close:
+            self.frames.append(backtester.results_frame(self.strat_name, setups, setup_metrics, valid))
+        scores = setup_metrics[self.objective].astype(float)
+        ok = valid & (setup_metrics["trades"] >= self.min_trades * fraction) & ~np.isnan(scores)
+        return np.where(ok, scores, -np.inf)
+
+    def results(self):
+        """DataFrame des setups évalués sur l'historique complet."""
+        return pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame()
+
+def sample_setups(space, n, rng, key, seen, max_tries=20):
+    """
+    Tire au plus n setups valides (clé non None) dont la clé n'est pas dans 'seen' (mis à jour).
+    Moins de n setups si l'espace est épuisé.
+    """
+    names = list(space)
+    out = []
+    for _ in range(max_tries):
+        draws = {name: rng.integers(len(space[name]), size=4 * n) for name in names}
+        for i in range(4 * n):
+            setup = {name: space[name][draws[name][i]] for name in names}
+            k = key(setup)
+            if k is None or k in seen:
+                continue
+            seen.add(k)
+            out.append(setup)
+            if len(out) == n:
+                return out
+    return out
+
+def tpe_suggest(space, history, n, rng, key, seen, gamma=0.25, n_candidates=24):
+    """
+    Propose n setups par TPE : les setups évalués sont séparés en bons (fraction gamma des
+    meilleurs scores) et mauvais ; pour chaque paramètre, densités discrètes l (bons) et g (mauvais)
+    lissées (+1). n * n_candidates candidats sont tirés selon l, les n meilleurs l/g non vus sont gardés.
+    """
+    setups = [s for s, _ in history]
+    scores = np.array([score for _, score in history])
+    order = np.argsort(-scores, kind="stable")
+    n_good = max(math.ceil(gamma * len(history)), 1)
+    good = np.zeros(len(history), dtype=bool)
+    good[order[:n_good]] = True
+
+    m = n * n_candidates
+    ratio = np.zeros(m)
+    draws = {}
+    for name, values in space.items():
+        position = {v: i for i, v in enumerate(values)}
+        codes = np.array([position[s[name]] for s in setups])
+        l = np.bincount(codes[good], minlength=len(values)) + 1.0
+        g = np.bincount(codes[~good], minlength=len(values)) + 1.0
+        l, g = l / l.sum(), g / g.sum()
+        draws[name] = rng.choice(len(values), size=m, p=l)
+        ratio += np.log(l[draws[name]]) - np.log(g[draws[name]])
+
+    out = []
+    for i in np.argsort(-ratio, kind="stable"):
+        setup = {name: values[draws[name][i]] for name, values in space.items()}
+        k = key(setup)
+        if k is None or k in seen:
+            continue
+        seen.add(k)
+        out.append(setup)
+        if len(out) == n:
+            break
+    # Complète au hasard si les candidats TPE sont déjà tous vus
+    return out + sample_setups(space, n - len(out), rng, key, seen) if len(out) < n else out
+
+def sequential_search(evaluator, space, budget, batch, patience, rng, mode="random", n_startup=None):
+    """
+    Boucle commune de "random" et "tpe" : un paquet de 'batch' setups par round, jusqu'au budget,
+    à l'épuisement de l'espace ou après 'patience' rounds sans amélioration du meilleur score.
+    """
+    n_startup = n_startup or batch
+    history = []
+    seen = set()
+    best = -np.inf
+    stale = 0
+    while evaluator.cost < budget:
+        n = int(min(batch, budget - evaluator.cost)) or 1
+        if mode == "tpe" and len(history) >= n_startup:
+            setups = tpe_suggest(space, history, n, rng, evaluator.key, seen)
+        else:
+            setups = sample_setups(space, n, rng, evaluator.key, seen)
+        if not setups:
+            break
+        scores = evaluator.evaluate(setups)
+        if not evaluator.frames:
+            break  # Stratégie incompatible avec ces paramètres (aucun signal généré)
+        history.extend(zip(setups, scores))
+        if scores.max() > best:
+            best, stale = scores.max(), 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+    return best
+
+def halving_search(evaluator, space, budget, rng, eta=3, min_fraction=0.25):
+    """
+    Successive halving : rungs de longueur d'historique min_fraction, min_fraction * eta, ..., 1.
+    Chaque rung garde le 1/eta des meilleurs setups ; le nombre initial de setups est choisi
+    pour que le coût total reste dans le budget.
+    """
+    fractions = [min_fraction]
+    while fractions[-1] < 1:
+        fractions.append(min(fractions[-1] * eta, 1.0))
+    n0 = max(int(budget / (len(fractions) * min_fraction)), 1)
+    candidates = sample_setups(space, n0, rng, evaluator.key, set())
+    best = -np.inf
+    for fraction in fractions:
+        if not candidates:
+            break
+        n_bars = max(round(fraction * len(evaluator.close)), 2)
+        scores = evaluator.evaluate(candidates, n_bars=n_bars)
+        best = scores.max()
+        if fraction >= 1 or np.all(scores == -np.inf):
+            break
+        keep = np.argsort(-scores, kind="stable")[:max(len(candidates) // eta, 1)]
+        candidates = [candidates[i] for i in keep if scores[i] > -np.inf]
+    return best
+
+def run_search(price_data, config, mode=None, strategy_names=None):
+    """
+    Lance la recherche pour chaque stratégie (config.SEARCH_* : mode, budget, objectif, ...).
+    Renvoie un DataFrame au même format que backtester.run_backtests (setups évalués sur
+    l'historique complet uniquement).
+    """
+    mode = mode or config.SEARCH_MODE
+    if mode not in MODES:
+        raise ValueError(f"Mode de recherche inconnu : {mode} (disponibles : {MODES})")
+    data = backtester.market_data(price_data)
+    rng = np.random.default_rng(config.SEARCH_SEED)
+
+    frames = []
+    for strat_name in strategy_names or strategies.STRATEGY_FUNCS:
+        missing = [name for name in strategies.required_inputs(strat_name)
+                   if strategies.INPUT_COLUMNS[name] not in data]
+        if missing:
+            print(f"{strat_name} ignorée (entrées manquantes : {missing})")
+            continue
+        space = search_space(strat_name)
+        evaluator = Evaluator(strat_name, data, config.SEARCH_OBJECTIVE,
+                              config.MIN_TRADES_PER_SETUP, config.BATCH_SIZE)
+        if mode == "halving":
+            best = halving_search(evaluator, space, config.SEARCH_BUDGET, rng,
+                                  config.SEARCH_ETA, config.SEARCH_MIN_FRACTION)
+        else:
+            best = sequential_search(evaluator, space, config.SEARCH_BUDGET, config.SEARCH_BATCH,
+                                     config.SEARCH_PATIENCE, rng, mode)
+        print(f"{strat_name} : {evaluator.cost:.0f} évaluations, meilleur {config.SEARCH_OBJECTIVE} = {best:.3f}")
+        frames.append(evaluator.results())
+    frames = [df for df in frames if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -2,47 +2,33 @@
 
 # strategies.py
 
-import numpy as np
-import pandas as pd
+import inspect
 import config
+import indicators
+from param_space import ParamSpace
 
 def generate_setups():
     """
-    Génère toutes les combinaisons de setups possibles à tester pour la stratégie 'moving_average_crossover'.
-    Chaque setup est un dict avec les paramètres à utiliser.
-    """
-    setups = []
-    for ma_short in config.MA_SHORT_RANGE:
-        for ma_long in config.MA_LONG_RANGE:
-            if ma_short >= ma_long:
-                continue  # On évite les setups incohérents
-            for rsi_val in config.RSI_RANGE:
-                for sl in config.SL_PCT:
-                    for tp in config.TP_PCT:
-                        setups.append({
-                            "ma_short": ma_short,
-                            "ma_long": ma_long,
-                            "rsi": rsi_val,
-                            "sl_pct": sl,
-                            "tp_pct": tp
-                        })
-    return setups
-# Exemple de setup_generator pour une autre stratégie :
-# def generate_setups_breakout():
-#     setups = []
-#     for window in [10, 20, 50]:
-#         for sl in [0.01, 0.02]:
-#             for tp in [0.03, 0.05]:
-#                 setups.append({"window": window, "sl_pct": sl, "tp_pct": tp})
-#     return setups
+    Espace de tous les setups à tester pour la stratégie 'moving_average_crossover'.
+    Renvoie un ParamSpace paresseux (voir param_space.py) : len(), accès direct, itération
+    par paquets ; chaque setup est un dict avec les paramètres à utiliser.
+    """
+    return strategy_space("moving_average_crossover")
+
+def generate_strategy_setups(strategy_names=None):
+    """
+    Espaces de setups de chaque stratégie : {nom: ParamSpace} (voir strategy_space), pour toutes
+    les stratégies de STRATEGY_FUNCS ou celles de 'strategy_names'.
+    """
+    return {name: strategy_space(name) for name in strategy_names or STRATEGY_FUNCS}
 
 def moving_average_crossover(price, ma_short, ma_long, **kwargs):
     """
     Croisement de moyennes mobiles : entrée quand la MA courte croise au-dessus de la MA longue.
     Sortie sur croisement inverse.
     """
-    ma_s = price.rolling(ma_short).mean()
-    ma_l = price.rolling(ma_long).mean()
+    ma_s = indicators.sma(price, ma_short)
+    ma_l = indicators.sma(price, ma_long)
     entries = (ma_s > ma_l) & (ma_s.shift(1) <= ma_l.shift(1))
     exits = (ma_s < ma_l) & (ma_s.shift(1) >= ma_l.shift(1))
     return entries, exits
@@ -51,8 +37,7 @@ def rsi_pullback(price, rsi_period, rsi_val, **kwargs):
     """
     RSI Pullback : entrée si RSI < seuil, sortie si RSI > 50.
     """
-    import pandas_ta as ta
-    rsi = ta.rsi(price, length=rsi_period)
+    rsi = indicators.rsi(price, rsi_period)
     entries = rsi < rsi_val
     exits = rsi > 50
     return entries, exits
@@ -61,7 +46,7 @@ def breakout_high(price, window, **kwargs):
     """
     Breakout : entrée si prix casse le plus haut sur 'window' périodes, sortie si prix repasse sous ce niveau.
     """
-    high = price.rolling(window).max()
+    high = indicators.rolling_max(price, window)
     entries = price > high.shift(1)
     exits = price < high.shift(1)
     return entries, exits
@@ -70,7 +55,7 @@ def breakout_low(price, window, **kwargs):
     """
     Breakout : entrée si prix casse le plus bas sur 'window' périodes, sortie si prix repasse au-dessus.
     """
-    low = price.rolling(window).min()
+    low = indicators.rolling_min(price, window)
     entries = price < low.shift(1)
     exits = price > low.shift(1)
     return entries, exits
@@ -79,7 +64,7 @@ def mean_reversion(price, window, thresh, **kwargs):
     """
     Mean Reversion : entrée si prix s'écarte de la moyenne de 'window' de plus de 'thresh' %, sortie sur retour à la moyenne.
     """
-    ma = price.rolling(window).mean()
+    ma = indicators.sma(price, window)
     dev = (price - ma) / ma
     entries = dev < -thresh
     exits = price > ma
@@ -89,7 +74,7 @@ def momentum(price, window, thresh, **kwargs):
     """
     Momentum : entrée si rendement sur 'window' périodes > 'thresh', sortie si rendement < 0.
     """
-    returns = price.pct_change(window)
+    returns = indicators.pct_change(price, window)
     entries = returns > thresh
     exits = returns < 0
     return entries, exits
@@ -98,10 +83,7 @@ def macd_cross(price, fast=12, slow=26, signal=9, **kwargs):
     """
     MACD : entrée quand MACD croise au-dessus de son signal, sortie sur croisement inverse.
     """
-    ema_fast = price.ewm(span=fast, adjust=False).mean()
-    ema_slow = price.ewm(span=slow, adjust=False).mean()
-    macd = ema_fast - ema_slow
-    macd_signal = macd.ewm(span=signal, adjust=False).mean()
+    macd, macd_signal = indicators.macd(price, fast, slow, signal)
     entries = (macd > macd_signal) & (macd.shift(1) <= macd_signal.shift(1))
     exits = (macd < macd_signal) & (macd.shift(1) >= macd_signal.shift(1))
     return entries, exits
@@ -110,8 +92,8 @@ def bollinger_band_break(price, window, n_std, **kwargs):
     """
     Bollinger Bands Break : entrée si prix casse la bande supérieure, sortie si prix repasse sous la moyenne.
     """
-    ma = price.rolling(window).mean()
-    std = price.rolling(window).std()
+    ma = indicators.sma(price, window)
+    std = indicators.rolling_std(price, window)
     upper = ma + n_std * std
     entries = price > upper
     exits = price < ma
@@ -121,8 +103,8 @@ def bollinger_mean_revert(price, window, n_std, **kwargs):
     """
     Bollinger Mean Revert : entrée si prix casse la bande inférieure, sortie sur retour à la moyenne.
     """
-    ma = price.rolling(window).mean()
-    std = price.rolling(window).std()
+    ma = indicators.sma(price, window)
+    std = indicators.rolling_std(price, window)
     lower = ma - n_std * std
     entries = price < lower
     exits = price > ma
@@ -132,7 +114,7 @@ def support_resistance_break(price, window, **kwargs):
     """
     Support/Resistance : entrée si prix casse la résistance (max sur window), sortie si prix repasse sous la résistance.
     """
-    resistance = price.rolling(window).max()
+    resistance = indicators.rolling_max(price, window)
     entries = price > resistance.shift(1)
     exits = price < resistance.shift(1)
     return entries, exits
@@ -141,20 +123,17 @@ def range_bound(price, window, **kwargs):
     """
     Range Bound : entrée si prix touche la borne basse (min sur window), sortie si prix touche la borne haute.
     """
-    low = price.rolling(window).min()
-    high = price.rolling(window).max()
+    low = indicators.rolling_min(price, window)
+    high = indicators.rolling_max(price, window)
     entries = price <= low
     exits = price >= high
     return entries, exits
 
-def stochastic_cross(price, k_period, d_period, thresh_low=20, thresh_high=80, **kwargs):
+def stochastic_cross(price, k_period, d_period, thresh_low=20, thresh_high=80, high=None, low=None, **kwargs):
     """
     Stochastic Oscillator : entrée si %K croise au-dessus de %D sous thresh_low, sortie si %K croise sous %D au-dessus de thresh_high.
     """
-    low = price.rolling(k_period).min()
-    high = price.rolling(k_period).max()
-    k = 100 * (price - low) / (high - low)
-    d = k.rolling(d_period).mean()
+    k, d = indicators.stoch(price, k_period, d_period, high=high, low=low)
     entries = (k > d) & (k.shift(1) <= d.shift(1)) & (k < thresh_low)
     exits = (k < d) & (k.shift(1) >= d.shift(1)) & (k > thresh_high)
     return entries, exits
@@ -163,19 +142,18 @@ def donchian_breakout(price, window, **kwargs):
     """
     Donchian Channel Breakout : entrée si prix casse le plus haut/bas du canal, sortie sur retour dans le canal.
     """
-    high = price.rolling(window).max()
-    low = price.rolling(window).min()
+    high = indicators.rolling_max(price, window)
+    low = indicators.rolling_min(price, window)
     entries = price > high.shift(1)
     exits = price < low.shift(1)
     return entries, exits
 
-def atr_trailing_stop(price, atr_period, multiplier, **kwargs):
+def atr_trailing_stop(price, atr_period, multiplier, high=None, low=None, **kwargs):
     """
     ATR Trailing Stop : entrée si prix casse au-dessus de la moyenne, sortie si prix casse sous un stop basé sur ATR.
     """
-    tr = np.maximum(price.diff(), np.maximum(price - price.shift(1), price.shift(1) - price))
-    atr = tr.rolling(atr_period).mean()
-    ma = price.rolling(atr_period).mean()
+    atr = indicators.atr(price, atr_period, high=high, low=low)
+    ma = indicators.sma(price, atr_period)
     stop = ma - multiplier * atr
     entries = price > ma
     exits = price < stop
@@ -185,8 +163,7 @@ def rsi_overbought_oversold(price, rsi_period, overbought=70, oversold=30, **kwa
     """
     RSI Overbought/Oversold : entrée si RSI < oversold, sortie si RSI > overbought.
     """
-    import pandas_ta as ta
-    rsi = ta.rsi(price, length=rsi_period)
+    rsi = indicators.rsi(price, rsi_period)
     entries = rsi < oversold
     exits = rsi > overbought
     return entries, exits
@@ -195,18 +172,17 @@ def ema_crossover(price, ema_fast, ema_slow, **kwargs):
     """
     EMA Crossover : entrée si EMA rapide croise au-dessus de la lente, sortie sur croisement inverse.
     """
-    fast = price.ewm(span=ema_fast, adjust=False).mean()
-    slow = price.ewm(span=ema_slow, adjust=False).mean()
+    fast = indicators.ema(price, ema_fast)
+    slow = indicators.ema(price, ema_slow)
     entries = (fast > slow) & (fast.shift(1) <= slow.shift(1))
     exits = (fast < slow) & (fast.shift(1) >= slow.shift(1))
     return entries, exits
 
-def parabolic_sar(price, af=0.02, max_af=0.2, **kwargs):
+def parabolic_sar(price, af=0.02, max_af=0.2, high=None, low=None, **kwargs):
     """
     Parabolic SAR : entrée si prix croise au-dessus du SAR, sortie sur croisement inverse.
     """
-    import pandas_ta as ta
-    sar = ta.psar(price, af=af, max_af=max_af)["PSARl_0.02_0.2"]
+    sar = indicators.psar(price, af, max_af, high=high, low=low)
     entries = price > sar
     exits = price < sar
     return entries, exits
@@ -215,9 +191,9 @@ def triple_ma_crossover(price, ma1, ma2, ma3, **kwargs):
     """
     Triple MA Crossover : entrée si MA courte > MA moyenne > MA longue, sortie si l'ordre s'inverse.
     """
-    m1 = price.rolling(ma1).mean()
-    m2 = price.rolling(ma2).mean()
-    m3 = price.rolling(ma3).mean()
+    m1 = indicators.sma(price, ma1)
+    m2 = indicators.sma(price, ma2)
+    m3 = indicators.sma(price, ma3)
     entries = (m1 > m2) & (m2 > m3) & ~((m1.shift(1) > m2.shift(1)) & (m2.shift(1) > m3.shift(1)))
     exits = (m1 < m2) & (m2 < m3) & ~((m1.shift(1) < m2.shift(1)) & (m2.shift(1) < m3.shift(1)))
     return entries, exits
@@ -226,8 +202,8 @@ def vwma_crossover(price, volume, short, long, **kwargs):
     """
     VWMA Crossover : entrée si VWMA courte croise au-dessus de la VWMA longue, sortie sur croisement inverse.
     """
-    vwma_short = (price * volume).rolling(short).sum() / volume.rolling(short).sum()
-    vwma_long = (price * volume).rolling(long).sum() / volume.rolling(long).sum()
+    vwma_short = indicators.vwma(price, volume, short)
+    vwma_long = indicators.vwma(price, volume, long)
     entries = (vwma_short > vwma_long) & (vwma_short.shift(1) <= vwma_long.shift(1))
     exits = (vwma_short < vwma_long) & (vwma_short.shift(1) >= vwma_long.shift(1))
     return entries, exits
@@ -236,60 +212,56 @@ def price_channel_break(price, window, **kwargs):
     """
     Price Channel Break : entrée si prix casse la borne supérieure du canal, sortie si prix repasse sous la moyenne.
     """
-    high = price.rolling(window).max()
-    ma = price.rolling(window).mean()
+    high = indicators.rolling_max(price, window)
+    ma = indicators.sma(price, window)
     entries = price > high.shift(1)
     exits = price < ma
     return entries, exits
 
-def supertrend_entry(price, atr_period=10, multiplier=3, **kwargs):
+def supertrend_entry(price, atr_period=10, multiplier=3, high=None, low=None, **kwargs):
     """
     Supertrend : entrée si prix croise au-dessus du Supertrend, sortie sur croisement inverse.
     """
-    import pandas_ta as ta
-    st = ta.supertrend(length=atr_period, multiplier=multiplier)["SUPERT_10_3.0"]
+    st = indicators.supertrend(price, atr_period, multiplier, high=high, low=low)
     entries = price > st
     exits = price < st
     return entries, exits
 
-def cci_entry(price, cci_period=20, thresh=100, **kwargs):
+def cci_entry(price, cci_period=20, thresh=100, high=None, low=None, **kwargs):
     """
     CCI : entrée si CCI > thresh, sortie si CCI < 0.
     """
-    import pandas_ta as ta
-    cci = ta.cci(price, length=cci_period)
+    cci = indicators.cci(price, cci_period, high=high, low=low)
     entries = cci > thresh
     exits = cci < 0
     return entries, exits
 
-def adx_trend(price, adx_period=14, thresh=25, **kwargs):
+def adx_trend(price, adx_period=14, thresh=25, high=None, low=None, **kwargs):
     """
     ADX Trend : entrée si ADX > thresh et +DI > -DI, sortie si ADX < thresh ou -DI > +DI.
     """
-    import pandas_ta as ta
-    adx = ta.adx(price, length=adx_period)
-    entries = (adx["ADX_14"] > thresh) & (adx["DMP_14"] > adx["DMN_14"])
-    exits = (adx["ADX_14"] < thresh) | (adx["DMN_14"] > adx["DMP_14"])
+    adx, dmp, dmn = indicators.adx(price, adx_period, high=high, low=low)
+    entries = (adx > thresh) & (dmp > dmn)
+    exits = (adx < thresh) | (dmn > dmp)
     return entries, exits
 
 def turtle_breakout(price, window, **kwargs):
     """
     Turtle Breakout : entrée si prix casse le plus haut sur window, sortie si prix casse le plus bas sur window.
     """
-    high = price.rolling(window).max()
-    low = price.rolling(window).min()
+    high = indicators.rolling_max(price, window)
+    low = indicators.rolling_min(price, window)
     entries = price > high.shift(1)
     exits = price < low.shift(1)
     return entries, exits
 
-def heikin_ashi_trend(price, **kwargs):
+def heikin_ashi_trend(price, open_=None, high=None, low=None, **kwargs):
     """
     Heikin Ashi Trend : entrée si bougie HA verte, sortie si bougie HA rouge.
     """
-    import pandas_ta as ta
-    ha = ta.ha(open_=price, high=price, low=price, close=price)
-    entries = ha["HA_close"] > ha["HA_open"]
-    exits = ha["HA_close"] < ha["HA_open"]
+    ha_open, ha_close = indicators.heikin_ashi(price, open_=open_, high=high, low=low)
+    entries = ha_close > ha_open
+    exits = ha_close < ha_open
     return entries, exits
 
 STRATEGY_FUNCS = {
@@ -319,3 +291,62 @@ STRATEGY_FUNCS = {
     "turtle_breakout": turtle_breakout,
     "heikin_ashi_trend": heikin_ashi_trend,
 }
+
+# === REGISTRE : ENTRÉES ET ESPACES DE PARAMÈTRES PAR STRATÉGIE ===
+
+# Colonne OHLCV de chaque entrée (argument nommé des stratégies), en plus de la clôture
+INPUT_COLUMNS = {"open_": "Open", "high": "High", "low": "Low", "volume": "Volume"}
+
+# Entrées requises par stratégie (absente = clôture seule)
+STRATEGY_INPUTS = {
+    "stochastic_cross": ("high", "low"),
+    "atr_trailing_stop": ("high", "low"),
+    "parabolic_sar": ("high", "low"),
+    "vwma_crossover": ("volume",),
+    "supertrend_entry": ("high", "low"),
+    "cci_entry": ("high", "low"),
+    "adx_trend": ("high", "low"),
+    "heikin_ashi_trend": ("open_", "high", "low"),
+}
+
+# Contraintes entre paramètres, vectorisées (voir param_space.py) : reçoivent {nom: tableau}
+# ou un setup (dict de scalaires)
+STRATEGY_CONSTRAINTS = {
+    "moving_average_crossover": [lambda p: p["ma_short"] < p["ma_long"]],   # On évite les setups incohérents
+    "macd_cross": [lambda p: p["fast"] < p["slow"]],
+    "ema_crossover": [lambda p: p["ema_fast"] < p["ema_slow"]],
+    "triple_ma_crossover": [lambda p: (p["ma1"] < p["ma2"]) & (p["ma2"] < p["ma3"])],
+    "vwma_crossover": [lambda p: p["short"] < p["long"]],
+}
+
+def required_inputs(strat_name):
+    """Entrées OHLCV requises par la stratégie, en plus de la clôture (noms de INPUT_COLUMNS)."""
+    return STRATEGY_INPUTS.get(strat_name, ())
+
+def required_params(strat_name):
+    """Paramètres obligatoires (sans valeur par défaut) de la stratégie, hors prix et entrées."""
+    params = list(inspect.signature(STRATEGY_FUNCS[strat_name]).parameters.values())[1:]
+    return {
+        p.name for p in params
+        if p.default is p.empty and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+        and p.name not in INPUT_COLUMNS
+    }
+
+def strategy_ranges(strat_name):
+    """Plages de la stratégie : config.STRATEGY_PARAMS (signal) + SL_PCT / TP_PCT (exécution)."""
+    return {**config.STRATEGY_PARAMS.get(strat_name, {}), "sl_pct": config.SL_PCT, "tp_pct": config.TP_PCT}
+
+def strategy_space(strat_name):
+    """
+    ParamSpace des setups valides de la stratégie (plages de strategy_ranges, contraintes de
+    STRATEGY_CONSTRAINTS). Lève ValueError si un paramètre obligatoire n'a pas de plage.
+    """
+    ranges = strategy_ranges(strat_name)
+    missing = required_params(strat_name) - set(ranges)
+    if missing:
+        raise ValueError(f"Plages manquantes dans config.STRATEGY_PARAMS pour {strat_name} : {sorted(missing)}")
+    return ParamSpace(ranges, STRATEGY_CONSTRAINTS.get(strat_name, ()))
+
+def is_valid_setup(strat_name, setup):
+    """True si le setup respecte les contraintes de la stratégie (paramètres présents)."""
+    return all(bool(constraint(setup)) for constraint in STRATEGY_CONSTRAINTS.get(strat_name, ()))
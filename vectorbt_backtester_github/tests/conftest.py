@@ -0,0 +1,18 @@
+"""Données partagées par les tests : OHLCV synthétiques (benchmark.synthetic_ohlcv), reproductibles."""
+
+import pytest
+import benchmark
+import config
+
+@pytest.fixture(autouse=True)
+def _quiet(monkeypatch):
+    """Pas de tableau de profil ni de fichiers de résultats écrits par les tests."""
+    monkeypatch.setattr(config, "PROFILE", False)
+
+@pytest.fixture(scope="session")
+def ohlcv():
+    return benchmark.synthetic_ohlcv(n_bars=600, seed=11)
+
+@pytest.fixture(scope="session")
+def panel():
+    return benchmark.synthetic_ohlcv(n_bars=500, n_tickers=3, seed=12)
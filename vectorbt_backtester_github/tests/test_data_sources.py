@@ -0,0 +1,47 @@
+"""
+Cache disque (data_sources.CachedSource) devant une source factice dont l'historique s'allonge :
+la plage enregistrée comme couverte est celle des données reçues, pas celle demandée.
+"""
+
+import pandas as pd
+import data_sources
+
+class GrowingSource(data_sources.DataSource):
+    """Source dont les barres sont publiées jusqu'à 'published' (exclu) ; garde trace des appels."""
+
+    def __init__(self, frame, published):
+        self.frame = frame
+        self.published = pd.Timestamp(published)
+        self.calls = []
+
+    def fetch(self, ticker, start, end, timeframe="1d"):
+        self.calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        return data_sources.slice_dates(self.frame, start, min(pd.Timestamp(end), self.published))
+
+def test_future_end_fetches_new_bars(ohlcv, tmp_path):
+    frame = data_sources.normalize_ohlcv(ohlcv)
+    source = GrowingSource(frame, frame.index[300])
+    cached = data_sources.CachedSource(source, str(tmp_path), fmt="csv")
+    first = cached.fetch("TEST", frame.index[0], "2100-01-01")
+    assert first.index[-1] == frame.index[299]
+
+    # Nouvelles barres publiées : la fin manquante est redemandée
+    source.published = frame.index[400]
+    second = cached.fetch("TEST", frame.index[0], "2100-01-01")
+    assert len(source.calls) == 2 and source.calls[1][0] == frame.index[299] + pd.Timedelta("1D")
+    pd.testing.assert_frame_equal(second, frame.iloc[:400], check_freq=False)
+
+    # Plage passée entièrement couverte : lecture locale uniquement
+    cached.fetch("TEST", frame.index[0], frame.index[350])
+    assert len(source.calls) == 2
+
+def test_empty_download_is_not_cached(ohlcv, tmp_path):
+    frame = data_sources.normalize_ohlcv(ohlcv)
+    source = GrowingSource(frame, frame.index[0])
+    cached = data_sources.CachedSource(source, str(tmp_path), fmt="csv")
+    assert cached.fetch("TEST", frame.index[0], frame.index[100]).empty
+
+    source.published = frame.index[-1]
+    data = cached.fetch("TEST", frame.index[0], frame.index[100])
+    assert len(source.calls) == 2
+    pd.testing.assert_frame_equal(data, frame.iloc[:100], check_freq=False)
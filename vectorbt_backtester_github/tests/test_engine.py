@@ -0,0 +1,124 @@
+"""
+Moteur vectorisé (backtester.py) : mêmes métriques que la boucle setup par setup, par tranches de
+barres comme d'un bloc, découpage par contexte cohérent avec la simulation complète, reprise
+d'un sweep depuis le store SQLite.
+"""
+
+import itertools
+import numpy as np
+import pytest
+import backtester
+import config
+import metrics
+import strategies
+from market_data import MarketData
+from result_store import ResultStore
+
+STOPS = [{"sl_pct": None, "tp_pct": None}, {"sl_pct": 0.03, "tp_pct": 0.08}]
+
+def grid(**ranges):
+    """Setups (liste de dicts) du produit des plages, croisés avec STOPS."""
+    names = list(ranges)
+    return [
+        {**dict(zip(names, values)), **stops}
+        for values in itertools.product(*ranges.values()) for stops in STOPS
+    ]
+
+SETUPS = {
+    "moving_average_crossover": grid(ma_short=[5, 10, 20], ma_long=[50, 100]),
+    "rsi_pullback": grid(rsi_period=[7, 14], rsi_val=[25, 35]),
+    "breakout_high": grid(window=[20, 55]),
+}
+
+def sorted_results(df):
+    params = [c for c in df.columns if c not in config.METRICS]
+    return df.sort_values(params, na_position="first").reset_index(drop=True)
+
+def assert_same_results(actual, expected):
+    actual, expected = sorted_results(actual), sorted_results(expected)
+    assert len(actual) == len(expected)
+    for name in config.METRICS:
+        np.testing.assert_allclose(actual[name].to_numpy(dtype=float), expected[name].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-12, err_msg=name)
+
+@pytest.fixture(scope="module")
+def loop_results(ohlcv):
+    return backtester.run_backtests(ohlcv, SETUPS, None, config)
+
+def test_batched_matches_loop(ohlcv, loop_results):
+    assert len(loop_results) == sum(len(s) for s in SETUPS.values())
+    batched = backtester.run_backtests(ohlcv, SETUPS, None, config, batched=True)
+    assert_same_results(batched, loop_results)
+
+@pytest.mark.parametrize("chunk_bars", [150, 250])
+def test_chunked_matches_unchunked(ohlcv, chunk_bars):
+    data = MarketData.from_frame(ohlcv)
+    close, inputs = backtester.market_inputs(data)
+    for strat_name, setups in SETUPS.items():
+        strat_func = strategies.STRATEGY_FUNCS[strat_name]
+        expected, valid = backtester.run_strategy_batched(strat_func, close, setups, 4, inputs=inputs)
+        actual, chunk_valid = backtester.run_strategy_chunked(strat_func, data, setups, 4, chunk_bars, warmup=150)
+        np.testing.assert_array_equal(chunk_valid, valid)
+        for name in config.METRICS:
+            np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, atol=1e-12,
+                                       err_msg=f"{strat_name} {name}")
+
+def test_context_metrics_add_up(ohlcv):
+    close = ohlcv["Close"]
+    entries, exits = strategies.moving_average_crossover(close, ma_short=10, ma_long=50)
+    entries = np.column_stack([entries, entries])
+    exits = np.column_stack([exits, exits])
+    pf = backtester.simulate_batch(close, entries, exits, [np.nan, 0.03], [np.nan, 0.08])
+    # Contextes par blocs de 40 barres, couvrant toutes les barres
+    labels = np.repeat(np.resize(metrics.CONTEXTS, -(-len(close) // 40)), 40)[:len(close)]
+    names = ["trades", "total_return"]
+    full = metrics.compute_metrics(pf, names)
+    by_ctx = metrics.compute_context_metrics(pf, labels, names)
+    assert by_ctx["trades"].shape == (2, len(metrics.CONTEXTS))
+    np.testing.assert_array_equal(by_ctx["trades"].sum(axis=1), full["trades"])
+    # Rendements de chaque contexte recollés : leur produit est celui de tout l'historique
+    np.testing.assert_allclose(np.prod(1 + by_ctx["total_return"], axis=1), 1 + full["total_return"], rtol=1e-9)
+
+def test_store_resumes_sweep(ohlcv, loop_results, tmp_path, monkeypatch):
+    computed = []
+    backtest_chunk = backtester._backtest_chunk
+
+    def counting_chunk(data, chunk):
+        computed.append(len(chunk[1]))
+        return backtest_chunk(data, chunk)
+
+    monkeypatch.setattr(backtester, "_backtest_chunk", counting_chunk)
+    monkeypatch.setattr(config, "PARALLEL_CHUNK_SIZE", 4)
+    path = str(tmp_path / "store.sqlite")
+
+    # Sweep interrompu : seule une partie des setups a été enregistrée
+    partial = {name: setups[:len(setups) // 2] for name, setups in SETUPS.items()}
+    store = ResultStore(path)
+    backtester.run_backtests(ohlcv, partial, None, config, store=store)
+    store.close()
+    n_partial = sum(len(s) for s in partial.values())
+    assert sum(computed) == n_partial
+
+    # Reprise : seuls les setups manquants sont calculés, le résultat est celui d'un sweep complet
+    computed.clear()
+    store = ResultStore(path)
+    resumed = backtester.run_backtests(ohlcv, SETUPS, None, config, store=store)
+    assert sum(computed) == len(loop_results) - n_partial
+    assert store.counts() == {"ok": len(loop_results)}
+    assert_same_results(resumed, loop_results)
+
+    # Relance : plus rien à calculer, mêmes résultats
+    computed.clear()
+    again = backtester.run_backtests(ohlcv, SETUPS, None, config, store=store)
+    store.close()
+    assert computed == []
+    assert_same_results(again, resumed)
+
+def test_signal_error_is_reported(ohlcv, capsys):
+    backtester.SIGNAL_ERRORS_REPORTED.discard("moving_average_crossover")
+    # Paramètre mal nommé : la stratégie lève TypeError, ses setups sont ignorés mais signalés
+    setups = {"moving_average_crossover": [{"ma_short": 5, "ma_lng": 50}, {"ma_short": 10, "ma_lng": 50}]}
+    results = backtester.run_backtests(ohlcv, setups, None, config, batched=True)
+    assert results.empty
+    out = capsys.readouterr().out
+    assert out.count("Signaux moving_average_crossover en erreur") == 1 and "ma_long" in out
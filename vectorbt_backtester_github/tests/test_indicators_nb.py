@@ -0,0 +1,165 @@
+"""
+Noyaux numba (indicators_nb.py) contre des références pandas écrites directement à partir des
+définitions (Wilder amorcé par une SMA comme TA-Lib, CCI, stochastique, Supertrend, PSAR...).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import indicators_nb
+
+RTOL = 1e-11
+
+def assert_close(actual, expected):
+    actual = np.asarray(actual, dtype=float).reshape(len(expected), -1)[:, 0]
+    expected = np.asarray(expected, dtype=float)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=RTOL, atol=1e-9, equal_nan=True)
+
+def wilder(x, length, seed=None, seed_at=None):
+    """Moyenne de Wilder : amorce (SMA des length premières valeurs par défaut) puis ewm alpha=1/length."""
+    x = pd.Series(np.asarray(x, dtype=float))
+    start = x.first_valid_index()
+    if seed_at is None:
+        seed_at = start + length - 1
+        seed = x.iloc[start:seed_at + 1].mean()
+    seeded = x.copy()
+    seeded.iloc[:seed_at + 1] = np.nan
+    seeded.iloc[seed_at] = seed
+    return seeded.ewm(alpha=1 / length, adjust=False).mean()
+
+def true_range(h, l, c):
+    prev = c.shift(1)
+    tr = pd.concat([h - l, (h - prev).abs(), (prev - l).abs()], axis=1).max(axis=1)
+    tr.iloc[0] = np.nan
+    return tr
+
+@pytest.fixture(scope="module")
+def hlc(ohlcv):
+    return ohlcv["High"].reset_index(drop=True), ohlcv["Low"].reset_index(drop=True), \
+        ohlcv["Close"].reset_index(drop=True)
+
+@pytest.mark.parametrize("period", [7, 14])
+def test_rsi_wilder(hlc, period):
+    close = hlc[2]
+    diff = close.diff()
+    gain, loss = diff.clip(lower=0), (-diff).clip(lower=0)
+    expected = 100 * wilder(gain, period) / (wilder(gain, period) + wilder(loss, period))
+    assert_close(indicators_nb.rsi(close, [period]), expected)
+
+def test_rsi_simple(hlc):
+    close = hlc[2]
+    diff = close.diff()
+    gain, loss = diff.clip(lower=0).rolling(14).mean(), (-diff).clip(lower=0).rolling(14).mean()
+    expected = 100 - 100 / (1 + gain / (loss + 1e-10))
+    assert_close(indicators_nb.rsi(close, [14], wilder=False), expected)
+
+def test_atr(hlc):
+    h, l, c = hlc
+    assert_close(indicators_nb.atr(h, l, c, [14]), wilder(true_range(h, l, c), 14))
+
+def test_supertrend(hlc):
+    h, l, c = hlc
+    length, mult = 10, 3.0
+    atr = wilder(true_range(h, l, c), length)
+    upper = ((h + l) / 2 + mult * atr).to_numpy(copy=True)
+    lower = ((h + l) / 2 - mult * atr).to_numpy(copy=True)
+    expected = np.full(len(c), np.nan)
+    direction = 1
+    for i in range(1, len(c)):
+        if c[i] > upper[i - 1]:
+            direction = 1
+        elif c[i] < lower[i - 1]:
+            direction = -1
+        else:
+            if direction > 0:
+                lower[i] = max(lower[i], lower[i - 1])
+            else:
+                upper[i] = min(upper[i], upper[i - 1])
+        expected[i] = lower[i] if direction > 0 else upper[i]
+    assert_close(indicators_nb.supertrend(h, l, c, length, mult)[0], expected)
+
+def test_cci(hlc):
+    h, l, c = hlc
+    tp = (h + l + c) / 3
+    mean = tp.rolling(20).mean()
+    mad = tp.rolling(20).apply(lambda x: np.abs(x - x.mean()).mean(), raw=True)
+    assert_close(indicators_nb.cci(h, l, c, [20]), (tp - mean) / (0.015 * mad))
+
+def test_adx(hlc):
+    h, l, c = hlc
+    n = 14
+    up, dn = h.diff(), -l.diff()
+    plus = up.where((up > dn) & (up > 0), 0.0)
+    minus = dn.where((dn > up) & (dn > 0), 0.0)
+
+    def wilder_sum(x):
+        # Somme des n-1 premières barres (dès la barre 1), puis s = s - s / n + x = n * ewm(alpha=1/n)
+        return n * wilder(x, n, seed=x.iloc[1:n].sum() / n, seed_at=n - 1)
+
+    tr = wilder_sum(true_range(h, l, c))
+    dmp, dmn = 100 * wilder_sum(plus) / tr, 100 * wilder_sum(minus) / tr
+    dmp.iloc[n - 1] = dmn.iloc[n - 1] = np.nan     # barre d'amorce non publiée (TA-Lib)
+    dx = 100 * (dmp - dmn).abs() / (dmp + dmn)
+    adx, plus_di, minus_di = indicators_nb.adx(h, l, c, [n])
+    assert_close(plus_di, dmp)
+    assert_close(minus_di, dmn)
+    assert_close(adx, wilder(dx, n))
+
+@pytest.mark.parametrize("smooth_k", [1, 3])
+def test_stoch(hlc, smooth_k):
+    h, l, c = hlc
+    lo, hi = l.rolling(14).min(), h.rolling(14).max()
+    k = 100 * (c - lo) / (hi - lo)
+    if smooth_k > 1:
+        k = k.rolling(smooth_k).mean()
+    k_out, d_out = indicators_nb.stoch(h, l, c, 14, 3, smooth_k)
+    assert_close(k_out, k)
+    assert_close(d_out, k.rolling(3).mean())
+
+def test_heikin_ashi(ohlcv):
+    o, h, l, c = (ohlcv[f].to_numpy() for f in ("Open", "High", "Low", "Close"))
+    ha_close = (o + h + l + c) / 4
+    ha_open = np.empty_like(o)
+    ha_open[0] = (o[0] + c[0]) / 2
+    for i in range(1, len(o)):
+        ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2
+    out = indicators_nb.heikin_ashi(o, h, l, c)
+    assert_close(out[0], ha_open)
+    assert_close(out[1], np.maximum.reduce([ha_open, h, ha_close]))
+    assert_close(out[2], np.minimum.reduce([ha_open, l, ha_close]))
+    assert_close(out[3], ha_close)
+
+def test_psar(hlc):
+    h, l, c = (s.to_numpy() for s in hlc)
+    af0, max_af = 0.02, 0.2
+    # Sens initial : mouvement directionnel des deux premières barres
+    falling = (l[0] - l[1] > h[1] - h[0]) and (l[0] - l[1] > 0)
+    sar, ep, af = c[0], (l[1] if falling else h[1]), af0
+    expected = np.full(len(c), np.nan)
+    for i in range(1, len(c)):
+        sar = sar + af * (ep - sar)
+        if falling:
+            if l[i] < ep:
+                ep, af = l[i], min(af + af0, max_af)
+            sar = max(sar, h[i - 1], h[max(i - 2, 0)])
+            flip = h[i] > sar
+        else:
+            if h[i] > ep:
+                ep, af = h[i], min(af + af0, max_af)
+            sar = min(sar, l[i - 1], l[max(i - 2, 0)])
+            flip = l[i] < sar
+        if flip:
+            sar, af, falling = ep, af0, not falling
+            ep = l[i] if falling else h[i]
+        expected[i] = sar
+    assert_close(indicators_nb.psar(h, l, c, af0, max_af), expected)
+
+def test_parameter_layout(panel):
+    """Plusieurs paramètres x plusieurs colonnes : colonne j = i_param * n_colonnes + i_colonne."""
+    close = panel["Close"].to_numpy()
+    out = indicators_nb.rsi(close, [7, 14])
+    assert out.shape == (len(close), 6)
+    for p, period in enumerate([7, 14]):
+        for col in range(3):
+            np.testing.assert_array_equal(out[:, p * 3 + col], indicators_nb.rsi(close[:, col], [period])[:, 0])
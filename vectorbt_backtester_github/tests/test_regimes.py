@@ -0,0 +1,20 @@
+"""Labels de régime (regimes.py) et compatibilité de context.detect_trend avec sa version d'origine."""
+
+import pandas as pd
+import pytest
+import context
+import regimes
+
+def test_detect_trend_matches_original(ohlcv):
+    close = ohlcv["Close"]
+    ma = close.rolling(200).mean()
+    slope = ma.diff(10)
+    expected = pd.Series(0, index=close.index)
+    expected[(close > ma) & (slope > 0)] = 1
+    expected[(close < ma) & (slope < 0)] = -1
+    pd.testing.assert_series_equal(context.detect_trend(close), expected)
+
+@pytest.mark.parametrize("params", [{"slope_lookback": 0}, {"slope_lookback": [0, 5]}])
+def test_slope_lookback_must_be_positive(ohlcv, params):
+    with pytest.raises(ValueError, match="slope_lookback"):
+        regimes.regime_grid(ohlcv["Close"], "ma_slope", params)
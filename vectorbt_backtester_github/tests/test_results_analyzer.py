@@ -0,0 +1,30 @@
+"""Classements de results_analyzer.py avec un config.METRICS réduit aux métriques requises."""
+
+import pytest
+import backtester
+import config
+import results_analyzer
+
+SETUPS = {
+    "moving_average_crossover": [{"ma_short": s, "ma_long": 50} for s in (5, 10, 20)],
+    "breakout_high": [{"window": w} for w in (10, 20)],
+}
+
+@pytest.fixture
+def minimal_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "METRICS", ["trades", "cagr", "max_dd", "pf"])
+    monkeypatch.setattr(config, "RESULTS_DIR", str(tmp_path))
+    return tmp_path
+
+def test_analyze_without_sharpe(ohlcv, minimal_metrics):
+    results = backtester.run_backtests(ohlcv, SETUPS, None, config, batched=True)
+    assert "sharpe" not in results.columns
+    results_analyzer.analyze_and_export(results)
+    assert any(minimal_metrics.glob("best_strategies*_global.csv"))
+
+def test_analyze_universe_without_sharpe(panel, minimal_metrics):
+    results = backtester.run_backtests(panel, SETUPS, None, config, batched=True)
+    results_analyzer.analyze_universe(results, min_trades=1)
+    universe = (minimal_metrics / "best_strategies_universe.csv").read_text().splitlines()[0].split(",")
+    assert "mean_sharpe" not in universe and "median_pf" in universe
+    assert "trades" not in universe
@@ -1,21 +1,15 @@
 # utils.py
 
 import pandas as pd
+import indicators_nb
 
 def compute_rsi(price, period=14):
     """
     Calcule le RSI sur la série de prix.
+    Moyennes simples des hausses/baisses (noyau numba, voir indicators_nb.rsi).
     """
-    delta = price.diff()
-    up = delta.clip(lower=0)
-    down = -delta.clip(upper=0)
-
-    avg_gain = up.rolling(period).mean()
-    avg_loss = down.rolling(period).mean()
-
-    rs = avg_gain / (avg_loss + 1e-10)
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    rsi = indicators_nb.rsi(price, [period], wilder=False)[:, 0]
+    return pd.Series(rsi, index=price.index)
 
 def print_separator(title=None):
     """
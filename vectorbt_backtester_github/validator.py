@@ -1,23 +1,38 @@
-
-
 """
 validator.py
 
 Module pour valider les stratégies backtestées de manière "pro" :
 - Validation out-of-sample (OOS) : test des meilleurs setups sur une période jamais vue.
-- Validation walk-forward : simule le trading "en vrai" sur des fenêtres successives.
 - Filtre les setups robustes, évite la suroptimisation.
+(La validation walk-forward est dans walkforward.py.)
+
+Moteur : le DataFrame de résultats est regroupé par stratégie ; chaque setup unique est simulé
+UNE fois sur tout l'historique avec le moteur vectorisé (backtester.run_strategy_batched), puis
+les métriques in-sample et out-of-sample sont tirées des mêmes rendements, découpés par un
+masque de période (comme les contextes de marché, voir metrics.context_inputs) : un trade compte
+dans la période de sa barre d'entrée, une position ouverte à la coupure se poursuit en OOS.
+Valider 50 000 candidats = une passe par paquets de config.BATCH_SIZE colonnes, pas 100 000
+backtests séquentiels.
 
 Usage :
     from validator import validate_setups
 
-    robust_setups = validate_setups(setups_df, price_data, split_ratio=0.7, min_trades=15)
-
-A compléter selon ton workflow.
+    robust_setups = validate_setups(results_df, price_data, split_ratio=0.7, min_trades=15)
 """
 
-import pandas as pd
 import numpy as np
+import pandas as pd
+import config
+import backtester
+import metrics
+import parallel
+import strategies
+
+IN_SAMPLE, OUT_OF_SAMPLE = 0, 1
+PERIODS = {IN_SAMPLE: "in", OUT_OF_SAMPLE: "out"}
+
+# Colonnes d'un DataFrame de résultats qui ne sont ni des paramètres ni des métriques
+ID_COLUMNS = ("strategy", "strategy_type", "ticker", "context")
 
 def split_data(price_data, split_ratio=0.7):
     """Découpe les données prix en in-sample et out-of-sample."""
@@ -26,69 +41,121 @@ def split_data(price_data, split_ratio=0.7):
     out_sample = price_data.iloc[split_idx:]
     return in_sample, out_sample
 
-def run_backtest_on_period(strategy_func, params, price_data):
+def split_labels(n_bars, split_ratio=0.7):
+    """Période de chaque barre : IN_SAMPLE avant la coupure (comme split_data), OUT_OF_SAMPLE après."""
+    labels = np.full(n_bars, OUT_OF_SAMPLE, dtype=np.int8)
+    labels[:int(n_bars * split_ratio)] = IN_SAMPLE
+    return labels
+
+def setup_records(df):
     """
-    Lance le backtest d'une stratégie (sous forme de fonction) sur price_data.
-    Ex: stratégie = moving_average_crossover
-        params = {'ma_short': 20, 'ma_long': 100, ...}
+    Setups (dicts de paramètres) des lignes d'un DataFrame de résultats d'une stratégie :
+    colonnes hors identifiants et métriques, sans les paramètres des autres stratégies (NaN
+    sur tout le groupe). Les flottants entiers redeviennent des int (fenêtres des indicateurs).
     """
-    return strategy_func(price_data, **params)
-
-def validate_setups(setups_df, price_data, strategy_funcs=None, split_ratio=0.7, min_trades=15):
+    skip = set(ID_COLUMNS) | set(metrics.METRIC_FUNCS)
+    params = df[[c for c in df.columns if c not in skip]].dropna(axis=1, how="all")
+    for name in params.columns:
+        values = params[name]
+        if values.dtype.kind == "f" and np.all(np.mod(values, 1) == 0):
+            params[name] = values.astype(np.int64)
+    return params.to_dict("records")
+
+def _validate_chunk(data, chunk):
+    """Tâche (worker ou locale) : métriques par période d'un paquet de setups d'une stratégie."""
+    strat_func, setups, labels = chunk
+    close, inputs = backtester.market_inputs(data)
+    return backtester.run_strategy_batched(strat_func, close, setups, config.BATCH_SIZE, labels=labels,
+                                           inputs=inputs, contexts=tuple(PERIODS))
+
+def validate_setups(setups_df, price_data, strategy_funcs=None, split_ratio=0.7, min_trades=15,
+                    workers=1, chunk_size=None):
     """
     Pour chaque setup gagnant, teste sa robustesse out-of-sample.
-    - setups_df: DataFrame des setups à valider (issus du backtest principal)
-    - price_data: Données OHLC complètes
-    - strategy_funcs: dict {stratégie: fonction}
+    - setups_df: DataFrame des setups à valider (issus du backtest principal ou de la recherche) :
+      colonne 'strategy' (ou 'strategy_type', moving_average_crossover par défaut), paramètres,
+      et 'ticker' pour un panel (sinon chaque setup est validé sur tous les tickers)
+    - price_data: Données OHLC complètes (Series, DataFrame, panel ou MarketData)
+    - strategy_funcs: dict {stratégie: fonction renvoyant (entries, exits)}, strategies.STRATEGY_FUNCS par défaut
     - split_ratio: % données pour l'in-sample (reste en OOS)
     - min_trades: nombre min de trades en OOS pour considérer le setup comme valide
+    - workers: nb de processus (setups répartis par paquets de chunk_size, config.PARALLEL_CHUNK_SIZE
+      par défaut, voir parallel.py)
+    Les setups identiques (doublons, plusieurs tickers) ne sont simulés qu'une fois.
 
-    Retourne un DataFrame des setups robustes (OOS).
+    Retourne un DataFrame des setups robustes (OOS) : paramètres, {métrique}_in / {métrique}_out
+    pour les métriques de config.METRICS, robust et robust_ratio (CAGR OOS / CAGR IS).
     """
-    results = []
-
-    in_sample, out_sample = split_data(price_data, split_ratio)
-
-    for idx, setup in setups_df.iterrows():
-        strat_type = setup.get('strategy_type', 'moving_average_crossover')
-        params = {k: setup[k] for k in setup.index if k not in ['trades', 'cagr', 'sharpe', 'max_dd', 'pf', 'strategy_type']}
-
-        # 1. Run sur in-sample pour vérifier les perfs initiales
-        if strategy_funcs and strat_type in strategy_funcs:
-            strategy_func = strategy_funcs[strat_type]
-        else:
-            continue  # Skip si pas de fonction associée
-
-        res_in = run_backtest_on_period(strategy_func, params, in_sample)
-        res_out = run_backtest_on_period(strategy_func, params, out_sample)
-
-        if res_out['trades'] >= min_trades:
-            # Filtre anti-suroptimisation : on garde ceux qui ne s'effondrent pas OOS
-            ratio = res_out['cagr'] / res_in['cagr'] if res_in['cagr'] else np.nan
-            robust = ratio > 0.5 and res_out['cagr'] > 0  # Ex : CAGR OOS doit être >0 et >50% de l'in
-            results.append({
-                **params,
-                'strategy_type': strat_type,
-                'trades_in': res_in['trades'],
-                'cagr_in': res_in['cagr'],
-                'sharpe_in': res_in['sharpe'],
-                'max_dd_in': res_in['max_dd'],
-                'pf_in': res_in['pf'],
-                'trades_out': res_out['trades'],
-                'cagr_out': res_out['cagr'],
-                'sharpe_out': res_out['sharpe'],
-                'max_dd_out': res_out['max_dd'],
-                'pf_out': res_out['pf'],
-                'robust': robust,
-                'robust_ratio': ratio
-            })
-
-    robust_df = pd.DataFrame(results)
-    robust_df = robust_df[robust_df['robust']]
-    return robust_df
-
-# À compléter : Ajoute ici la logique walk-forward si tu veux le mode "pro++".
-# Je peux te plug un walk-forward splitter ou une validation croisée si tu veux aller plus loin.
+    strategy_funcs = strategy_funcs or strategies.STRATEGY_FUNCS
+    data = backtester.market_data(price_data)
+    tickers = data.tickers
+    df = setups_df.reset_index(drop=True)
+    if "strategy" not in df.columns:
+        df.insert(0, "strategy", df.pop("strategy_type") if "strategy_type" in df.columns
+                  else "moving_average_crossover")
+    if tickers is not None and "ticker" not in df.columns:
+        df = df.loc[df.index.repeat(len(tickers))].reset_index(drop=True)
+        df.insert(1, "ticker", np.tile(np.asarray(tickers, dtype=object), len(df) // len(tickers)))
+
+    available = backtester.available_inputs(data)
+    groups, skipped = {}, []
+    for strat_name, index in df.groupby("strategy", sort=False).groups.items():
+        if strat_name not in strategy_funcs:
+            continue
+        if not set(strategies.required_inputs(strat_name)) <= available:
+            skipped.append(strat_name)
+            continue
+        records = setup_records(df.loc[index])
+        unique = {}
+        row_setup = np.array([unique.setdefault(tuple(sorted(r.items())), len(unique)) for r in records])
+        groups[strat_name] = (index, records, row_setup, [dict(key) for key in unique])
+    if skipped:
+        print(f"Stratégies ignorées (entrées manquantes dans les données) : {skipped}")
+
+    labels = split_labels(len(data), split_ratio)
+    chunk_size = chunk_size or config.PARALLEL_CHUNK_SIZE
+    chunks = [
+        (strategy_funcs[strat_name], part, labels)
+        for strat_name, (_, _, _, setups) in groups.items()
+        for part in parallel.chunked(setups, chunk_size)
+    ]
+    results = iter(list(parallel.imap_chunks(_validate_chunk, chunks, data, workers=workers)))
+
+    n_periods = len(PERIODS)
+    frames = []
+    for strat_name, (index, records, row_setup, setups) in groups.items():
+        setup_metrics, valid = {}, []
+        for _ in parallel.chunked(setups, chunk_size):
+            part_metrics, part_valid = next(results)
+            for name, values in part_metrics.items():
+                setup_metrics.setdefault(name, []).append(values)
+            valid.append(part_valid)
+        valid = np.concatenate(valid)
+        ticker_pos = (np.zeros(len(index), dtype=np.int64) if tickers is None
+                      else pd.Index(tickers).get_indexer(df.loc[index, "ticker"]))
+        out = pd.DataFrame(records)
+        out.insert(0, "strategy", strat_name)
+        if tickers is not None:
+            out.insert(1, "ticker", df.loc[index, "ticker"].to_numpy())
+        for name, parts in setup_metrics.items():
+            values = np.concatenate(parts)
+            for period, suffix in PERIODS.items():
+                out[f"{name}_{suffix}"] = values[row_setup, ticker_pos * n_periods + period]
+        frames.append(out[valid[row_setup]])
+
+    if not frames:
+        return pd.DataFrame()
+    robust_df = pd.concat(frames, ignore_index=True)
+    metric_cols = [f"{name}_{suffix}" for name in config.METRICS for suffix in PERIODS.values()]
+    lead = [c for c in ID_COLUMNS if c in robust_df.columns]
+    params = [c for c in robust_df.columns if c not in lead and c not in metric_cols]
+    robust_df = robust_df[lead + params + metric_cols]
+    robust_df = robust_df[robust_df["trades_out"] >= min_trades]
+    # Filtre anti-suroptimisation : on garde ceux qui ne s'effondrent pas OOS
+    cagr_in, cagr_out = robust_df["cagr_in"], robust_df["cagr_out"]
+    robust_df["robust_ratio"] = (cagr_out / cagr_in).where(cagr_in != 0)
+    robust_df["robust"] = (robust_df["robust_ratio"] > 0.5) & (cagr_out > 0)  # CAGR OOS > 0 et > 50 % de l'IS
+    return robust_df[robust_df["robust"]].reset_index(drop=True)
 
 if __name__ == "__main__":
     print("Module de validation prêt à être utilisé dans le pipeline V4.")
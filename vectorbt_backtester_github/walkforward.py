@@ -3,6 +3,10 @@ walkforward.py
 
 Module professionnel pour validation walk-forward (rolling window) de stratégies de trading.
 Découpe l'historique en multiples fenêtres. Optimise sur la partie train, valide sur la partie test.
+Les signaux sont générés une fois sur tout l'historique, puis chaque fenêtre est évaluée
+comme une plage de ces tableaux (pas de re-découpage des prix ni de recalcul des indicateurs).
+Les prix sont convertis une fois en MarketData (market_data.py) : workers et stratégies
+travaillent sur le même buffer OHLCV (high/low/volume pour les stratégies qui les demandent).
 Renvoie les setups vraiment robustes (= qui gagnent sur la majorité des périodes OOS).
 
 Usage basique :
@@ -13,23 +17,33 @@ Usage basique :
         window_size=500, test_size=100, min_trades=15
     )
 
+    # Optimisation in-sample par fenêtre + courbe de capital OOS recollée
+    selections, oos_equity = walkforward_optimize(
+        price_data, strategy_funcs, param_grid, objective="sharpe", top_k=5
+    )
+
 A personnaliser selon ton workflow.
 
 """
 
 import pandas as pd
 import numpy as np
+import backtester
+import config
+import metrics
+import parallel
 
-def walkforward_split(price_data, window_size=500, test_size=100):
+def walkforward_split(price_data, window_size=500, test_size=100, anchored=False):
     """
     Génère les indices train/test pour chaque fenêtre rolling.
     - window_size: nombre de bougies (jours, etc.) dans la fenêtre totale (train+test)
     - test_size: nombre de bougies en test (OOS)
+    - anchored: True = le train démarre toujours au début de l'historique (fenêtre ancrée)
     """
     total = len(price_data)
     windows = []
     for start in range(0, total - window_size - test_size + 1, test_size):
-        train_start = start
+        train_start = 0 if anchored else start
         train_end = start + window_size
         test_end = train_end + test_size
         if test_end > total:
@@ -40,14 +54,133 @@ def walkforward_split(price_data, window_size=500, test_size=100):
         })
     return windows
 
-def run_backtest(strategy_func, params, price_data):
+def window_index(windows, part="test"):
+    """
+    Indices des barres de chaque fenêtre, en tableau (longueur, n_fenêtres) :
+    la colonne w contient range(*windows[w][part]). Toutes les fenêtres ont la même longueur.
     """
-    Lance le backtest pour une stratégie donnée (fonction + params).
-    Doit retourner un dict avec les stats, ex : {'cagr': ..., 'sharpe': ..., 'trades': ..., ...}
+    starts = np.array([w[part][0] for w in windows], dtype=np.int64)
+    lengths = {w[part][1] - w[part][0] for w in windows}
+    if len(lengths) != 1:
+        raise ValueError("Les fenêtres doivent toutes avoir la même longueur")
+    return starts[None, :] + np.arange(lengths.pop())[:, None]
+
+def window_annualization(index, idx):
+    """Durée en années et barres par an de chaque fenêtre (annualisation des métriques)."""
+    years = np.array([metrics.years_between(index[idx[:, w]]) for w in range(idx.shape[1])])
+    ppy = np.array([metrics.periods_per_year(index[idx[:, w]]) for w in range(idx.shape[1])])
+    return years, ppy
+
+def simulate_windows(close, entries, exits, idx, sl_stop, tp_stop, names=None, with_returns=False):
     """
-    return strategy_func(price_data, **params)
+    Simule n setups sur toutes les fenêtres d'idx en un seul appel à from_signals.
+    entries / exits : signaux (n_barres, n_setups) calculés sur tout l'historique, puis
+    découpés par fenêtre (colonne = setup x fenêtre) : les indicateurs gardent leur warm-up,
+    chaque fenêtre démarre sans position.
+    Renvoie {métrique: tableau (n_setups, n_fenêtres)} (métriques 'names', config.METRICS par défaut).
+    Avec with_returns=True, ajoute "returns" : rendements par barre (n_setups, longueur, n_fenêtres).
+    """
+    length, n_windows = idx.shape
+    n_setups = entries.shape[1]
+    win_entries = entries[idx].transpose(0, 2, 1).reshape(length, n_setups * n_windows)
+    win_exits = exits[idx].transpose(0, 2, 1).reshape(length, n_setups * n_windows)
+    pf = backtester.simulate_batch(
+        pd.DataFrame(close.to_numpy()[idx]), win_entries, win_exits,
+        np.repeat(sl_stop, n_windows), np.repeat(tp_stop, n_windows)
+    )
+    years, ppy = window_annualization(close.index, idx)
+    values = metrics.compute_metrics(
+        pf, names or config.METRICS, years=np.tile(years, n_setups), ppy=np.tile(ppy, n_setups)
+    )
+    out = {name: v.reshape(n_setups, n_windows) for name, v in values.items()}
+    if with_returns:
+        returns = np.nan_to_num(pf.returns().to_numpy())
+        out["returns"] = returns.reshape(length, n_setups, n_windows).transpose(1, 0, 2)
+    return out
+
+def evaluate_windows(close, idx, func, params_list, batch_size=None, names=None, with_returns=False,
+                     signals=None, inputs=None):
+    """
+    Métriques par fenêtre de chaque jeu de params d'une stratégie.
+    inputs : entrées OHLCV disponibles (voir backtester.market_inputs) ; seules celles requises
+    par la stratégie (strategies.STRATEGY_INPUTS) lui sont passées.
+    Les signaux sont générés une fois par jeu de params sur tout l'historique,
+    les simulations groupées par paquets de batch_size colonnes (config.BATCH_SIZE).
+    signals : dict {clé de signal: (entries, exits)} à réutiliser entre plusieurs appels
+    (même stratégie, même close) ; par défaut, un cache local à l'appel.
+    Renvoie une liste alignée sur params_list : {métrique: tableau (n_fenêtres,)} ou None.
+    """
+    batch_size = batch_size or config.BATCH_SIZE
+    signal_names = backtester.signal_param_names(func)
+    inputs = backtester.strategy_inputs(func.__name__, inputs)
+    per_batch = max(batch_size // idx.shape[1], 1)
+    out = [None] * len(params_list)
+    signals = {} if signals is None else signals
+    for start in range(0, len(params_list), per_batch):
+        positions, entries_cols, exits_cols, sl_stop, tp_stop = [], [], [], [], []
+        for pos in range(start, min(start + per_batch, len(params_list))):
+            signal, (sl, tp) = backtester.split_setup(params_list[pos], signal_names)
+            if signal not in signals:
+                signals[signal] = backtester.generate_signals(func, close, signal, inputs)
+            if signals[signal] is None:
+                continue
+            positions.append(pos)
+            entries_cols.append(signals[signal][0])
+            exits_cols.append(signals[signal][1])
+            sl_stop.append(np.nan if sl is None else sl)
+            tp_stop.append(np.nan if tp is None else tp)
+        if not positions:
+            continue
+        values = simulate_windows(
+            close, np.column_stack(entries_cols), np.column_stack(exits_cols), idx, sl_stop, tp_stop,
+            names, with_returns
+        )
+        for i, pos in enumerate(positions):
+            out[pos] = {name: v[i] for name, v in values.items()}
+    return out
+
+def summarize_windows(strat_name, params, window_metrics, min_trades):
+    """
+    Résume les métriques OOS par fenêtre d'un jeu de params.
+    Renvoie le dict de résultat si le setup est robuste (valide sur >50% des fenêtres), sinon None.
+    """
+    if window_metrics is None:
+        return None
+    n_windows = len(window_metrics["trades"])
+    valid = (window_metrics["trades"] >= min_trades) & (window_metrics["cagr"] > 0)
+    valid_count = int(valid.sum())
+    # Si la stratégie est valide sur >50% des fenêtres, on la considère robuste
+    if valid_count < n_windows // 2:
+        return None
+
+    def mean_valid(name):
+        return np.mean(window_metrics[name][valid]) if valid_count else np.nan
+
+    return {
+        "strategy": strat_name,
+        **params,
+        "valid_windows": valid_count,
+        "total_windows": n_windows,
+        "mean_oos_cagr": mean_valid("cagr"),
+        "mean_oos_sharpe": mean_valid("sharpe"),
+        "mean_oos_max_dd": mean_valid("max_dd"),
+        "mean_oos_trades": mean_valid("trades"),
+    }
+
+def _walkforward_chunk(price_data, chunk):
+    """Tâche (worker ou locale) : évalue un paquet de params d'une stratégie."""
+    strat_name, func, params_list, windows, min_trades = chunk
+    close, inputs = backtester.market_inputs(price_data)
+    window_metrics = evaluate_windows(close, window_index(windows, "test"), func, params_list, inputs=inputs)
+    results = []
+    for params, values in zip(params_list, window_metrics):
+        res = summarize_windows(strat_name, params, values, min_trades)
+        if res is not None:
+            results.append(res)
+    return results
 
-def walkforward_validate(price_data, strategy_funcs, param_grid, window_size=500, test_size=100, min_trades=15):
+def walkforward_validate(price_data, strategy_funcs, param_grid, window_size=500, test_size=100, min_trades=15,
+                         workers=1, chunk_size=50):
     """
     Validation walk-forward :
     - price_data : dataframe OHLC (avec DateTimeIndex)
@@ -55,50 +188,119 @@ def walkforward_validate(price_data, strategy_funcs, param_grid, window_size=500
     - param_grid : dict {nom_strategie: liste de dict de params}
     - window_size, test_size : params rolling window
     - min_trades : nombre min de trades pour valider OOS
+    - workers : nb de processus (les params sont répartis par paquets de chunk_size,
+      price_data est partagé en mémoire ; voir parallel.py)
+    Les signaux sont calculés une seule fois sur tout l'historique (warm-up correct des
+    indicateurs, même une MA 200 sur une fenêtre de 100 barres) ; chaque fenêtre de test
+    est ensuite simulée comme une plage de ces mêmes tableaux.
     Retourne un DataFrame des setups robustes sur la majorité des fenêtres.
     """
+    price_data = backtester.market_data(price_data)
     windows = walkforward_split(price_data, window_size, test_size)
-    all_results = []
+    chunks = [
+        (strat_name, func, part, windows, min_trades)
+        for strat_name, func in strategy_funcs.items()
+        for part in parallel.chunked(param_grid.get(strat_name, []), chunk_size)
+    ]
 
-    for strat_name, func in strategy_funcs.items():
-        grid = param_grid.get(strat_name, [])
-        for params in grid:
-            oos_cagrs = []
-            oos_sharpes = []
-            oos_maxdds = []
-            oos_trades = []
-            valid_count = 0
-            for w in windows:
-                train = price_data.iloc[w["train"][0]:w["train"][1]]
-                test = price_data.iloc[w["test"][0]:w["test"][1]]
-
-                # On backtest sur la période d'entraînement (peut-être pour auto-sélectionner les params)
-                # Mais ici, on suppose qu'on backtest déjà sur tout le grid.
-
-                # On teste la perf OOS
-                res = run_backtest(func, params, test)
-                if res.get('trades', 0) >= min_trades and res.get('cagr', 0) > 0:
-                    valid_count += 1
-                    oos_cagrs.append(res.get('cagr', 0))
-                    oos_sharpes.append(res.get('sharpe', 0))
-                    oos_maxdds.append(res.get('max_dd', 0))
-                    oos_trades.append(res.get('trades', 0))
-            # Si la stratégie est valide sur >50% des fenêtres, on la considère robuste
-            if valid_count >= len(windows) // 2:
-                all_results.append({
-                    "strategy": strat_name,
-                    **params,
-                    "valid_windows": valid_count,
-                    "total_windows": len(windows),
-                    "mean_oos_cagr": np.mean(oos_cagrs) if oos_cagrs else np.nan,
-                    "mean_oos_sharpe": np.mean(oos_sharpes) if oos_sharpes else np.nan,
-                    "mean_oos_max_dd": np.mean(oos_maxdds) if oos_maxdds else np.nan,
-                    "mean_oos_trades": np.mean(oos_trades) if oos_trades else np.nan,
-                })
+    all_results = []
+    for res in parallel.imap_chunks(_walkforward_chunk, chunks, price_data, workers=workers):
+        all_results.extend(res)
 
     results_df = pd.DataFrame(all_results)
+    if results_df.empty:
+        return results_df
     results_df = results_df.sort_values(by="mean_oos_cagr", ascending=False)
     return results_df
 
+def optimize_window(close, window, strategy_funcs, param_grid, objective="sharpe", top_k=5, min_trades=15,
+                    signals=None, inputs=None):
+    """
+    Optimisation in-sample d'une fenêtre : toute la grille est évaluée sur le train (sweep vectorisé),
+    les top_k setups selon 'objective' (avec min_trades+ trades en train) sont ensuite évalués sur le test.
+    signals : {nom_strategie: cache de signaux} partagé entre fenêtres (voir evaluate_windows).
+    inputs : entrées OHLCV disponibles (voir evaluate_windows).
+    Renvoie (rows, oos_returns) :
+    - rows : une ligne par setup retenu (métriques is_* et oos_*)
+    - oos_returns : rendements par barre du test, moyenne équipondérée des setups retenus
+    """
+    signals = {} if signals is None else signals
+    names = list(dict.fromkeys(config.METRICS + [objective]))
+    train_idx = np.arange(*window["train"])[:, None]
+    test_idx = np.arange(*window["test"])[:, None]
+
+    candidates = []
+    for strat_name, func in strategy_funcs.items():
+        params_list = param_grid.get(strat_name, [])
+        values = evaluate_windows(close, train_idx, func, params_list, names=names,
+                                  signals=signals.setdefault(strat_name, {}), inputs=inputs)
+        for params, v in zip(params_list, values):
+            if v is None or v["trades"][0] < min_trades or np.isnan(v[objective][0]):
+                continue
+            candidates.append((v[objective][0], strat_name, params, v))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    rows, returns = [], []
+    for rank, (score, strat_name, params, is_values) in enumerate(candidates[:top_k], start=1):
+        func = strategy_funcs[strat_name]
+        oos = evaluate_windows(close, test_idx, func, [params], names=names, with_returns=True,
+                               signals=signals[strat_name], inputs=inputs)[0]
+        returns.append(oos["returns"][:, 0])
+        rows.append({
+            "train_start": close.index[window["train"][0]],
+            "test_start": close.index[window["test"][0]],
+            "test_end": close.index[window["test"][1] - 1],
+            "rank": rank,
+            "strategy": strat_name,
+            **params,
+            **{f"is_{name}": is_values[name][0] for name in names},
+            **{f"oos_{name}": oos[name][0] for name in names},
+        })
+    length = window["test"][1] - window["test"][0]
+    oos_returns = np.mean(returns, axis=0) if returns else np.zeros(length)
+    return rows, pd.Series(oos_returns, index=close.index[window["test"][0]:window["test"][1]])
+
+def _optimize_chunk(price_data, chunk):
+    """Tâche (worker ou locale) : optimise un paquet de fenêtres consécutives."""
+    positions, windows, strategy_funcs, param_grid, objective, top_k, min_trades = chunk
+    close, inputs = backtester.market_inputs(price_data)
+    signals = {}
+    results = []
+    for pos in positions:
+        rows, oos_returns = optimize_window(close, windows[pos], strategy_funcs, param_grid,
+                                            objective, top_k, min_trades, signals, inputs)
+        results.append((pos, rows, oos_returns))
+    return results
+
+def walkforward_optimize(price_data, strategy_funcs, param_grid, window_size=500, test_size=100, min_trades=15,
+                         objective="sharpe", top_k=5, anchored=False, workers=1):
+    """
+    Walk-forward avec vraie optimisation : pour chaque fenêtre, sélection des top_k setups
+    sur le train selon 'objective' (métrique de metrics.py), puis évaluation sur le test.
+    - anchored : fenêtres ancrées (train depuis le début) au lieu de glissantes
+    - workers : nb de processus ; les fenêtres sont réparties en paquets consécutifs
+      (un worker réutilise ses signaux d'une fenêtre à l'autre)
+    Renvoie (results_df, oos_equity) :
+    - results_df : une ligne par fenêtre x setup retenu
+    - oos_equity : courbe de capital OOS recollée fenêtre après fenêtre (1 au départ)
+    """
+    price_data = backtester.market_data(price_data)
+    windows = walkforward_split(price_data, window_size, test_size, anchored)
+    per_chunk = -(-len(windows) // max(workers, 1))
+    chunks = [
+        (part, windows, strategy_funcs, param_grid, objective, top_k, min_trades)
+        for part in parallel.chunked(list(range(len(windows))), max(per_chunk, 1))
+    ]
+
+    rows, oos_returns = [], []
+    for results in parallel.imap_chunks(_optimize_chunk, chunks, price_data, workers=workers):
+        for pos, window_rows, window_returns in results:
+            rows.extend({"wf_window": pos, **row} for row in window_rows)
+            oos_returns.append(window_returns)
+
+    oos_returns = pd.concat(oos_returns) if oos_returns else pd.Series(dtype=float)
+    oos_equity = (1 + oos_returns).cumprod()
+    return pd.DataFrame(rows), oos_equity
+
 if __name__ == "__main__":
     print("Module walk-forward V4 prêt à être utilisé dans le pipeline.")